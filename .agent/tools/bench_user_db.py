@@ -0,0 +1,92 @@
+# .agent/tools/bench_user_db.py
+"""
+UserDBTool の検索方式ごとの lookups/sec を、ローカルの SQLite で計測します。
+
+    python .agent/tools/bench_user_db.py --users 10000 --lookups 2000 --batch 50
+
+- per-call: 呼び出しごとに接続を開き、1 件ずつ検索する（従来の実装を想定）
+- pooled:   接続プールを使い、1 件ずつ検索する
+- bulk:     接続プールを使い、--batch 件ずつ 1 回の IN クエリで検索する
+- cached:   bulk + TTL キャッシュ（同じメールアドレスを繰り返し検索する）
+"""
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from typing import Callable, List
+
+from user_db import TTLCache, UserRepository, sqlite_pool
+
+logger = logging.getLogger(__name__)
+
+
+def make_database(path: str, users: int) -> None:
+    with sqlite3.connect(path) as connection:
+        connection.execute("DROP TABLE IF EXISTS users")
+        connection.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, status TEXT, email TEXT)")
+        connection.executemany(
+            "INSERT INTO users VALUES (?, ?, ?, ?)",
+            ((i, f"user {i}", "active", f"user{i}@example.com") for i in range(users)),
+        )
+
+
+def per_call_lookup(path: str, email: str) -> None:
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute("SELECT id, name, status, email FROM users WHERE lower(email) = ?", (email,)).fetchall()
+    finally:
+        connection.close()
+
+
+def measure(name: str, lookups: int, run: Callable[[], None]) -> float:
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    rate = lookups / elapsed
+    logger.info(f"{name:<9} {lookups:>7} lookups  {elapsed:8.3f}s  {rate:12,.0f} lookups/sec")
+    return rate
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=50, help="emails per bulk call")
+    parser.add_argument("--distinct", type=int, default=200, help="distinct emails looked up (including misses)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    rng = random.Random(args.seed)
+    # 1 割は存在しないメールアドレス（ネガティブキャッシュの対象）
+    pool_of_emails = [
+        f"user{rng.randrange(args.users)}@example.com" if i % 10 else f"missing{i}@example.com"
+        for i in range(args.distinct)
+    ]
+    emails = [rng.choice(pool_of_emails) for _ in range(args.lookups)]
+    batches = [emails[i:i + args.batch] for i in range(0, len(emails), args.batch)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "users.db")
+        make_database(path, args.users)
+
+        pooled = UserRepository(sqlite_pool(path))
+        cached = UserRepository(sqlite_pool(path), cache=TTLCache())
+        # 検索条件の lower(email) に対するインデックス（アプリケーションと同じものを作成する）
+        pooled.ensure_email_index()
+        baseline = measure("per-call", len(emails), lambda: [per_call_lookup(path, e) for e in emails])
+        results = {
+            "pooled": measure("pooled", len(emails), lambda: [pooled.search_user(e) for e in emails]),
+            "bulk": measure("bulk", len(emails), lambda: [pooled.search_users(b) for b in batches]),
+            "cached": measure("cached", len(emails), lambda: [cached.search_users(b) for b in batches]),
+        }
+        for name, rate in results.items():
+            logger.info(f"{name:<9} x{rate / baseline:.1f} vs per-call")
+        logger.info(f"cache: {cached.cache.hits} hits, {cached.cache.misses} misses")
+
+
+if __name__ == "__main__":
+    main()
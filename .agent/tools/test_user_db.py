@@ -0,0 +1,179 @@
+# .agent/tools/test_user_db.py
+import re
+import sqlite3
+import threading
+
+import pytest
+
+from user_db import (
+    ConnectionPool,
+    PoolTimeoutError,
+    TTLCache,
+    User,
+    UserLookupError,
+    UserRepository,
+    sqlite_pool,
+)
+
+USERS = [
+    (1, "山田 太郎", "active", "taro@example.com"),
+    (2, "佐藤 花子", "active", "Hanako@Example.com"),
+    (3, "鈴木 一郎", "inactive", "ichiro@example.com"),
+]
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "users.db")
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, status TEXT, email TEXT)")
+        connection.executemany("INSERT INTO users VALUES (?, ?, ?, ?)", USERS)
+    return path
+
+
+def counting_pool(path: str, **kwargs):
+    """発行された SQL を記録する接続プール"""
+    statements = []
+
+    def connect():
+        connection = sqlite3.connect(path, check_same_thread=False)
+        connection.set_trace_callback(statements.append)
+        return connection
+
+    return ConnectionPool(connect, **kwargs), statements
+
+
+def test_search_users_uses_a_single_in_query(db_path):
+    pool, statements = counting_pool(db_path)
+    repository = UserRepository(pool)
+
+    result = repository.search_users(["taro@example.com", " HANAKO@example.com", "nobody@example.com"])
+
+    assert list(result) == ["taro@example.com", "hanako@example.com", "nobody@example.com"]
+    assert result["taro@example.com"] == User(1, "山田 太郎", "active", "taro@example.com")
+    assert result["hanako@example.com"].id == 2
+    assert result["nobody@example.com"] is None
+    assert len(statements) == 1
+    assert " IN (" in statements[0]
+
+
+def test_search_users_chunks_large_batches(db_path):
+    pool, statements = counting_pool(db_path)
+    repository = UserRepository(pool, chunk_size=2)
+
+    result = repository.search_users([u[3] for u in USERS] + ["a@example.com", "taro@example.com"])
+
+    assert len(result) == 4
+    assert len(statements) == 2
+
+
+def test_search_user_returns_none_when_missing(db_path):
+    repository = UserRepository(sqlite_pool(db_path))
+    assert repository.search_user("ichiro@example.com").status == "inactive"
+    assert repository.search_user("missing@example.com") is None
+
+
+def test_cache_serves_hits_and_negative_results(db_path):
+    clock = FakeClock()
+    pool, statements = counting_pool(db_path)
+    repository = UserRepository(pool, cache=TTLCache(ttl=60, negative_ttl=5, clock=clock))
+
+    repository.search_users(["taro@example.com", "missing@example.com"])
+    repository.search_users(["taro@example.com", "missing@example.com"])
+    assert len(statements) == 1
+    assert repository.cache.hits == 2
+
+    # 見つからなかった結果は negative_ttl で期限切れになり、再度検索される
+    clock.now = 10
+    assert repository.search_users(["taro@example.com", "missing@example.com"])["missing@example.com"] is None
+    assert len(statements) == 2
+    assert "'missing@example.com'" in statements[1]
+    assert "'taro@example.com'" not in statements[1]
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TTLCache(ttl=60, negative_ttl=60, max_entries=2, clock=FakeClock())
+    user = User(1, "a", "active", "a@example.com")
+    cache.put("a", user)
+    cache.put("b", None)
+    cache.get("a")
+    cache.put("c", None)
+    assert cache.get("a") is user
+    assert cache.get("c") is None
+    assert cache.get("b") is not None  # _MISSING
+
+
+def test_pool_reuses_connections_across_threads(db_path):
+    created = []
+
+    def connect():
+        created.append(1)
+        return sqlite3.connect(db_path, check_same_thread=False)
+
+    repository = UserRepository(ConnectionPool(connect, max_size=2))
+
+    def worker():
+        for _ in range(20):
+            repository.search_user("taro@example.com")
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert 1 <= len(created) <= 2
+
+
+def test_pool_times_out_when_exhausted(db_path):
+    pool = sqlite_pool(db_path, max_size=1)
+    pool.timeout = 0.01
+    with pool.connection():
+        with pytest.raises(PoolTimeoutError):
+            with pool.connection():
+                pass
+
+
+def test_database_errors_are_wrapped_and_connection_discarded(db_path):
+    pool = sqlite_pool(db_path, max_size=1)
+    repository = UserRepository(pool, table="no_such_table")
+    with pytest.raises(UserLookupError):
+        repository.search_user("taro@example.com")
+    assert pool.size == 0
+
+
+def _query_plan(path: str, repository: UserRepository) -> str:
+    with sqlite3.connect(path) as connection:
+        rows = connection.execute(
+            f"EXPLAIN QUERY PLAN SELECT id FROM users WHERE {repository.email_column} IN (?, ?)", ("a", "b")
+        ).fetchall()
+    return " ".join(row[-1] for row in rows)
+
+
+@pytest.mark.parametrize("normalized", [False, True])
+def test_ensure_email_index_makes_lookups_use_an_index(db_path, normalized):
+    repository = UserRepository(sqlite_pool(db_path), emails_normalized=normalized)
+    assert "users_email_lookup" not in _query_plan(db_path, repository)
+
+    repository.ensure_email_index()
+    repository.ensure_email_index()  # 既にあれば何もしない
+    assert re.search(r"USING (COVERING )?INDEX users_email_lookup", _query_plan(db_path, repository))
+
+
+def test_normalized_emails_are_matched_on_the_plain_column(db_path):
+    pool, statements = counting_pool(db_path)
+    repository = UserRepository(pool, emails_normalized=True)
+
+    result = repository.search_users(["TARO@example.com", "hanako@example.com"])
+
+    assert result["taro@example.com"].id == 1
+    # 正規化されていない行 (Hanako@Example.com) は一致しない
+    assert result["hanako@example.com"] is None
+    assert "WHERE email IN (" in statements[0]
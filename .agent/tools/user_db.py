@@ -0,0 +1,262 @@
+# .agent/tools/user_db.py
+"""
+UserDBTool のデータアクセス層。
+
+- ConnectionPool: DB 接続を使い回す（呼び出しごとに接続を開かない）
+- TTLCache: 検索結果を一定時間キャッシュする。見つからなかったメールアドレスも
+  短めの TTL でキャッシュする（ネガティブキャッシュ）
+- UserRepository: 複数のメールアドレスを 1 回の `IN (...)` クエリでまとめて検索する
+
+DB-API 2.0 準拠のドライバであれば接続ファクトリとプレースホルダを差し替えて使えます
+（sqlite3 は "?"、psycopg は "%s"）。
+
+メールアドレスの大文字・小文字を区別しない検索は `lower(email) IN (...)` で行うため、
+`lower(email)` の関数インデックスが必要です（email 列の通常のインデックスは使われず全件走査になります）。
+UserRepository.ensure_email_index() で作成できます（SQLite / PostgreSQL の構文）。
+書き込み時にメールアドレスを小文字に正規化している DB では emails_normalized=True を指定すると、
+`email IN (...)` で検索し、email 列の通常のインデックスを使います。
+"""
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = int(os.environ.get("USER_DB_POOL_SIZE", "5"))
+DEFAULT_POOL_TIMEOUT = float(os.environ.get("USER_DB_POOL_TIMEOUT", "10"))
+DEFAULT_CACHE_TTL = float(os.environ.get("USER_DB_CACHE_TTL", "300"))
+DEFAULT_NEGATIVE_TTL = float(os.environ.get("USER_DB_NEGATIVE_TTL", "60"))
+DEFAULT_CACHE_SIZE = int(os.environ.get("USER_DB_CACHE_SIZE", "10000"))
+# 1 クエリの IN 句に含めるメールアドレスの上限（SQLite のパラメータ数上限より小さくする）
+DEFAULT_CHUNK_SIZE = 500
+
+
+class UserLookupError(Exception):
+    """ユーザー検索に失敗した場合の例外"""
+
+
+class PoolTimeoutError(UserLookupError):
+    """接続プールから時間内に接続を取得できなかった場合の例外"""
+
+
+@dataclass(frozen=True)
+class User:
+    id: int
+    name: str
+    status: str
+    email: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+class ConnectionPool:
+    """スレッドセーフな DB 接続プール。接続は必要になった時点で max_size まで作成します。"""
+
+    def __init__(self, connect: Callable[[], Any], max_size: int = DEFAULT_POOL_SIZE,
+                 timeout: float = DEFAULT_POOL_TIMEOUT):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self._connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[Any]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """作成済みの接続数"""
+        return self._created
+
+    def _acquire(self) -> Any:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.max_size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty as e:
+            raise PoolTimeoutError(f"No database connection available within {self.timeout}s") from e
+
+    def _discard(self, connection: Any) -> None:
+        with self._lock:
+            self._created -= 1
+        try:
+            connection.close()
+        except Exception as e:
+            logger.warning(f"Failed to close a broken connection: {e}")
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """接続を借りて、終了時にプールへ戻します。DB エラーが起きた接続は破棄します。"""
+        connection = self._acquire()
+        try:
+            yield connection
+        except Exception:
+            self._discard(connection)
+            raise
+        else:
+            self._idle.put(connection)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._created -= 1
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    TTL 付きの LRU キャッシュ。値が None（見つからなかった）の場合は negative_ttl を使います。
+    """
+
+    def __init__(self, ttl: float = DEFAULT_CACHE_TTL, negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+                 max_entries: int = DEFAULT_CACHE_SIZE, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Optional[User]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        """キャッシュされた値（None を含む）を返します。無い・期限切れの場合は _MISSING。"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self._clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value: Optional[User]) -> None:
+        ttl = self.ttl if value is not None else self.negative_ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+class UserRepository:
+    """メールアドレスによるユーザー検索（接続プール・一括検索・キャッシュ付き）"""
+
+    def __init__(self, pool: ConnectionPool, cache: Optional[TTLCache] = None, table: str = "users",
+                 placeholder: str = "?", chunk_size: int = DEFAULT_CHUNK_SIZE, emails_normalized: bool = False):
+        self.pool = pool
+        self.cache = cache
+        self.table = table
+        self.placeholder = placeholder
+        self.chunk_size = chunk_size
+        # True: email 列は小文字に正規化済み（通常のインデックスで検索できる）
+        self.emails_normalized = emails_normalized
+
+    @property
+    def email_column(self) -> str:
+        """検索条件に使う式（インデックスはこの式に対して必要）"""
+        return "email" if self.emails_normalized else "lower(email)"
+
+    def ensure_email_index(self) -> None:
+        """検索条件の式に対するインデックスが無ければ作成します。"""
+        sql = f"CREATE INDEX IF NOT EXISTS {self.table}_email_lookup ON {self.table} ({self.email_column})"
+        try:
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute(sql)
+                finally:
+                    cursor.close()
+                connection.commit()
+        except Exception as e:
+            logger.error(f"Could not create the email index on {self.table}: {e}", exc_info=True)
+            raise UserLookupError("メールアドレスのインデックスを作成できませんでした") from e
+
+    def search_user(self, email: str) -> Optional[User]:
+        return self.search_users([email])[normalize_email(email)]
+
+    def search_users(self, emails: Iterable[str]) -> Dict[str, Optional[User]]:
+        """
+        メールアドレス（正規化済み）→ User（見つからない場合は None）の dict を入力順で返します。
+        キャッシュに無いものだけを、chunk_size 件ずつ 1 回の IN クエリで検索します。
+        """
+        keys = list(dict.fromkeys(normalize_email(email) for email in emails))
+        results: Dict[str, Optional[User]] = {}
+        pending: List[str] = []
+        for key in keys:
+            cached = self.cache.get(key) if self.cache is not None else _MISSING
+            if cached is _MISSING:
+                pending.append(key)
+            else:
+                results[key] = cached
+        for start in range(0, len(pending), self.chunk_size):
+            chunk = pending[start:start + self.chunk_size]
+            found = self._query(chunk)
+            for key in chunk:
+                user = found.get(key)
+                results[key] = user
+                if self.cache is not None:
+                    self.cache.put(key, user)
+        return {key: results[key] for key in keys}
+
+    def _query(self, emails: List[str]) -> Dict[str, User]:
+        placeholders = ", ".join([self.placeholder] * len(emails))
+        sql = f"SELECT id, name, status, email FROM {self.table} WHERE {self.email_column} IN ({placeholders})"
+        try:
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute(sql, emails)
+                    rows = cursor.fetchall()
+                finally:
+                    cursor.close()
+        except PoolTimeoutError:
+            raise
+        except Exception as e:
+            logger.error(f"User lookup failed for {len(emails)} emails: {e}", exc_info=True)
+            raise UserLookupError("ユーザー情報の検索に失敗しました") from e
+        return {normalize_email(row[3]): User(id=row[0], name=row[1], status=row[2], email=row[3]) for row in rows}
+
+
+def sqlite_pool(path: str, max_size: int = DEFAULT_POOL_SIZE) -> ConnectionPool:
+    """SQLite ファイルへの接続プール（ローカル検証・ベンチマーク用）"""
+    return ConnectionPool(lambda: sqlite3.connect(path, check_same_thread=False), max_size=max_size)
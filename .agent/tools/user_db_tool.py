@@ -1,18 +1,63 @@
 # .agent/tools/user_db_tool.py
 # Remarks: `antigravity.tools` module is not found in PyPI. This code is just a pseudo code.
+import os
+from typing import Dict, List, Optional
+
 from antigravity.tools import Tool, tool
 
+from user_db import TTLCache, UserRepository, sqlite_pool
+
+NOT_FOUND_STATUS = "not_found"
+
+
+def default_repository() -> UserRepository:
+    """
+    環境変数 USER_DB_PATH の DB を使うリポジトリ。
+    社内 DB のドライバを使う場合は、接続ファクトリとプレースホルダを差し替えます。
+    USER_DB_EMAILS_NORMALIZED=1 は email 列が小文字に正規化済みの DB 向けです。
+    検索に必要なインデックスは初回に作成します。
+    """
+    repository = UserRepository(
+        sqlite_pool(os.environ["USER_DB_PATH"]),
+        cache=TTLCache(),
+        emails_normalized=os.environ.get("USER_DB_EMAILS_NORMALIZED") == "1",
+    )
+    repository.ensure_email_index()
+    return repository
+
+
 class UserDBTool(Tool):
     """社内DBからユーザー情報を検索するツール"""
-    
+
+    def __init__(self, repository: Optional[UserRepository] = None):
+        # 接続プールとキャッシュはツールのインスタンス間ではなく呼び出し間で共有する
+        self.repository = repository or default_repository()
+
     @tool
     def search_user(self, email: str) -> dict:
         """
         メールアドレスでユーザーを検索します。
-        
+
         Args:
             email (str): 検索対象のメールアドレス
         """
-        # 実際のDB接続ロジック（例: SQL実行など）
-        # ...
-        return {"id": 123, "name": "山田 太郎", "status": "active"}
+        user = self.repository.search_user(email)
+        if user is None:
+            return {"email": email, "status": NOT_FOUND_STATUS}
+        return user.to_dict()
+
+    @tool
+    def search_users(self, emails: List[str]) -> Dict[str, dict]:
+        """
+        複数のメールアドレスでユーザーをまとめて検索します（1 回のクエリで検索します）。
+
+        Args:
+            emails (list[str]): 検索対象のメールアドレスのリスト
+
+        Returns:
+            メールアドレス（小文字に正規化）をキーとするユーザー情報の dict
+        """
+        return {
+            email: user.to_dict() if user is not None else {"email": email, "status": NOT_FOUND_STATUS}
+            for email, user in self.repository.search_users(emails).items()
+        }
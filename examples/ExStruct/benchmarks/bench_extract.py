@@ -0,0 +1,153 @@
+"""
+Measures read_excel latency, peak RSS and output size per workbook size, mode and format.
+
+Each case runs in a fresh process so its peak RSS is not inflated by earlier cases, and
+the server caches are cleared before every repetition so the extraction itself is timed.
+Results are written as JSON and can be compared with an earlier run:
+
+    python examples/ExStruct/benchmarks/bench_extract.py --out results.json
+    python examples/ExStruct/benchmarks/bench_extract.py --compare results.json
+"""
+import argparse
+import importlib.metadata
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+sys.path.append(os.path.dirname(__file__))
+
+from make_workbooks import PRESETS, make_preset  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not reported
+    resource = None
+
+DEFAULT_MODES = ["light", "stream"]
+DEFAULT_FORMATS = ["json", "min", "table", "csv"]
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_case(path: str, mode: str, fmt: str, repeat: int) -> Dict:
+    """Runs in a child process: times `repeat` uncached reads of one workbook."""
+    from exstruct_server import server
+
+    # Large files would otherwise be switched to streaming; measure the requested mode.
+    server.STREAM_THRESHOLD_BYTES = 0
+    # Unbounded output so both readers return the whole workbook.
+    server.STREAM_MAX_BYTES = None
+    timings = []
+    output = ""
+    for _ in range(repeat):
+        server.result_cache.clear()
+        server.model_cache.clear()
+        start = time.perf_counter()
+        output = server._read_excel(path, mode, None, None, 0, None, fmt)
+        timings.append(time.perf_counter() - start)
+    if output.startswith('{"error"'):
+        raise RuntimeError(output)
+    return {
+        "latency_s": {"min": min(timings), "median": statistics.median(timings), "max": max(timings)},
+        "peak_rss_mb": _peak_rss_mb(),
+        "output_bytes": len(output.encode("utf-8")),
+    }
+
+
+def _isolated(path: str, mode: str, fmt: str, repeat: int) -> Dict:
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as executor:
+        return executor.submit(run_case, path, mode, fmt, repeat).result()
+
+
+def _environment() -> Dict:
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=os.path.dirname(__file__)
+        ).stdout.strip() or None
+    except OSError:
+        revision = None
+    versions = {}
+    for package in ("exstruct", "openpyxl", "mcp", "orjson"):
+        try:
+            versions[package] = importlib.metadata.version(package)
+        except importlib.metadata.PackageNotFoundError:
+            versions[package] = None
+    return {
+        "git_revision": revision,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "packages": versions,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def compare(current: List[Dict], baseline_path: str) -> None:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["size"], r["mode"], r["format"]): r for r in json.load(f)["results"]}
+    print(f"\nvs {baseline_path} (ratio current/baseline, >1 is worse)")
+    for r in current:
+        old = baseline.get((r["size"], r["mode"], r["format"]))
+        if old is None:
+            continue
+        latency = r["latency_s"]["median"] / old["latency_s"]["median"]
+        size = r["output_bytes"] / old["output_bytes"]
+        rss = (r["peak_rss_mb"] / old["peak_rss_mb"]) if r["peak_rss_mb"] and old["peak_rss_mb"] else float("nan")
+        print(f"{r['size']:<8} {r['mode']:<8} {r['format']:<6} latency x{latency:5.2f}  rss x{rss:5.2f}  output x{size:5.2f}")
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=["small", "medium"], choices=list(PRESETS))
+    parser.add_argument("--modes", nargs="+", default=DEFAULT_MODES,
+                        help="standard/verbose may need Excel COM")
+    parser.add_argument("--formats", nargs="+", default=DEFAULT_FORMATS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workbooks", default=os.path.join(os.path.dirname(__file__), "workbooks"))
+    parser.add_argument("--out", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.workbooks, exist_ok=True)
+    results = []
+    print(f"{'size':<8} {'mode':<8} {'format':<6} {'median':>9} {'peak RSS':>10} {'output':>14}")
+    for size in args.sizes:
+        path = make_preset(args.workbooks, size)
+        for mode in args.modes:
+            for fmt in args.formats:
+                try:
+                    case = _isolated(path, mode, fmt, args.repeat)
+                except Exception as e:
+                    print(f"{size:<8} {mode:<8} {fmt:<6} failed: {e}")
+                    continue
+                case.update(size=size, mode=mode, format=fmt, file_bytes=os.path.getsize(path))
+                results.append(case)
+                rss = f"{case['peak_rss_mb']:.1f} MB" if case["peak_rss_mb"] is not None else "n/a"
+                print(f"{size:<8} {mode:<8} {fmt:<6} {case['latency_s']['median']:8.3f}s {rss:>10} "
+                      f"{case['output_bytes']:>12,} B")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"environment": _environment(), "repeat": args.repeat, "results": results}, f, indent=2)
+        print(f"\nWrote {args.out}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Concurrent-client load test against a running ExStruct MCP server (streamable HTTP).
+
+Starts the server itself unless --url is given, then runs --clients MCP sessions in
+parallel, each calling the tool --requests times, and reports latency percentiles,
+throughput, rejected ("Server busy") / failed calls and the server's peak RSS:
+
+    python examples/ExStruct/benchmarks/load_test.py --clients 8 --requests 20 --size medium
+    python examples/ExStruct/benchmarks/load_test.py --url http://127.0.0.1:8000/mcp --file book.xlsx
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+
+sys.path.append(os.path.dirname(__file__))
+
+from bench_extract import _environment  # noqa: E402
+from make_workbooks import PRESETS, make_preset  # noqa: E402
+
+SERVER = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src/exstruct_server/server.py"))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, no_cache: bool, env_overrides: Dict[str, str]) -> subprocess.Popen:
+    env = dict(os.environ, EXSTRUCT_TRANSPORT="streamable-http", EXSTRUCT_PORT=str(port))
+    if no_cache:
+        env.update(EXSTRUCT_CACHE_MAX_BYTES="0", EXSTRUCT_MODEL_CACHE_ENTRIES="0")
+    env.update(env_overrides)
+    process = subprocess.Popen([sys.executable, SERVER], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with code {process.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("server did not start within 30s")
+
+
+def _server_peak_rss_mb(pid: int) -> Optional[float]:
+    # Linux only: the high-water mark of the server's resident set.
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+async def client(url: str, tool: str, arguments: Dict, requests: int, latencies: List[float], outcomes: Dict) -> None:
+    async with streamablehttp_client(url) as (read, write, _):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            for _ in range(requests):
+                start = time.perf_counter()
+                try:
+                    result = await session.call_tool(tool, arguments)
+                    text = result.content[0].text if result.content else ""
+                    if text.startswith('{"error"'):
+                        outcome = "busy" if '"retryable": true' in text else "error"
+                    else:
+                        outcome = "ok"
+                except Exception:
+                    outcome = "error"
+                latencies.append(time.perf_counter() - start)
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+async def run(url: str, args, arguments: Dict) -> Dict:
+    latencies: List[float] = []
+    outcomes: Dict[str, int] = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(url, args.tool, arguments, args.requests, latencies, outcomes) for _ in range(args.clients)
+    ))
+    wall = time.perf_counter() - start
+    return {
+        "clients": args.clients,
+        "requests_per_client": args.requests,
+        "arguments": arguments,
+        "wall_s": wall,
+        "throughput_rps": len(latencies) / wall,
+        "outcomes": outcomes,
+        "latency_s": {
+            "p50": statistics.median(latencies),
+            "p95": _percentile(latencies, 0.95),
+            "p99": _percentile(latencies, 0.99),
+            "max": max(latencies),
+        },
+    }
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="MCP endpoint of a running server; started locally when omitted")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=10, help="calls per client")
+    parser.add_argument("--tool", default="read_excel")
+    parser.add_argument("--file", help="workbook to read (defaults to a generated --size workbook)")
+    parser.add_argument("--size", default="medium", choices=list(PRESETS))
+    parser.add_argument("--mode", default="light")
+    parser.add_argument("--format", default="min")
+    parser.add_argument("--no-cache", action="store_true", help="disable the server caches (local server only)")
+    parser.add_argument("--server-env", nargs="*", default=[], metavar="NAME=VALUE",
+                        help="extra environment for the local server, e.g. EXSTRUCT_WORKERS=2")
+    parser.add_argument("--workbooks", default=os.path.join(os.path.dirname(__file__), "workbooks"))
+    parser.add_argument("--out", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    if args.file:
+        file_path = os.path.abspath(args.file)
+    else:
+        os.makedirs(args.workbooks, exist_ok=True)
+        file_path = os.path.abspath(make_preset(args.workbooks, args.size))
+    arguments = {"file_path": file_path, "mode": args.mode, "format": args.format}
+
+    process = None
+    url = args.url
+    if url is None:
+        port = _free_port()
+        overrides = dict(item.split("=", 1) for item in args.server_env)
+        process = start_server(port, args.no_cache, overrides)
+        url = f"http://127.0.0.1:{port}/mcp"
+    try:
+        result = asyncio.run(run(url, args, arguments))
+        result["server_peak_rss_mb"] = _server_peak_rss_mb(process.pid) if process else None
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+
+    latency = result["latency_s"]
+    print(f"{result['clients']} clients x {result['requests_per_client']} calls of {args.tool} on {os.path.basename(file_path)}")
+    print(f"throughput {result['throughput_rps']:.1f} req/s   outcomes {result['outcomes']}")
+    print(f"latency p50 {latency['p50']:.3f}s  p95 {latency['p95']:.3f}s  p99 {latency['p99']:.3f}s  max {latency['max']:.3f}s")
+    if result["server_peak_rss_mb"] is not None:
+        print(f"server peak RSS {result['server_peak_rss_mb']:.1f} MB")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"environment": _environment(), "result": result}, f, indent=2)
+        print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
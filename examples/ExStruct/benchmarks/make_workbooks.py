@@ -0,0 +1,76 @@
+"""
+Generates synthetic workbooks of increasing size for the ExStruct server benchmarks.
+
+Built the same way as tests/create_sample.py (openpyxl), with a header row, mixed
+numeric/text/date columns and merged ranges:
+
+    python examples/ExStruct/benchmarks/make_workbooks.py --out /tmp/exstruct-bench
+"""
+import argparse
+import datetime
+import os
+from typing import Dict, List
+
+from openpyxl import Workbook
+from openpyxl.utils.cell import get_column_letter
+
+# name -> (rows per sheet, columns, sheets, merged ranges per sheet)
+PRESETS: Dict[str, tuple] = {
+    "small": (100, 8, 1, 2),
+    "medium": (5_000, 20, 3, 20),
+    "large": (50_000, 30, 5, 100),
+}
+
+
+def make_workbook(path: str, rows: int, columns: int, sheets: int, merged: int) -> str:
+    # write_only keeps generation memory flat even for the large preset
+    wb = Workbook(write_only=True)
+    start = datetime.date(2024, 1, 1)
+    for s in range(sheets):
+        ws = wb.create_sheet(f"Sheet{s + 1}")
+        ws.append([f"Header {c + 1}" for c in range(columns)])
+        for r in range(rows):
+            values = []
+            for c in range(columns):
+                kind = c % 4
+                if kind == 0:
+                    values.append(r)
+                elif kind == 1:
+                    values.append(f"text {r}-{c}")
+                elif kind == 2:
+                    values.append(r * 1.25 + c)
+                else:
+                    values.append(start + datetime.timedelta(days=r % 365))
+            ws.append(values)
+        # Merged ranges below the table: a label row merged with the empty row under it.
+        ws.append([])
+        for m in range(merged):
+            r = rows + 3 + m * 2
+            ws.append([f"Group {m + 1}"])
+            ws.append([])
+            ws.merged_cells.add(f"A{r}:{get_column_letter(min(3, columns))}{r + 1}")
+    wb.save(path)
+    return path
+
+
+def make_preset(out_dir: str, name: str) -> str:
+    rows, columns, sheets, merged = PRESETS[name]
+    path = os.path.join(out_dir, f"{name}.xlsx")
+    if os.path.exists(path):
+        return path
+    return make_workbook(path, rows, columns, sheets, merged)
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", default=os.path.join(os.path.dirname(__file__), "workbooks"))
+    parser.add_argument("--sizes", nargs="+", default=list(PRESETS), choices=list(PRESETS))
+    args = parser.parse_args(argv)
+    os.makedirs(args.out, exist_ok=True)
+    for name in args.sizes:
+        path = make_preset(args.out, name)
+        print(f"{name:<8} {os.path.getsize(path):>12,} bytes  {path}")
+
+
+if __name__ == "__main__":
+    main()
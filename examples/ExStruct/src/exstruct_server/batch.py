@@ -0,0 +1,157 @@
+"""
+Multi-file extraction with a process pool.
+
+Files are parsed in parallel worker processes and reported one record per file, in
+completion order, so a caller can consume results while the rest are still being parsed.
+Every record carries the wall time spent on that file; failures carry the exception type
+and message instead of aborting the batch.
+"""
+import asyncio
+import glob
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import AsyncContextManager, AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+import exstruct
+
+try:
+    from exstruct_server.formats import render
+    from exstruct_server.slicing import describe_workbook
+except ImportError:
+    from formats import render
+    from slicing import describe_workbook
+
+EXCEL_SUFFIXES = (".xlsx", ".xlsm", ".xls")
+DEFAULT_MAX_FILES = 1000
+
+
+def resolve_paths(paths: Optional[Iterable[str]] = None, pattern: Optional[str] = None) -> List[str]:
+    """
+    Expands explicit paths and a glob pattern (`**` recurses) into a sorted, de-duplicated
+    list of Excel files. Directories given in `paths` contribute their Excel files.
+    Explicit paths that do not exist are kept so they are reported as per-file errors.
+    """
+    found = set()
+    for path in paths or ():
+        if os.path.isdir(path):
+            found.update(str(p) for p in Path(path).iterdir() if p.suffix.lower() in EXCEL_SUFFIXES)
+        else:
+            found.add(path)
+    if pattern:
+        found.update(p for p in glob.glob(pattern, recursive=True) if p.lower().endswith(EXCEL_SUFFIXES))
+    # Skip Excel's lock files ("~$book.xlsx") which cannot be parsed.
+    return sorted(p for p in found if not os.path.basename(p).startswith("~$"))
+
+
+def _timed(file_path: str, work: Callable[[], str]) -> Dict:
+    start = time.perf_counter()
+    try:
+        content = work()
+        record = {"file": file_path, "ok": True, "content": content}
+    except Exception as e:
+        frame = traceback.extract_tb(e.__traceback__)[-1] if e.__traceback__ else None
+        record = {
+            "file": file_path,
+            "ok": False,
+            "error": {
+                "type": type(e).__name__,
+                "message": str(e),
+                "where": f"{Path(frame.filename).name}:{frame.lineno}" if frame else None,
+            },
+        }
+    record["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return record
+
+
+def extract_file(file_path: str, mode: str, format: str) -> Dict:
+    """Worker: extracts one workbook and renders it in `format`."""
+    def work() -> str:
+        wb = exstruct.extract(file_path, mode=mode)
+        if format == "min":
+            return wb.model_dump_json()
+        return render(wb.model_dump(mode="json"), format)
+    return _timed(file_path, work)
+
+
+def outline_file(file_path: str, mode: str, format: str) -> Dict:
+    """Worker: extracts one workbook and returns its outline (see slicing.describe_workbook) as minified JSON."""
+    return _timed(file_path, lambda: render(describe_workbook(exstruct.extract(file_path, mode=mode)), "min"))
+
+
+def to_jsonl(record: Dict, format: str) -> str:
+    """
+    Encodes a per-file record as one JSON line. JSON content is embedded as-is under
+    "result" (no re-parsing); text formats (csv/tsv/jsonl) are embedded as a string.
+    """
+    content = record.get("content")
+    head = json.dumps({k: v for k, v in record.items() if k != "content"}, ensure_ascii=False)
+    if content is None:
+        return head
+    result = content if format in ("min", "table") else json.dumps(content, ensure_ascii=False)
+    return f'{head[:-1]}, "result": {result}}}'
+
+
+class BatchRunner:
+    """Runs per-file worker functions in a lazily created process pool."""
+
+    def __init__(self, max_workers: Optional[int] = None, max_files: int = DEFAULT_MAX_FILES):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_files = max_files
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @classmethod
+    def from_env(cls) -> "BatchRunner":
+        """Builds a runner from EXSTRUCT_BATCH_WORKERS and EXSTRUCT_BATCH_MAX_FILES."""
+        workers = os.environ.get("EXSTRUCT_BATCH_WORKERS")
+        return cls(
+            max_workers=int(workers) if workers else None,
+            max_files=int(os.environ.get("EXSTRUCT_BATCH_MAX_FILES", DEFAULT_MAX_FILES)),
+        )
+
+    def check_size(self, files: List[str]) -> None:
+        if len(files) > self.max_files:
+            raise ValueError(f"{len(files)} files matched; the batch limit is {self.max_files}")
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def run(
+        self,
+        worker: Callable[..., Dict],
+        files: List[str],
+        *args,
+        slot: Optional[Callable[[], AsyncContextManager]] = None,
+    ) -> AsyncIterator[Dict]:
+        """
+        Yields one record per file as soon as its worker finishes.
+
+        `slot` (e.g. `ExtractionPool.worker_slot`) is entered around each file, so files are
+        only handed to the process pool while the caller's concurrency limit allows it.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+
+        async def run_file(file_path: str) -> Dict:
+            if slot is None:
+                return await loop.run_in_executor(executor, worker, file_path, *args)
+            async with slot():
+                return await loop.run_in_executor(executor, worker, file_path, *args)
+
+        pending = [asyncio.ensure_future(run_file(f)) for f in files]
+        try:
+            for next_done in asyncio.as_completed(pending):
+                yield await next_done
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,298 @@
+"""
+Result cache for workbook extraction.
+
+Entries are keyed by (resolved path, file fingerprint, mode, variant). The fingerprint is
+either the file's mtime/size ("stat", default) or a SHA-256 of its content ("content"),
+so a modified file produces a new key and its stale entries are evicted.
+
+ResultCache holds serialized results in two tiers:
+- an in-memory LRU bounded by the total size of the cached strings
+- an optional on-disk tier (one file per entry) that survives server restarts, bounded
+  by the total size of its files: when a write exceeds the bound, the least recently
+  used files (by mtime, refreshed on every disk hit) are removed. Superseded entries
+  of a changed file are only known while the server runs, so after a restart they
+  are left to this eviction.
+
+ModelCache keeps a few extracted workbook models in memory so that paging or slicing
+the same workbook does not re-run the extraction.
+"""
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_DISK_MAX_BYTES = 1024 * 1024 * 1024
+# Eviction frees the disk tier down to this fraction of its bound, so it does not rescan on every write.
+_DISK_LOW_WATERMARK = 0.9
+DEFAULT_MAX_MODELS = 8
+KEY_MODES = ("stat", "content")
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _fingerprint(path: Path, key_mode: str) -> str:
+    if key_mode == "content":
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    stat = path.stat()
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def cache_key(file_path: str, mode: str, variant: str = "", key_mode: str = "stat") -> Tuple[Tuple[str, str, str], str]:
+    """Returns the (path, mode, variant) identity and the fingerprinted cache key for a file."""
+    path = Path(file_path).resolve()
+    identity = (str(path), mode, variant)
+    raw = "\0".join((*identity, _fingerprint(path, key_mode)))
+    return identity, hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Two-tier (memory LRU + optional disk) cache of serialized extraction results."""
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        disk_dir: Optional[Path] = None,
+        key_mode: str = "stat",
+        disk_max_bytes: int = DEFAULT_DISK_MAX_BYTES,
+    ):
+        if key_mode not in KEY_MODES:
+            raise ValueError(f"key_mode must be one of {KEY_MODES}, got {key_mode!r}")
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.key_mode = key_mode
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._total_bytes = 0
+        # (path, mode, variant) -> most recent key, used to drop entries of a file that changed
+        self._latest: Dict[Tuple[str, str, str], str] = {}
+        self._lock = threading.Lock()
+        self.disk_max_bytes = disk_max_bytes
+        # Approximate size of the disk tier; recounted from the directory on every eviction.
+        self._disk_bytes = 0
+        self._disk_lock = threading.Lock()
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            with self._disk_lock:
+                self._evict_disk()
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        """
+        Builds a cache from EXSTRUCT_CACHE_MAX_BYTES, EXSTRUCT_CACHE_DIR, EXSTRUCT_CACHE_KEY
+        and EXSTRUCT_CACHE_DISK_MAX_BYTES.
+        """
+        disk_dir = os.environ.get("EXSTRUCT_CACHE_DIR")
+        return cls(
+            max_bytes=int(os.environ.get("EXSTRUCT_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+            disk_dir=Path(disk_dir) if disk_dir else None,
+            key_mode=os.environ.get("EXSTRUCT_CACHE_KEY", "stat"),
+            disk_max_bytes=int(os.environ.get("EXSTRUCT_CACHE_DISK_MAX_BYTES", DEFAULT_DISK_MAX_BYTES)),
+        )
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    @property
+    def disk_bytes(self) -> int:
+        return self._disk_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(key, value)
+        return value
+
+    def put(self, key: str, value: str, identity: Optional[Tuple[str, str, str]] = None) -> None:
+        with self._lock:
+            if identity is not None:
+                previous = self._latest.get(identity)
+                if previous is not None and previous != key:
+                    self._discard(previous)
+                self._latest[identity] = key
+            self._store(key, value)
+        self._write_disk(key, value)
+
+    def get_or_compute(self, file_path: str, mode: str, compute: Callable[[], str], variant: str = "") -> str:
+        """Returns the cached result for the file, computing and caching it on a miss."""
+        identity, key = cache_key(file_path, mode, variant, self.key_mode)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value, identity)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._latest.clear()
+            self._total_bytes = 0
+
+    # --- internals (callers hold self._lock) ---
+
+    def _store(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._total_bytes -= self._sizes[key]
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        self._sizes[key] = size
+        self._total_bytes += size
+        while self._total_bytes > self.max_bytes:
+            evicted, _ = self._entries.popitem(last=False)
+            self._total_bytes -= self._sizes.pop(evicted)
+
+    def _discard(self, key: str) -> None:
+        if key in self._entries:
+            del self._entries[key]
+            self._total_bytes -= self._sizes.pop(key)
+        if self.disk_dir:
+            path = self.disk_dir / f"{key}.json"
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                return
+            except OSError as e:
+                logger.warning("Could not remove stale cache file for %s: %s", key, e)
+                return
+            with self._disk_lock:
+                self._disk_bytes = max(0, self._disk_bytes - size)
+
+    # --- disk tier ---
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        if not self.disk_dir:
+            return None
+        path = self.disk_dir / f"{key}.json"
+        try:
+            value = path.read_text(encoding="utf-8")
+            # Mark the file as recently used for eviction.
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning("Could not read cache file for %s: %s", key, e)
+            return None
+
+    def _write_disk(self, key: str, value: str) -> None:
+        if not self.disk_dir:
+            return
+        target = self.disk_dir / f"{key}.json"
+        tmp = target.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        data = value.encode("utf-8")
+        if len(data) > self.disk_max_bytes:
+            return
+        try:
+            tmp.write_bytes(data)
+            os.replace(tmp, target)
+        except OSError as e:
+            logger.warning("Could not write cache file for %s: %s", key, e)
+            return
+        with self._disk_lock:
+            self._disk_bytes += len(data)
+            if self._disk_bytes > self.disk_max_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        """
+        Recounts the disk tier and, if it exceeds its bound, removes the least recently
+        used files (oldest mtime first). Caller holds self._disk_lock.
+        """
+        files = []
+        for path in self.disk_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        if total > self.disk_max_bytes:
+            target = self.disk_max_bytes * _DISK_LOW_WATERMARK
+            for _, size, path in sorted(files, key=lambda f: f[0]):
+                if total <= target:
+                    break
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning("Could not evict cache file %s: %s", path.name, e)
+                    continue
+                total -= size
+        self._disk_bytes = total
+
+
+class ModelCache:
+    """In-memory LRU of extracted workbook models, bounded by entry count."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_MODELS, key_mode: str = "stat"):
+        if key_mode not in KEY_MODES:
+            raise ValueError(f"key_mode must be one of {KEY_MODES}, got {key_mode!r}")
+        self.max_entries = max_entries
+        self.key_mode = key_mode
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._latest: Dict[Tuple[str, str, str], str] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ModelCache":
+        """Builds a cache from EXSTRUCT_MODEL_CACHE_ENTRIES and EXSTRUCT_CACHE_KEY."""
+        return cls(
+            max_entries=int(os.environ.get("EXSTRUCT_MODEL_CACHE_ENTRIES", DEFAULT_MAX_MODELS)),
+            key_mode=os.environ.get("EXSTRUCT_CACHE_KEY", "stat"),
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_extract(self, file_path: str, mode: str, extract: Callable[[], Any]) -> Any:
+        """Returns the cached model for the file, extracting and caching it on a miss."""
+        identity, key = cache_key(file_path, mode, key_mode=self.key_mode)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        model = extract()
+        with self._lock:
+            previous = self._latest.get(identity)
+            if previous is not None and previous != key:
+                self._entries.pop(previous, None)
+            self._latest[identity] = key
+            self._entries[key] = model
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return model
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._latest.clear()
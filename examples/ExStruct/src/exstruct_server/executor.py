@@ -0,0 +1,168 @@
+"""
+Bounded worker pool for running blocking extraction off the event loop.
+
+Tool handlers are async; the parsing itself runs in a thread or process pool so one large
+workbook does not stall other MCP requests. The pool enforces:
+- a concurrency limit (the number of workers)
+- back-pressure: at most `max_queue` requests may wait for a worker; further requests are
+  rejected immediately with ServerBusyError instead of piling up
+- a per-request timeout covering both queueing and execution
+
+A request that times out while running cannot be interrupted; it keeps its slot until the
+worker finishes so the limits above stay accurate.
+
+Batch tools run their files in their own process pool but go through the same admission
+control: the batch is admitted like a request (`reserve`) and each file takes a worker
+slot (`worker_slot`), so batches count towards both limits.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Optional
+
+DEFAULT_MAX_QUEUE = 16
+DEFAULT_TIMEOUT = 120.0
+EXECUTOR_KINDS = ("thread", "process")
+
+
+class ServerBusyError(RuntimeError):
+    """Raised when the request queue is full."""
+
+
+class ExtractionPool:
+    """Runs blocking callables in a bounded thread/process pool from async code."""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        timeout: Optional[float] = DEFAULT_TIMEOUT,
+        kind: str = "thread",
+    ):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"kind must be one of {EXECUTOR_KINDS}, got {kind!r}")
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_queue = max_queue
+        self.timeout = timeout if timeout else None
+        self.kind = kind
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        # Worker slots, shared by `run` and batch files; bound to the running event loop.
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def from_env(cls) -> "ExtractionPool":
+        """Builds a pool from EXSTRUCT_WORKERS, EXSTRUCT_MAX_QUEUE, EXSTRUCT_TIMEOUT and EXSTRUCT_EXECUTOR."""
+        workers = os.environ.get("EXSTRUCT_WORKERS")
+        return cls(
+            max_workers=int(workers) if workers else None,
+            max_queue=int(os.environ.get("EXSTRUCT_MAX_QUEUE", DEFAULT_MAX_QUEUE)),
+            timeout=float(os.environ.get("EXSTRUCT_TIMEOUT", DEFAULT_TIMEOUT)),
+            kind=os.environ.get("EXSTRUCT_EXECUTOR", "thread"),
+        )
+
+    @property
+    def in_flight(self) -> int:
+        """Number of requests currently running or waiting for a worker."""
+        return self._in_flight
+
+    def _get_executor(self) -> Executor:
+        # Created lazily so importing the server (e.g. in tests) does not spawn workers.
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="exstruct")
+        return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_workers)
+            self._slots_loop = loop
+        return self._slots
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                raise ServerBusyError(
+                    f"Server busy: {self._in_flight} requests in flight "
+                    f"({self.max_workers} workers, queue limit {self.max_queue}). Retry later."
+                )
+            self._in_flight += 1
+
+    def _leave(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Runs `fn(*args)` in the pool and returns its result.
+
+        Raises ServerBusyError when the queue is full and TimeoutError when the request
+        takes longer than the configured timeout.
+        """
+        self._admit()
+        loop = asyncio.get_running_loop()
+        slots = self._get_slots()
+        deadline = None if self.timeout is None else loop.time() + self.timeout
+        try:
+            await asyncio.wait_for(slots.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self._leave()
+            raise TimeoutError(f"Request timed out after {self.timeout:g}s waiting for a worker") from None
+        except BaseException:
+            self._leave()
+            raise
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            slots.release()
+            self._leave()
+            raise
+
+        def release(_future: Future) -> None:
+            self._leave()
+            try:
+                loop.call_soon_threadsafe(slots.release)
+            except RuntimeError:
+                # The event loop is gone (e.g. shutdown); nobody is waiting for the slot.
+                pass
+
+        future.add_done_callback(release)
+        try:
+            # shield: a timeout must not cancel the wrapped future; the request keeps its
+            # slot and finishes in the background.
+            remaining = None if deadline is None else max(0.0, deadline - loop.time())
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), remaining)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Request timed out after {self.timeout:g}s") from None
+
+    @asynccontextmanager
+    async def reserve(self) -> AsyncIterator[None]:
+        """
+        Admits a request that runs outside the pool (a batch) for the duration of the block.
+
+        Raises ServerBusyError when the queue is full. No timeout applies; the work inside
+        should take a `worker_slot` for each unit of parsing.
+        """
+        self._admit()
+        try:
+            yield
+        finally:
+            self._leave()
+
+    @asynccontextmanager
+    async def worker_slot(self) -> AsyncIterator[None]:
+        """Holds one of the `max_workers` worker slots for the duration of the block."""
+        async with self._get_slots():
+            yield
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,149 @@
+"""
+Output formats for read_excel.
+
+All formats start from the JSON-ready workbook dict (`WorkbookData.model_dump(mode="json")`
+or a slice from slicing.slice_workbook):
+
+- "json":  indented JSON (the default, unchanged output)
+- "min":   the same document as minified JSON
+- "table": row-oriented compact JSON; per sheet the column letters are listed once and
+           each row is an array `[row_number, value_A, value_B, ...]`
+- "csv" / "tsv": the detected table candidates of each sheet (the sheet's used range when
+           none were detected), each preceded by a `# Sheet!A1:C10` line; ranges are clipped
+           to the rows of the page
+- "jsonl": one JSON object per non-empty cell
+
+Paging metadata (`page`) is only part of the JSON-document formats (json, min, table).
+
+orjson is used for JSON encoding when installed; the standard library otherwise.
+"""
+import csv
+import io
+import json
+from typing import Any, Dict, Iterator, List, Tuple
+
+from openpyxl.utils.cell import get_column_letter, range_boundaries
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+FORMATS = ("json", "min", "table", "csv", "tsv", "jsonl")
+
+# Sheet metadata that is dropped from the compact formats when empty.
+_EMPTY = (None, [], {})
+
+
+def dumps(obj: Any) -> str:
+    """Minified JSON, non-ASCII characters kept as-is."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def check_format(fmt: str) -> None:
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}. Expected one of {FORMATS}")
+
+
+def _used_columns(rows: List[Dict]) -> List[int]:
+    return sorted({int(col) for row in rows for col in row["c"]})
+
+
+def _to_table(data: Dict) -> Dict:
+    sheets = {}
+    for name, sheet in data["sheets"].items():
+        rows = sheet["rows"]
+        columns = _used_columns(rows)
+        compact = {key: value for key, value in sheet.items() if key != "rows" and value not in _EMPTY}
+        compact["columns"] = ["r"] + [get_column_letter(col + 1) for col in columns]
+        compact["rows"] = [[row["r"]] + [row["c"].get(str(col)) for col in columns] for row in rows]
+        links = {
+            f"{get_column_letter(int(col) + 1)}{row['r']}": link
+            for row in rows for col, link in (row.get("links") or {}).items()
+        }
+        if links:
+            compact["links"] = links
+        sheets[name] = compact
+    table = {"book_name": data["book_name"], "sheets": sheets}
+    if "page" in data:
+        table["page"] = data["page"]
+    return table
+
+
+def _range_label(bounds: Tuple[int, int, int, int]) -> str:
+    min_col, min_row, max_col, max_row = bounds
+    return f"{get_column_letter(min_col)}{min_row}:{get_column_letter(max_col)}{max_row}"
+
+
+def _sheet_ranges(sheet: Dict) -> List[Tuple[str, Tuple[int, int, int, int]]]:
+    """
+    Table candidates of the sheet, clipped to the rows present in `sheet["rows"]`, so a page
+    (or a cell-range slice) only prints the rows it actually returned.
+    """
+    rows = sheet["rows"]
+    if not rows:
+        return []
+    row_numbers = [row["r"] for row in rows]
+    first_row, last_row = min(row_numbers), max(row_numbers)
+    ranges = []
+    for candidate in sheet.get("table_candidates") or []:
+        try:
+            min_col, min_row, max_col, max_row = range_boundaries(candidate)
+        except ValueError:
+            continue
+        if None in (min_col, min_row, max_col, max_row):
+            continue
+        bounds = (min_col, max(min_row, first_row), max_col, min(max_row, last_row))
+        if bounds[1] > bounds[3]:
+            continue
+        label = candidate if bounds == (min_col, min_row, max_col, max_row) else _range_label(bounds)
+        ranges.append((label, bounds))
+    if not ranges:
+        columns = _used_columns(rows)
+        bounds = (columns[0] + 1, first_row, columns[-1] + 1, last_row)
+        ranges.append((_range_label(bounds), bounds))
+    return ranges
+
+
+def _to_delimited(data: Dict, delimiter: str) -> str:
+    out = io.StringIO()
+    writer = csv.writer(out, delimiter=delimiter, lineterminator="\n")
+    first = True
+    for name, sheet in data["sheets"].items():
+        rows_by_number = {row["r"]: row["c"] for row in sheet["rows"]}
+        for label, (min_col, min_row, max_col, max_row) in _sheet_ranges(sheet):
+            if not first:
+                out.write("\n")
+            first = False
+            out.write(f"# {name}!{label}\n")
+            for r in range(min_row, max_row + 1):
+                cells = rows_by_number.get(r, {})
+                writer.writerow(["" if (v := cells.get(str(c - 1))) is None else v for c in range(min_col, max_col + 1)])
+    return out.getvalue()
+
+
+def _iter_cells(data: Dict) -> Iterator[Dict]:
+    for name, sheet in data["sheets"].items():
+        for row in sheet["rows"]:
+            links = row.get("links") or {}
+            for col, value in row["c"].items():
+                cell = {"sheet": name, "cell": f"{get_column_letter(int(col) + 1)}{row['r']}", "value": value}
+                if col in links:
+                    cell["link"] = links[col]
+                yield cell
+
+
+def render(data: Dict, fmt: str) -> str:
+    """Serializes a JSON-ready workbook dict in the requested format."""
+    check_format(fmt)
+    if fmt == "json":
+        return json.dumps(data, ensure_ascii=False, indent=2)
+    if fmt == "min":
+        return dumps(data)
+    if fmt == "table":
+        return dumps(_to_table(data))
+    if fmt == "jsonl":
+        return "".join(dumps(cell) + "\n" for cell in _iter_cells(data))
+    return _to_delimited(data, "," if fmt == "csv" else "\t")
@@ -0,0 +1,366 @@
+"""
+Persistent full-text index over the cell text of workbooks in configured directories.
+
+Cells are read with openpyxl's read-only reader (see streaming.py), not with exstruct, and
+stored in a SQLite FTS5 table (trigram tokenizer, so substrings of Japanese text match
+too). The first row of every table candidate is indexed as "header" cells, and every
+cell below it stores (but is not searchable by) its column header, so a hit tells which
+column a value belongs to.
+
+The index is updated incrementally: refresh() re-reads only files whose mtime or size
+changed, adds new files and drops deleted ones. Each file is committed on its own, so an
+interrupted refresh keeps the files indexed so far. Searches only read the SQLite file.
+
+A first index of a large folder can take minutes, so the server does not refresh inside
+a request: refresh_in_background() runs refresh() in a daemon thread and returns at once,
+and searches read the index as it is (WAL mode lets them run while a refresh writes).
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from openpyxl import load_workbook
+from openpyxl.utils.cell import get_column_letter
+
+try:
+    from exstruct_server.streaming import iter_sheet_rows
+except ImportError:
+    from streaming import iter_sheet_rows
+
+logger = logging.getLogger(__name__)
+
+# openpyxl cannot read legacy .xls files, so they are not indexed.
+INDEXED_SUFFIXES = (".xlsx", ".xlsm")
+DEFAULT_INDEX_PATH = Path.home() / ".cache" / "exstruct" / "search_index.sqlite"
+DEFAULT_REFRESH_INTERVAL = 30.0
+DEFAULT_LIMIT = 50
+MAX_VALUE_CHARS = 200
+# Bump when the schema or the indexed content changes; older indexes are rebuilt.
+INDEX_VERSION = 1
+_TRIGRAM = 3
+_INSERT_BATCH = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    cell_count INTEGER NOT NULL,
+    error TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS cells USING fts5(
+    text, header UNINDEXED, file_id UNINDEXED, sheet UNINDEXED, cell UNINDEXED, kind UNINDEXED,
+    tokenize = 'trigram'
+);
+"""
+
+
+def _text(value) -> str:
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+
+def iter_cells(file_path: str) -> Iterator[Tuple[str, str, str, str, str]]:
+    """
+    Yields (sheet, cell, kind, text, header) for every non-empty cell of a workbook.
+
+    A block of consecutive rows with at least two filled cells is a table candidate (as in
+    streaming._TableTracker); its first row is yielded as "header" cells and the cells
+    of the following rows get the header text of their column.
+    """
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for sheet in wb.sheetnames:
+            headers: Dict[str, str] = {}  # column -> header text of the current table
+            pending: Optional[Tuple[int, Dict]] = None  # first row of a possible table
+            previous: Optional[int] = None  # number of the previous row if it had 2+ cells
+            for r, cells in iter_sheet_rows(wb[sheet]):
+                wide = len(cells) >= 2
+                contiguous = wide and previous == r - 1
+                if pending is not None:
+                    if contiguous:
+                        # A second row confirms the table; its first row is the header.
+                        headers = {col: _text(value) for col, value in pending[1].items()}
+                        yield from _row_cells(sheet, *pending, "header", {})
+                    else:
+                        yield from _row_cells(sheet, *pending, "cell", {})
+                    pending = None
+                if not contiguous:
+                    headers = {}
+                if wide and not contiguous:
+                    pending = (r, cells)
+                else:
+                    yield from _row_cells(sheet, r, cells, "cell", headers)
+                previous = r if wide else None
+            if pending is not None:
+                yield from _row_cells(sheet, *pending, "cell", {})
+    finally:
+        wb.close()
+
+
+def _row_cells(sheet: str, r: int, cells: Dict, kind: str, headers: Dict[str, str]) -> Iterator[Tuple[str, str, str, str, str]]:
+    for col, value in cells.items():
+        yield sheet, f"{get_column_letter(int(col) + 1)}{r}", kind, _text(value), headers.get(col, "")
+
+
+def _match_expression(query: str) -> Tuple[str, List[str]]:
+    """
+    Turns a free-text query into a WHERE clause and its parameters. Every whitespace-separated term must occur (as a substring) in the cell text.
+    Terms shorter than a trigram cannot use the index; they are checked with
+    LIKE on the rows the other terms matched, or on every row if all terms are short.
+    """
+    terms = query.split()
+    if not terms:
+        raise ValueError("query must not be empty")
+    indexed = [term for term in terms if len(term) >= _TRIGRAM]
+    clauses, params = [], []
+    if indexed:
+        clauses.append("cells MATCH ?")
+        params.append(" AND ".join('"' + term.replace('"', '""') + '"' for term in indexed))
+    for term in terms:
+        if len(term) >= _TRIGRAM:
+            continue
+        pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        clauses.append("text LIKE ? ESCAPE '\\'")
+        params.append(pattern)
+    return " AND ".join(clauses), params
+
+
+def _under(path: str, directories: Iterable[str]) -> bool:
+    return any(path == d or path.startswith(d.rstrip(os.sep) + os.sep) for d in directories)
+
+
+class WorkbookIndex:
+    """SQLite FTS5 index of the workbooks under a set of directories."""
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_INDEX_PATH,
+        directories: Iterable[str] = (),
+        refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+    ):
+        self.path = Path(path)
+        self.directories = [str(Path(d).resolve()) for d in directories]
+        self.refresh_interval = refresh_interval
+        self._last_refresh: Dict[str, float] = {}
+        # Serializes refreshes within this process; other processes are serialized by SQLite.
+        self._refresh_lock = threading.Lock()
+        # Background refresh started by refresh_in_background, and the stats of the last one.
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self.last_refresh: Optional[Dict] = None
+
+    @classmethod
+    def from_env(cls) -> "WorkbookIndex":
+        """Builds an index from EXSTRUCT_INDEX_PATH, EXSTRUCT_INDEX_DIRS and EXSTRUCT_INDEX_REFRESH_INTERVAL."""
+        directories = [d for d in os.environ.get("EXSTRUCT_INDEX_DIRS", "").split(os.pathsep) if d]
+        return cls(
+            path=Path(os.environ.get("EXSTRUCT_INDEX_PATH", DEFAULT_INDEX_PATH)),
+            directories=directories,
+            refresh_interval=float(os.environ.get("EXSTRUCT_INDEX_REFRESH_INTERVAL", DEFAULT_REFRESH_INTERVAL)),
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(_SCHEMA)
+        row = connection.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+        if row is None or int(row[0]) != INDEX_VERSION:
+            with connection:
+                connection.execute("DELETE FROM cells")
+                connection.execute("DELETE FROM files")
+                connection.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(INDEX_VERSION),))
+        return connection
+
+    def _resolve_directories(self, directories: Optional[Iterable[str]]) -> List[str]:
+        resolved = [str(Path(d).resolve()) for d in directories] if directories else self.directories
+        if not resolved:
+            raise ValueError("No directories to index: pass `directories` or set EXSTRUCT_INDEX_DIRS")
+        for directory in resolved:
+            if not os.path.isdir(directory):
+                raise NotADirectoryError(f"Not a directory: {directory}")
+        return resolved
+
+    def refresh(self, directories: Optional[Iterable[str]] = None, force: bool = False) -> Dict:
+        """
+        Brings the index up to date for the given (default: configured) directories.
+
+        A directory refreshed less than `refresh_interval` seconds ago is skipped unless
+        `force` is set. Returns the number of files indexed, unchanged, removed and failed.
+        """
+        stats = {"indexed": 0, "unchanged": 0, "removed": 0, "failed": 0, "elapsed_ms": 0.0}
+        start = time.perf_counter()
+        with self._refresh_lock:
+            connection = self._connect()
+            try:
+                for directory in self._resolve_directories(directories):
+                    now = time.monotonic()
+                    if not force and not self._is_due(directory, now):
+                        continue
+                    self._refresh_directory(connection, directory, stats)
+                    self._last_refresh[directory] = now
+            finally:
+                connection.close()
+        stats["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return stats
+
+    def _is_due(self, directory: str, now: float) -> bool:
+        return now - self._last_refresh.get(directory, float("-inf")) >= self.refresh_interval
+
+    def refresh_in_background(self, directories: Optional[Iterable[str]] = None) -> Dict:
+        """
+        Starts refresh() for the given (default: configured) directories in a daemon thread
+        and returns without waiting for it.
+
+        The returned "status" is "started", "running" when a background refresh is already
+        in progress (the directories are picked up by a later call once it finishes), or
+        "fresh" when every directory was refreshed within `refresh_interval`. "last" holds
+        the stats of the last finished background refresh.
+        """
+        resolved = self._resolve_directories(directories)
+        with self._thread_lock:
+            if self._thread is not None and self._thread.is_alive():
+                status = "running"
+            elif not any(self._is_due(directory, time.monotonic()) for directory in resolved):
+                status = "fresh"
+            else:
+                # Create (or rebuild) the schema here: a search connecting while the thread holds
+                # a write transaction would otherwise wait on the version row.
+                self._connect().close()
+                self._thread = threading.Thread(
+                    target=self._background_refresh, args=(resolved,), name="exstruct-index", daemon=True
+                )
+                self._thread.start()
+                status = "started"
+        return {"status": status, "last": self.last_refresh}
+
+    def _background_refresh(self, directories: List[str]) -> None:
+        try:
+            self.last_refresh = self.refresh(directories)
+        except Exception as e:
+            logger.exception("Background refresh of %s failed", directories)
+            self.last_refresh = {"error": f"{type(e).__name__}: {e}"}
+
+    def wait_for_refresh(self, timeout: Optional[float] = None) -> bool:
+        """Waits for the background refresh, if any. Returns False if it is still running."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
+    def _refresh_directory(self, connection: sqlite3.Connection, directory: str, stats: Dict) -> None:
+        known = {
+            path: (file_id, mtime_ns, size)
+            for file_id, path, mtime_ns, size in connection.execute(
+                "SELECT id, path, mtime_ns, size FROM files WHERE path = ? OR path LIKE ? ESCAPE '\\'",
+                (directory, directory.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + os.sep + "%"),
+            )
+        }
+        for root, _dirs, names in os.walk(directory):
+            for name in sorted(names):
+                # Skip Excel's lock files ("~$book.xlsx") which cannot be parsed.
+                if not name.lower().endswith(INDEXED_SUFFIXES) or name.startswith("~$"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                previous = known.pop(path, None)
+                if previous is not None and previous[1:] == (stat.st_mtime_ns, stat.st_size):
+                    stats["unchanged"] += 1
+                    continue
+                ok = self._index_file(connection, path, stat, previous[0] if previous else None)
+                stats["indexed" if ok else "failed"] += 1
+        for path, (file_id, _mtime, _size) in known.items():
+            with connection:
+                connection.execute("DELETE FROM cells WHERE file_id = ?", (file_id,))
+                connection.execute("DELETE FROM files WHERE id = ?", (file_id,))
+            stats["removed"] += 1
+
+    def _index_file(self, connection: sqlite3.Connection, path: str, stat: os.stat_result, file_id: Optional[int]) -> bool:
+        """Replaces the cells of one file in a single transaction. Returns False if it could not be read."""
+        error = None
+        with connection:
+            if file_id is not None:
+                connection.execute("DELETE FROM cells WHERE file_id = ?", (file_id,))
+            file_id = connection.execute(
+                "INSERT INTO files (path, mtime_ns, size, cell_count) VALUES (?, ?, ?, 0) "
+                "ON CONFLICT(path) DO UPDATE SET mtime_ns = excluded.mtime_ns, size = excluded.size "
+                "RETURNING id",
+                (path, stat.st_mtime_ns, stat.st_size),
+            ).fetchone()[0]
+            count = 0
+            try:
+                batch = []
+                for sheet, cell, kind, text, header in iter_cells(path):
+                    batch.append((text, header, file_id, sheet, cell, kind))
+                    if len(batch) >= _INSERT_BATCH:
+                        count += self._insert(connection, batch)
+                count += self._insert(connection, batch)
+            except Exception as e:
+                # Keep the file row (with its mtime) so an unreadable file is not retried until it changes.
+                logger.warning("Could not index %s: %s", path, e)
+                connection.execute("DELETE FROM cells WHERE file_id = ?", (file_id,))
+                error, count = f"{type(e).__name__}: {e}", 0
+            connection.execute("UPDATE files SET cell_count = ?, error = ? WHERE id = ?", (count, error, file_id))
+        return error is None
+
+    @staticmethod
+    def _insert(connection: sqlite3.Connection, batch: List[Tuple]) -> int:
+        connection.executemany(
+            "INSERT INTO cells (text, header, file_id, sheet, cell, kind) VALUES (?, ?, ?, ?, ?, ?)", batch
+        )
+        count = len(batch)
+        batch.clear()
+        return count
+
+    def search(self, query: str, directories: Optional[Iterable[str]] = None, limit: int = DEFAULT_LIMIT) -> Dict:
+        """
+        Returns the cells matching every term of `query` in index order, restricted to
+        files under `directories` when given. Does not refresh the index.
+        """
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+        where, params = _match_expression(query)
+        scope = [str(Path(d).resolve()) for d in directories] if directories else None
+        start = time.perf_counter()
+        connection = self._connect()
+        try:
+            rows = connection.execute(
+                f"SELECT files.path, cells.sheet, cells.cell, cells.kind, cells.text, cells.header "
+                # No ranking: hits come in file/sheet/row order, so a common term stops at `limit`
+                # instead of scoring every matching cell. CROSS JOIN keeps the FTS table outermost.
+                f"FROM cells CROSS JOIN files ON files.id = cells.file_id WHERE {where} ORDER BY cells.rowid",
+                params,
+            )
+            hits = []
+            truncated = False
+            for path, sheet, cell, kind, text, header in rows:
+                if scope is not None and not _under(path, scope):
+                    continue
+                if len(hits) >= limit:
+                    truncated = True
+                    break
+                hit = {"file": path, "sheet": sheet, "cell": cell, "kind": kind, "value": text[:MAX_VALUE_CHARS]}
+                if header:
+                    hit["header"] = header
+                hits.append(hit)
+            files = connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        finally:
+            connection.close()
+        return {
+            "query": query,
+            "hits": hits,
+            "truncated": truncated,
+            "indexed_files": files,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
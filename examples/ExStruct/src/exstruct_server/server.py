@@ -1,12 +1,138 @@
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
 import exstruct
-from pathlib import Path
+from openpyxl import load_workbook
 import json
+import os
+import time
+
+from typing import List, Optional
+
+try:
+    from exstruct_server.batch import BatchRunner, extract_file, outline_file, resolve_paths, to_jsonl
+    from exstruct_server.cache import ModelCache, ResultCache, cache_key
+    from exstruct_server.executor import ExtractionPool, ServerBusyError
+    from exstruct_server.formats import check_format, render
+    from exstruct_server.search_index import DEFAULT_LIMIT as DEFAULT_SEARCH_LIMIT, WorkbookIndex
+    from exstruct_server.slicing import describe_workbook as describe_model, slice_workbook
+    from exstruct_server.streaming import DEFAULT_MAX_BYTES as DEFAULT_STREAM_MAX_BYTES, describe_stream, stream_workbook
+except ImportError:
+    # Running as a script (`uv run src/exstruct_server/server.py`) puts this directory on sys.path.
+    from batch import BatchRunner, extract_file, outline_file, resolve_paths, to_jsonl
+    from cache import ModelCache, ResultCache, cache_key
+    from executor import ExtractionPool, ServerBusyError
+    from formats import check_format, render
+    from search_index import DEFAULT_LIMIT as DEFAULT_SEARCH_LIMIT, WorkbookIndex
+    from slicing import describe_workbook as describe_model, slice_workbook
+    from streaming import DEFAULT_MAX_BYTES as DEFAULT_STREAM_MAX_BYTES, describe_stream, stream_workbook
 
 mcp = FastMCP("exstruct-mcp-server")
 
+# Repeat reads of an unchanged workbook are served from here instead of re-parsing.
+# Configured via EXSTRUCT_CACHE_MAX_BYTES / EXSTRUCT_CACHE_DIR / EXSTRUCT_CACHE_KEY.
+result_cache = ResultCache.from_env()
+# Extracted models are kept between calls so paging through a workbook extracts it once.
+model_cache = ModelCache.from_env()
+# Extraction runs in a bounded worker pool so a large workbook does not block other requests.
+# Configured via EXSTRUCT_WORKERS / EXSTRUCT_MAX_QUEUE / EXSTRUCT_TIMEOUT / EXSTRUCT_EXECUTOR.
+# With the process executor each worker process keeps its own in-memory caches.
+pool = ExtractionPool.from_env()
+# Multi-file tools parse in a separate process pool (EXSTRUCT_BATCH_WORKERS / EXSTRUCT_BATCH_MAX_FILES).
+batch_runner = BatchRunner.from_env()
+# Full-text index of the workbooks under EXSTRUCT_INDEX_DIRS, stored in EXSTRUCT_INDEX_PATH.
+workbook_index = WorkbookIndex.from_env()
+# "light" reads of files larger than this are served by the streaming reader (0 disables).
+STREAM_THRESHOLD_BYTES = int(os.environ.get("EXSTRUCT_STREAM_THRESHOLD_BYTES", 50 * 1024 * 1024))
+# Output budget of a streamed read when the caller gives none.
+STREAM_MAX_BYTES = int(os.environ.get("EXSTRUCT_STREAM_MAX_BYTES", DEFAULT_STREAM_MAX_BYTES))
+
+
+def _serialize_workbook(wb) -> str:
+    """Serializes an exstruct WorkbookData (a Pydantic model) to a JSON string."""
+    if hasattr(wb, "model_dump_json"):
+        return wb.model_dump_json(indent=2)
+    elif hasattr(wb, "json"):
+        return wb.json(indent=2)
+    elif hasattr(wb, "to_json"):
+        return wb.to_json()
+    else:
+        # Fallback for unexpected result types; callers still get a string.
+        return str(wb)
+
+
+def _extract_model(file_path: str, mode: str):
+    return model_cache.get_or_extract(file_path, mode, lambda: exstruct.extract(file_path, mode=mode))
+
+
+def _extract_json(file_path: str, mode: str, format: str = "json") -> str:
+    wb = _extract_model(file_path, mode)
+    if format == "json":
+        return _serialize_workbook(wb)
+    if format == "min" and hasattr(wb, "model_dump_json"):
+        # Pydantic's serializer writes minified JSON straight from the model.
+        return wb.model_dump_json()
+    return render(wb.model_dump(mode="json"), format)
+
+
+def _use_streaming(file_path: str, mode: str) -> bool:
+    if mode == "stream":
+        return True
+    return mode == "light" and STREAM_THRESHOLD_BYTES > 0 and os.path.getsize(file_path) > STREAM_THRESHOLD_BYTES
+
+
+def _read_excel(file_path: str, mode: str, sheet: Optional[str], cell_range: Optional[str],
+                offset: int, limit: Optional[int], format: str, max_bytes: Optional[int] = None) -> str:
+    check_format(format)
+    if _use_streaming(file_path, mode):
+        data = stream_workbook(file_path, sheet, cell_range, offset, limit, max_bytes or STREAM_MAX_BYTES)
+        return render(data, format)
+    if sheet is None and cell_range is None and offset == 0 and limit is None:
+        # Results are cached per (file, mtime/size or content hash, mode, format); a changed file is re-extracted.
+        variant = "" if format == "json" else format
+        return result_cache.get_or_compute(
+            file_path, mode, lambda: _extract_json(file_path, mode, format), variant=variant
+        )
+    wb = _extract_model(file_path, mode)
+    return render(slice_workbook(wb, sheet, cell_range, offset, limit), format)
+
+
+def _list_sheets(file_path: str, mode: str) -> str:
+    if _use_streaming(file_path, mode):
+        wb = load_workbook(file_path, read_only=True)
+        try:
+            return json.dumps(wb.sheetnames, ensure_ascii=False)
+        finally:
+            wb.close()
+    return json.dumps(list(_extract_model(file_path, mode).sheets), ensure_ascii=False)
+
+
+def _describe_workbook(file_path: str, mode: str) -> str:
+    if _use_streaming(file_path, mode):
+        # Outlining a huge workbook must not build the whole exstruct model either.
+        return json.dumps(describe_stream(file_path), ensure_ascii=False, indent=2)
+    return json.dumps(describe_model(_extract_model(file_path, mode)), ensure_ascii=False, indent=2)
+
+
+async def _run(fn, *args) -> str:
+    """Runs a blocking tool body in the worker pool, turning failures into a JSON error."""
+    try:
+        return await pool.run(fn, *args)
+    except ServerBusyError as e:
+        return json.dumps({"error": str(e), "retryable": True})
+    except Exception as e:
+        return json.dumps({"error": str(e)})
+
+
 @mcp.tool()
-def read_excel(file_path: str, mode: str = "light") -> str:
+async def read_excel(
+    file_path: str,
+    mode: str = "light",
+    sheet: Optional[str] = None,
+    cell_range: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    format: str = "json",
+    max_bytes: Optional[int] = None,
+) -> str:
     """
     Reads an Excel file and returns its structured content as a JSON string.
 
@@ -16,69 +142,237 @@ def read_excel(file_path: str, mode: str = "light") -> str:
               - "light": cells + table candidates (fastest, no Excel COM required).
               - "standard": texted shapes, charts, merged cells (Excel COM may be required for some features).
               - "verbose": all shapes, charts, details (Excel COM required).
+              - "stream": cells and table candidates read row by row with bounded memory,
+                for very large files. "light" switches to it automatically above
+                EXSTRUCT_STREAM_THRESHOLD_BYTES.
               Defaults to "light".
+        sheet: Only return this sheet. Use `list_sheets` / `describe_workbook` to find names.
+        cell_range: Only return cells inside this A1-style range (e.g. "A1:F200", "B:D", "10:50").
+        offset: Number of (range-filtered) rows to skip, for paging.
+        limit: Maximum number of rows to return. The response's `page.next_offset`
+               is the offset of the next page, or null on the last one.
+        format: The output encoding. Defaults to "json".
+              - "json": indented JSON.
+              - "min": the same JSON, minified.
+              - "table": compact JSON; per sheet the column letters once, then each row as
+                `[row_number, value_A, value_B, ...]`. Best for tabular sheets.
+              - "csv" / "tsv": each detected table (or the used range) as delimited text,
+                preceded by a `# Sheet!A1:C10` line.
+              - "jsonl": one `{"sheet", "cell", "value"}` object per line.
+        max_bytes: Streaming only: stop reading once the returned rows exceed this many bytes
+              (default EXSTRUCT_STREAM_MAX_BYTES). `page.truncated` tells whether it stopped early.
 
     Returns:
-        A JSON string representation of the Excel data.
+        A JSON string representation of the Excel data. Without sheet/cell_range/offset/limit
+        this is the whole workbook; otherwise only the requested slice plus a `page` object.
+    """
+    return await _run(_read_excel, file_path, mode, sheet, cell_range, offset, limit, format, max_bytes)
+
+
+@mcp.tool()
+async def list_sheets(file_path: str, mode: str = "light") -> str:
+    """
+    Lists the sheet names of an Excel file as a JSON array.
+
+    Args:
+        file_path: The path to the Excel file to read.
+        mode: The extraction mode (see `read_excel`). Defaults to "light".
     """
+    return await _run(_list_sheets, file_path, mode)
+
+
+@mcp.tool()
+async def describe_workbook(file_path: str, mode: str = "light") -> str:
+    """
+    Returns a compact outline of an Excel file without its cell contents: for each sheet,
+    the number of rows, the used extent, table candidates and counts of merged cells,
+    shapes and charts. Use it to decide which sheet/range to request from `read_excel`.
+
+    Args:
+        file_path: The path to the Excel file to read.
+        mode: The extraction mode (see `read_excel`). Defaults to "light".
+    """
+    return await _run(_describe_workbook, file_path, mode)
+
+
+def _cached_record(file_path: str, mode: str, variant: str):
     try:
-        # Use exstruct to extract data from the workbook
-        wb = exstruct.extract(file_path, mode=mode)
-        
-        # Convert the workbook data to a dictionary/JSON structure
-        # wb.to_json() returns a dictionary if called on the object, or we can use export logic
-        # Based on README: wb.save("out.json") or export(wb, ...)
-        # We need the string representation.
-        
-        # exstruct WorkbookData objects are Pydantic models (or similar) or have to_dict/json methods?
-        # The README says: `export(wb, Path("out.json"), pretty=False)`
-        # And `print(first_sheet.to_yaml())`
-        # Let's check if we can get a dict or json string directly.
-        # Usually pydantic models have .model_dump() or .dict() or .json()
-        
-        # Assuming we can verify this, but for now let's try to get a dict representation.
-        # If exstruct returns a Pydantic model (which is likely given it handles structured data),
-        # we can likely use .model_dump_json() or .json().
-        
-        # NOTE: Without inspecting exstruct source, I'll assume standard Pydantic behavior or simple dict access.
-        # However, the README mentions `export(wb, ...)` which dumps to file.
-        # We can dump to a temporary file and read it back, OR try to find an in-memory method.
-        # let's try to inspect the object if possible, but safe bet is likely .model_dump_json() if recent pydantic, or .json().
-        
-        # For the first implementation, let's assume we might need to rely on `export` to a string if possible, or just standard serialization.
-        # Let's try .model_dump() (Pydantic V2) or .dict() (Pydantic V1).
-        
-        # Let's stick to a safe approach:
-        # If it's a Pydantic model, `json.dumps(wb.model_dump(), default=str)` or similar.
-        
-        # Wait, the README says:
-        # `wb.save("out.json", pretty=True)`
-        # `print(first_sheet.to_yaml())`
-        
-        # Implementation:
-        # We will attempt to use .model_dump_json() if available.
-        # If not, we will try to use the library's export features.
-        
-        # Let's rely on standard object serialization for now.
-        pass # Placeholder for actual implementation logic in next step after verifying library
-        
-        # But I need to write the file now.
-        # Let's try to implement a generic dumper.
-        if hasattr(wb, "model_dump_json"):
-             return wb.model_dump_json(indent=2)
-        elif hasattr(wb, "json"):
-             return wb.json(indent=2)
-        elif hasattr(wb, "to_json"):
-             return wb.to_json()
+        _, key = cache_key(file_path, mode, variant, result_cache.key_mode)
+    except OSError:
+        # Missing/unreadable files are reported by the worker with a proper error record.
+        return None, None
+    content = result_cache.get(key)
+    if content is None:
+        return key, None
+    return key, {"file": file_path, "ok": True, "content": content, "elapsed_ms": 0.0, "cached": True}
+
+
+async def _run_batch(worker, files: List[str], mode: str, format: str, variant: str, ctx: Optional[Context]) -> str:
+    """
+    Runs `worker` over the files, reporting each record as a progress notification as soon
+    as it is available, and returns all records as JSON Lines followed by a summary line.
+    Cached results are reported first; fresh results are added to the result cache.
+    The batch is admitted by the extraction pool like any other request, and each file
+    takes one of its worker slots, so batches share the concurrency limit and back-pressure.
+    """
+    batch_runner.check_size(files)
+    async with pool.reserve():
+        return await _run_batch_admitted(worker, files, mode, format, variant, ctx)
+
+
+async def _run_batch_admitted(worker, files: List[str], mode: str, format: str, variant: str, ctx: Optional[Context]) -> str:
+    start = time.perf_counter()
+    lines = []
+    ok = 0
+    total = len(files)
+
+    async def emit(record):
+        nonlocal ok, ctx
+        ok += record["ok"]
+        line = to_jsonl(record, format)
+        lines.append(line)
+        if ctx is not None:
+            try:
+                await ctx.report_progress(len(lines), total, message=line)
+            except ValueError:
+                # Called outside an MCP request: there is no client to stream to.
+                ctx = None
+
+    keys = {}
+    misses = []
+    for file_path in files:
+        key, record = _cached_record(file_path, mode, variant)
+        if record is None:
+            keys[file_path] = key
+            misses.append(file_path)
         else:
-             # Fallback: assume it's an object we can traverse or pickling? No, must be JSON.
-             # Does exstruct export a `to_dict`?
-             # Let's assume standard Pydantic usage as it's a structural tool.
-             # If all else fails during test, I will fix it.
-             return str(wb)
+            await emit(record)
+
+    async for record in batch_runner.run(worker, misses, mode, format, slot=pool.worker_slot):
+        key = keys.get(record["file"])
+        if record["ok"] and key is not None:
+            result_cache.put(key, record["content"])
+        await emit(record)
+
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+    lines.append(json.dumps({"summary": {"files": total, "ok": ok, "failed": total - ok, "elapsed_ms": elapsed_ms}}))
+    return "\n".join(lines)
+
 
+@mcp.tool()
+async def read_excel_batch(
+    paths: Optional[List[str]] = None,
+    pattern: Optional[str] = None,
+    mode: str = "light",
+    format: str = "min",
+    ctx: Optional[Context] = None,
+) -> str:
+    """
+    Reads many Excel files in parallel.
+
+    Args:
+        paths: Files (or directories, whose Excel files are all read) to extract.
+        pattern: A glob pattern selecting files, e.g. "shared/**/*.xlsx".
+        mode: The extraction mode (see `read_excel`). Defaults to "light".
+        format: The output encoding of each file (see `read_excel`). "json" is emitted
+                minified so each file fits on one line. Defaults to "min".
+
+    Returns:
+        JSON Lines in completion order, one per file:
+        `{"file", "ok", "elapsed_ms", "result"}` or `{"file", "ok": false, "elapsed_ms",
+        "error": {"type", "message", "where"}}`, followed by a `{"summary": ...}` line.
+        Each line is also sent as a progress notification as soon as the file is done.
+    """
+    try:
+        format = "min" if format == "json" else format
+        check_format(format)
+        files = resolve_paths(paths, pattern)
+        return await _run_batch(extract_file, files, mode, format, format, ctx)
+    except ServerBusyError as e:
+        return json.dumps({"error": str(e), "retryable": True})
     except Exception as e:
         return json.dumps({"error": str(e)})
 
+
+@mcp.tool()
+async def index_directory(
+    directory: str,
+    pattern: str = "**/*.xlsx",
+    mode: str = "light",
+    ctx: Optional[Context] = None,
+) -> str:
+    """
+    Outlines every Excel file under a directory in parallel (see `describe_workbook`).
+
+    Args:
+        directory: The folder to scan.
+        pattern: A glob pattern relative to `directory`. Defaults to all .xlsx files, recursively.
+        mode: The extraction mode (see `read_excel`). Defaults to "light".
+
+    Returns:
+        JSON Lines in completion order, one outline (or error) per file, followed by a
+        `{"summary": ...}` line. Each line is also sent as a progress notification.
+    """
+    try:
+        if not os.path.isdir(directory):
+            raise NotADirectoryError(f"Not a directory: {directory}")
+        files = resolve_paths(pattern=os.path.join(directory, pattern))
+        return await _run_batch(outline_file, files, mode, "min", "outline", ctx)
+    except ServerBusyError as e:
+        return json.dumps({"error": str(e), "retryable": True})
+    except Exception as e:
+        return json.dumps({"error": str(e)})
+
+def _search_workbooks(query: str, directories: Optional[List[str]], limit: int, refreshed: Optional[dict]) -> str:
+    result = workbook_index.search(query, directories, limit)
+    result["refresh"] = refreshed
+    return json.dumps(result, ensure_ascii=False)
+
+
+@mcp.tool()
+async def search_workbooks(
+    query: str,
+    directories: Optional[List[str]] = None,
+    limit: int = DEFAULT_SEARCH_LIMIT,
+    refresh: bool = True,
+) -> str:
+    """
+    Finds the workbooks, sheets and cells that mention a term, using a persistent full-text
+    index instead of reading the files. Use it before `read_excel` to locate the right file
+    and range.
+
+    Args:
+        query: Whitespace-separated terms; a cell matches when its text contains every term
+               as a substring. Include at least one term of 3+ characters: shorter terms
+               cannot use the index on their own.
+        directories: Only search workbooks under these folders (they are indexed if needed).
+                     Defaults to the folders configured in EXSTRUCT_INDEX_DIRS.
+        limit: Maximum number of hits. Defaults to 50.
+        refresh: Start re-indexing files added or modified since the last refresh (at most
+                 every EXSTRUCT_INDEX_REFRESH_INTERVAL seconds) in the background. The search
+                 does not wait for it and runs against the current index; unchanged files are
+                 never re-read. Defaults to true.
+
+    Returns:
+        A JSON object with `hits` (`{"file", "sheet", "cell", "kind", "value", "header"}` in
+        file and row order; `kind` is "header" for the first row of a table, `header` is the
+        column header of a cell inside a table), `truncated`, `indexed_files` and `refresh`:
+        its `status` ("started", "running" or "fresh") and the counts of the `last` finished
+        refresh (indexed / unchanged / removed / failed). While a refresh is running, search
+        again later for files that are not indexed yet.
+    """
+    refreshed = None
+    if refresh:
+        # Runs in this process, outside the worker pool and its timeout: a first index can take minutes.
+        try:
+            refreshed = workbook_index.refresh_in_background(directories)
+        except Exception as e:
+            return json.dumps({"error": str(e)})
+    return await _run(_search_workbooks, query, directories, limit, refreshed)
+
 if __name__ == "__main__":
-    mcp.run()
+    # "stdio" (default) for a client-spawned server; "streamable-http" / "sse" lets several
+    # clients share one server on EXSTRUCT_HOST:EXSTRUCT_PORT.
+    mcp.settings.host = os.environ.get("EXSTRUCT_HOST", mcp.settings.host)
+    mcp.settings.port = int(os.environ.get("EXSTRUCT_PORT", mcp.settings.port))
+    mcp.run(transport=os.environ.get("EXSTRUCT_TRANSPORT", "stdio"))
@@ -0,0 +1,121 @@
+"""
+Sheet-, range- and page-scoped views over an extracted workbook.
+
+exstruct extracts a whole workbook at once, so slicing happens on the extracted model:
+only the requested sheet, cell range and page of rows are serialized.
+Column keys in `CellRow.c` are 0-based column indexes ("0" is column A).
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from openpyxl.utils.cell import range_boundaries
+
+# (min_col, min_row, max_col, max_row), 1-based and inclusive; None means unbounded.
+Bounds = Tuple[Optional[int], Optional[int], Optional[int], Optional[int]]
+
+
+def parse_range(cell_range: Optional[str]) -> Optional[Bounds]:
+    """Parses an A1-style range ("A1:D20", "B:C", "5:10", "C3")."""
+    if not cell_range:
+        return None
+    try:
+        return range_boundaries(cell_range.upper())
+    except ValueError as e:
+        raise ValueError(f"Invalid cell range {cell_range!r}: {e}") from e
+
+
+def _select_sheets(wb, sheet: Optional[str]) -> Dict[str, Any]:
+    if sheet is None:
+        return wb.sheets
+    if sheet not in wb.sheets:
+        raise KeyError(f"Sheet {sheet!r} not found. Available sheets: {list(wb.sheets)}")
+    return {sheet: wb.sheets[sheet]}
+
+
+def _in_columns(col: str, bounds: Bounds) -> bool:
+    min_col, _, max_col, _ = bounds
+    return (min_col is None or int(col) + 1 >= min_col) and (max_col is None or int(col) + 1 <= max_col)
+
+
+def _rows_in_bounds(rows: List[Any], bounds: Optional[Bounds]) -> List[Any]:
+    """Selects the rows with at least one cell inside `bounds` (without serializing them)."""
+    if bounds is None:
+        return rows
+    _, min_row, _, max_row = bounds
+    return [
+        row for row in rows
+        if (min_row is None or row.r >= min_row) and (max_row is None or row.r <= max_row)
+        and any(_in_columns(col, bounds) for col in row.c)
+    ]
+
+
+def _dump_row(row: Any, bounds: Optional[Bounds]) -> Dict:
+    if bounds is None:
+        return row.model_dump(mode="json")
+    cells = {col: value for col, value in row.c.items() if _in_columns(col, bounds)}
+    links = {col: link for col, link in (row.links or {}).items() if col in cells} or None
+    return {"r": row.r, "c": cells, "links": links}
+
+
+def slice_workbook(
+    wb,
+    sheet: Optional[str] = None,
+    cell_range: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> Dict:
+    """
+    Returns a JSON-ready dict with the requested slice of the workbook.
+
+    Rows are filtered by `cell_range`, then paged with `offset`/`limit` across the selected
+    sheets in order. Sheet-level metadata (tables, merged cells, ...) is included for every
+    sheet that contributes rows to the page. `page.next_offset` is null on the last page.
+    """
+    if offset < 0 or (limit is not None and limit < 0):
+        raise ValueError("offset and limit must be non-negative")
+    bounds = parse_range(cell_range)
+    sheets = {}
+    total_rows = 0
+    remaining = limit
+    for name, sheet_data in _select_sheets(wb, sheet).items():
+        rows = _rows_in_bounds(sheet_data.rows, bounds)
+        start = max(0, offset - total_rows)
+        total_rows += len(rows)
+        if start >= len(rows) or remaining == 0:
+            continue
+        # Only the rows on the page are serialized, so a page costs O(limit) rather than O(total rows)
+        page_rows = [_dump_row(row, bounds) for row in (rows[start:] if remaining is None else rows[start:start + remaining])]
+        if remaining is not None:
+            remaining -= len(page_rows)
+        sheets[name] = {**sheet_data.model_dump(mode="json", exclude={"rows"}), "rows": page_rows}
+
+    returned = sum(len(s["rows"]) for s in sheets.values())
+    next_offset = offset + returned
+    return {
+        "book_name": wb.book_name,
+        "sheets": sheets,
+        "page": {
+            "offset": offset,
+            "limit": limit,
+            "returned_rows": returned,
+            "total_rows": total_rows,
+            "next_offset": next_offset if next_offset < total_rows else None,
+        },
+    }
+
+
+def describe_workbook(wb) -> Dict:
+    """Returns a lightweight outline of the workbook: sheets, their extents and table candidates."""
+    sheets = []
+    for name, sheet_data in wb.sheets.items():
+        columns = [int(col) for row in sheet_data.rows for col in row.c]
+        sheets.append({
+            "name": name,
+            "rows": len(sheet_data.rows),
+            "max_row": max((row.r for row in sheet_data.rows), default=0),
+            "max_column": max(columns, default=-1) + 1,
+            "table_candidates": sheet_data.table_candidates,
+            "merged_cells": len(sheet_data.merged_cells.items) if sheet_data.merged_cells else 0,
+            "shapes": len(sheet_data.shapes),
+            "charts": len(sheet_data.charts),
+        })
+    return {"book_name": wb.book_name, "sheets": sheets}
@@ -0,0 +1,186 @@
+"""
+Streaming "light" extraction for very large workbooks.
+
+exstruct builds the whole workbook model before anything is serialized. This reader walks
+the sheets row by row with openpyxl's read-only mode instead, so memory stays bounded by
+the requested page: it stops as soon as the row limit or the output byte budget is reached.
+
+The output has the same shape as a slice from slicing.slice_workbook (cells keyed by
+0-based column index, empty cells omitted), so it can be rendered in any read_excel format.
+Table candidates are detected on the fly as blocks of consecutive rows with at least two
+filled cells; they only cover the rows of the returned page.
+
+describe_stream builds the describe_workbook outline the same way, in one bounded-memory pass.
+"""
+import datetime
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from openpyxl import load_workbook
+from openpyxl.utils.cell import get_column_letter
+
+try:
+    from exstruct_server.slicing import parse_range
+except ImportError:
+    from slicing import parse_range
+
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, float) and value.is_integer():
+        # exstruct reports integral numbers as ints; keep the output identical.
+        return int(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    return value
+
+
+class _TableTracker:
+    """Collects table candidates incrementally from the rows seen so far."""
+
+    def __init__(self, min_rows: int = 2, min_cols: int = 2):
+        self.min_rows = min_rows
+        self.min_cols = min_cols
+        self.candidates: List[str] = []
+        self._block: Optional[List[int]] = None  # [first_row, last_row, min_col, max_col]
+
+    def add(self, r: int, columns: List[int]) -> None:
+        if len(columns) < self.min_cols:
+            self.close()
+            return
+        block = self._block
+        if block is not None and r == block[1] + 1:
+            block[1] = r
+            block[2] = min(block[2], columns[0])
+            block[3] = max(block[3], columns[-1])
+        else:
+            self.close()
+            self._block = [r, r, columns[0], columns[-1]]
+
+    def close(self) -> None:
+        block, self._block = self._block, None
+        if block is None or block[1] - block[0] + 1 < self.min_rows:
+            return
+        first_row, last_row, min_col, max_col = block
+        self.candidates.append(
+            f"{get_column_letter(min_col + 1)}{first_row}:{get_column_letter(max_col + 1)}{last_row}"
+        )
+
+
+def iter_sheet_rows(ws, bounds=None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yields (row_number, {column_index: value}) for the non-empty rows of a worksheet."""
+    min_col, min_row, max_col, max_row = bounds or (None, None, None, None)
+    first_col = (min_col or 1) - 1
+    r = (min_row or 1) - 1
+    for values in ws.iter_rows(min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col, values_only=True):
+        r += 1
+        cells = {str(first_col + i): _json_value(v) for i, v in enumerate(values) if v is not None and v != ""}
+        if cells:
+            yield r, cells
+
+
+def stream_workbook(
+    file_path: str,
+    sheet: Optional[str] = None,
+    cell_range: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+) -> Dict:
+    """
+    Reads the requested rows of a workbook without loading it into memory.
+
+    Rows are filtered by `sheet` and `cell_range`, then paged with `offset`/`limit` across the
+    sheets in order, like slicing.slice_workbook. Reading stops once `limit` rows have been
+    collected or the serialized rows exceed `max_bytes`; `page.truncated` is then true and
+    `page.total_rows` is null because the rest of the file was not read.
+    """
+    if offset < 0 or (limit is not None and limit < 0):
+        raise ValueError("offset and limit must be non-negative")
+    bounds = parse_range(cell_range)
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        if sheet is not None and sheet not in wb.sheetnames:
+            raise KeyError(f"Sheet {sheet!r} not found. Available sheets: {wb.sheetnames}")
+        names = [sheet] if sheet is not None else wb.sheetnames
+        sheets: Dict[str, Dict] = {}
+        seen = returned = size = 0
+        truncated = False
+        for name in names:
+            tables = _TableTracker()
+            rows: List[Dict] = []
+            for r, cells in iter_sheet_rows(wb[name], bounds):
+                seen += 1
+                if seen > offset:
+                    row = {"r": r, "c": cells, "links": None}
+                    row_size = len(json.dumps(row, ensure_ascii=False))
+                    if (limit is not None and returned >= limit) or (
+                        max_bytes is not None and returned and size + row_size > max_bytes
+                    ):
+                        truncated = True
+                        break
+                    rows.append(row)
+                    returned += 1
+                    size += row_size
+                    # Candidates only cover returned rows, like a slice of an extracted workbook
+                    tables.add(r, sorted(int(col) for col in cells))
+            tables.close()
+            if rows:
+                sheets[name] = {"table_candidates": tables.candidates, "rows": rows}
+            if truncated:
+                break
+    finally:
+        wb.close()
+
+    return {
+        "book_name": Path(file_path).name,
+        "sheets": sheets,
+        "page": {
+            "offset": offset,
+            "limit": limit,
+            "returned_rows": returned,
+            "total_rows": None if truncated else seen,
+            "next_offset": offset + returned if truncated else None,
+            "truncated": truncated,
+        },
+    }
+
+
+def describe_stream(file_path: str) -> Dict:
+    """
+    Returns the slicing.describe_workbook outline of a workbook, read row by row.
+
+    Merged cells, shapes and charts are not visible to the read-only reader and are
+    reported as null.
+    """
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheets = []
+        for name in wb.sheetnames:
+            tables = _TableTracker()
+            rows = max_row = 0
+            max_column = -1
+            for r, cells in iter_sheet_rows(wb[name]):
+                columns = sorted(int(col) for col in cells)
+                rows += 1
+                max_row = r
+                max_column = max(max_column, columns[-1])
+                tables.add(r, columns)
+            tables.close()
+            sheets.append({
+                "name": name,
+                "rows": rows,
+                "max_row": max_row,
+                "max_column": max_column + 1,
+                "table_candidates": tables.candidates,
+                "merged_cells": None,
+                "shapes": None,
+                "charts": None,
+            })
+    finally:
+        wb.close()
+    return {"book_name": Path(file_path).name, "sheets": sheets}
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+from openpyxl import Workbook
+
+# Add the src directory to path so we can import the server package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from exstruct_server import server
+from exstruct_server.batch import BatchRunner, extract_file, resolve_paths, to_jsonl
+from exstruct_server.cache import ResultCache
+
+
+def test_resolve_paths_expands_globs_and_directories(tmp_path):
+    (tmp_path / "sub").mkdir()
+    for name in ("a.xlsx", "notes.txt", "~$a.xlsx", "sub/b.xlsm"):
+        (tmp_path / name).write_bytes(b"")
+
+    by_glob = resolve_paths(pattern=str(tmp_path / "**" / "*.xls*"))
+    assert [os.path.relpath(p, tmp_path) for p in by_glob] == ["a.xlsx", os.path.join("sub", "b.xlsm")]
+    assert resolve_paths([str(tmp_path), str(tmp_path / "a.xlsx")]) == [str(tmp_path / "a.xlsx")]
+
+
+def test_to_jsonl_embeds_json_results_and_quotes_text():
+    record = {"file": "a.xlsx", "ok": True, "content": '{"book_name":"a.xlsx"}', "elapsed_ms": 1.0}
+    assert json.loads(to_jsonl(record, "min"))["result"] == {"book_name": "a.xlsx"}
+    record["content"] = "x,y\n1,2\n"
+    assert json.loads(to_jsonl(record, "csv"))["result"] == "x,y\n1,2\n"
+
+
+def test_to_jsonl_reports_errors():
+    record = {"file": "a.xlsx", "ok": False, "error": {"type": "ValueError", "message": "bad"}, "elapsed_ms": 1.0}
+    assert json.loads(to_jsonl(record, "min"))["error"]["type"] == "ValueError"
+
+
+@pytest.fixture
+def folder(tmp_path):
+    wb = Workbook()
+    wb.active.append(["id", "name"])
+    wb.active.append([1, "a"])
+    wb.save(tmp_path / "good.xlsx")
+    (tmp_path / "corrupt.xlsx").write_bytes(b"not a workbook")
+    return tmp_path
+
+
+@pytest.fixture
+def runner():
+    runner = BatchRunner(max_workers=2)
+    yield runner
+    runner.shutdown()
+
+
+async def _collect(runner, worker, files, *args):
+    return [record async for record in runner.run(worker, files, *args)]
+
+
+def test_run_yields_one_record_per_file_and_isolates_failures(folder, runner):
+    files = resolve_paths([str(folder)])
+    records = asyncio.run(_collect(runner, extract_file, files, "light", "min"))
+    by_name = {os.path.basename(record["file"]): record for record in records}
+    assert sorted(by_name) == ["corrupt.xlsx", "good.xlsx"]
+
+    good = by_name["good.xlsx"]
+    assert good["ok"] and json.loads(good["content"])["book_name"] == "good.xlsx"
+    bad = by_name["corrupt.xlsx"]
+    assert bad["ok"] is False and "content" not in bad
+    assert set(bad["error"]) == {"type", "message", "where"}
+    assert bad["error"]["type"] and bad["error"]["message"]
+    assert bad["elapsed_ms"] >= 0
+
+
+@pytest.mark.parametrize("tool", ["read_excel_batch", "index_directory"])
+def test_batch_tools_report_every_file_and_a_summary(folder, runner, tool, monkeypatch):
+    monkeypatch.setattr(server, "batch_runner", runner)
+    monkeypatch.setattr(server, "result_cache", ResultCache())
+    if tool == "read_excel_batch":
+        output = asyncio.run(server.read_excel_batch(paths=[str(folder)]))
+    else:
+        output = asyncio.run(server.index_directory(str(folder)))
+    *records, summary = [json.loads(line) for line in output.splitlines()]
+    assert sorted((os.path.basename(r["file"]), r["ok"]) for r in records) == [("corrupt.xlsx", False), ("good.xlsx", True)]
+    good = next(r for r in records if r["ok"])
+    assert "sheets" in good["result"]
+    assert next(r for r in records if not r["ok"])["error"]["type"]
+    assert summary["summary"]["files"] == 2
+    assert (summary["summary"]["ok"], summary["summary"]["failed"]) == (1, 1)
@@ -0,0 +1,89 @@
+import os
+import sys
+
+# Add the src directory to path so we can import the server package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from exstruct_server.cache import ResultCache
+
+
+def _write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_repeat_reads_are_served_from_memory(tmp_path):
+    cache = ResultCache(max_bytes=1024)
+    file_path = _write(tmp_path / "book.xlsx", "v1")
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return "result"
+
+    assert cache.get_or_compute(file_path, "light", compute) == "result"
+    assert cache.get_or_compute(file_path, "light", compute) == "result"
+    assert len(calls) == 1
+    assert cache.hits == 1
+
+
+def test_changed_file_is_recomputed_and_stale_entry_dropped(tmp_path):
+    cache = ResultCache(max_bytes=1024, key_mode="content")
+    file_path = _write(tmp_path / "book.xlsx", "v1")
+    cache.get_or_compute(file_path, "light", lambda: "old")
+
+    _write(tmp_path / "book.xlsx", "v2")
+    assert cache.get_or_compute(file_path, "light", lambda: "new") == "new"
+    assert len(cache) == 1
+
+
+def test_lru_is_bounded_by_total_bytes(tmp_path):
+    cache = ResultCache(max_bytes=10)
+    paths = [_write(tmp_path / f"{name}.xlsx", name) for name in "abc"]
+    for path in paths:
+        cache.get_or_compute(path, "light", lambda: "x" * 4)
+
+    assert cache.total_bytes <= 10
+    assert len(cache) == 2
+
+
+def test_disk_tier_survives_a_new_cache_instance(tmp_path):
+    file_path = _write(tmp_path / "book.xlsx", "v1")
+    ResultCache(disk_dir=tmp_path / "cache").get_or_compute(file_path, "light", lambda: "from disk")
+
+    fresh = ResultCache(disk_dir=tmp_path / "cache")
+    assert fresh.get_or_compute(file_path, "light", lambda: "recomputed") == "from disk"
+
+
+def _age(cache_dir, key, seconds):
+    path = cache_dir / f"{key}.json"
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns - seconds * 10 ** 9))
+
+
+def test_disk_tier_is_bounded_and_evicts_least_recently_used(tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache = ResultCache(max_bytes=1, disk_dir=cache_dir, disk_max_bytes=25)
+    for age, key in ((30, "a"), (20, "b")):
+        cache.put(key, "x" * 10)
+        _age(cache_dir, key, age)
+    # A disk hit marks "a" as recently used, so "b" is the oldest file
+    assert cache.get("a") == "x" * 10
+    cache.put("c", "x" * 10)
+    assert sorted(p.stem for p in cache_dir.glob("*.json")) == ["a", "c"]
+    assert cache.disk_bytes == 20
+    # Entries larger than the bound are not written
+    cache.put("huge", "x" * 26)
+    assert not (cache_dir / "huge.json").exists()
+
+
+def test_disk_tier_over_its_bound_is_swept_at_startup(tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache = ResultCache(disk_dir=cache_dir)
+    for age, key in ((30, "old"), (20, "mid"), (10, "new")):
+        cache.put(key, "x" * 10)
+        _age(cache_dir, key, age)
+
+    # After a restart the superseded entries are unknown; the size bound removes the oldest
+    restarted = ResultCache(disk_dir=cache_dir, disk_max_bytes=25)
+    assert sorted(p.stem for p in cache_dir.glob("*.json")) == ["mid", "new"]
+    assert restarted.disk_bytes == 20
@@ -0,0 +1,89 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Add the src directory to path so we can import the server package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from exstruct_server.executor import ExtractionPool, ServerBusyError
+
+
+def test_requests_run_concurrently_up_to_the_worker_limit():
+    pool = ExtractionPool(max_workers=2, max_queue=4)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def work():
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+        return "ok"
+
+    async def main():
+        return await asyncio.gather(*(pool.run(work) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["ok"] * 5
+    assert max(peak) == 2
+    pool.shutdown()
+
+
+def test_full_queue_is_rejected():
+    pool = ExtractionPool(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def main():
+        running = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        with pytest.raises(ServerBusyError):
+            await pool.run(release.wait)
+        release.set()
+        await asyncio.gather(*running)
+
+    asyncio.run(main())
+    assert pool.in_flight == 0
+    pool.shutdown()
+
+
+def test_slow_request_times_out_but_keeps_its_slot_until_done():
+    pool = ExtractionPool(max_workers=1, max_queue=0, timeout=0.05)
+    release = threading.Event()
+
+    async def main():
+        with pytest.raises(TimeoutError):
+            await pool.run(release.wait)
+        assert pool.in_flight == 1
+        release.set()
+
+    asyncio.run(main())
+    pool.shutdown()
+    assert pool.in_flight == 0
+
+
+def test_batches_are_admitted_and_share_worker_slots():
+    pool = ExtractionPool(max_workers=1, max_queue=1)
+
+    async def main():
+        async with pool.reserve():
+            assert pool.in_flight == 1
+            async with pool.worker_slot():
+                # The only worker slot is held by a batch file: the request has to wait for it
+                waiting = asyncio.ensure_future(pool.run(lambda: "ok"))
+                await asyncio.sleep(0.05)
+                assert not waiting.done()
+                # ... and the queue (1 batch + 1 waiting request) is full
+                with pytest.raises(ServerBusyError):
+                    async with pool.reserve():
+                        pass
+            assert await waiting == "ok"
+
+    asyncio.run(main())
+    assert pool.in_flight == 0
+    pool.shutdown()
@@ -0,0 +1,62 @@
+import json
+import os
+import sys
+
+import pytest
+
+# Add the src directory to path so we can import the server package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from exstruct.models import CellRow, SheetData, WorkbookData
+
+from exstruct_server.formats import render
+from exstruct_server.slicing import slice_workbook
+
+
+def _data(table_candidates=()):
+    rows = [
+        CellRow(r=1, c={"0": "id", "1": "name"}),
+        CellRow(r=2, c={"0": 1, "1": "a,b"}),
+        CellRow(r=3, c={"1": "only B"}),
+    ]
+    sheet = SheetData(rows=rows, table_candidates=list(table_candidates))
+    return WorkbookData(book_name="book.xlsx", sheets={"S": sheet}).model_dump(mode="json")
+
+
+def test_min_is_the_same_document_as_json():
+    data = _data()
+    assert json.loads(render(data, "min")) == json.loads(render(data, "json"))
+    assert "\n" not in render(data, "min")
+
+
+def test_table_lists_columns_once_and_rows_as_arrays():
+    sheet = json.loads(render(_data(), "table"))["sheets"]["S"]
+    assert sheet["columns"] == ["r", "A", "B"]
+    assert sheet["rows"] == [[1, "id", "name"], [2, 1, "a,b"], [3, None, "only B"]]
+
+
+def test_csv_uses_table_candidates_or_the_used_range():
+    assert render(_data(), "csv") == '# S!A1:B3\nid,name\n1,"a,b"\n,only B\n'
+    assert render(_data(["A1:A2"]), "tsv") == "# S!A1:A2\nid\n1\n"
+
+
+def test_jsonl_has_one_line_per_cell():
+    lines = render(_data(), "jsonl").splitlines()
+    assert len(lines) == 5
+    assert json.loads(lines[-1]) == {"sheet": "S", "cell": "B3", "value": "only B"}
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        render(_data(), "xml")
+
+
+def test_csv_of_a_page_is_clipped_to_the_returned_rows():
+    rows = [CellRow(r=r, c={"0": r, "1": f"v{r}"}) for r in range(1, 501)]
+    wb = WorkbookData(book_name="tbl.xlsx", sheets={"S": SheetData(rows=rows, table_candidates=["A1:B500"])})
+    page = slice_workbook(wb, offset=400, limit=3)
+    assert render(page, "csv") == "# S!A401:B403\n401,v401\n402,v402\n403,v403\n"
+
+    # A page outside every table candidate falls back to the used range of the page
+    outside = WorkbookData(book_name="tbl.xlsx", sheets={"S": SheetData(rows=rows, table_candidates=["A1:B10"])})
+    assert render(slice_workbook(outside, offset=20, limit=1), "csv") == "# S!A21:B21\n21,v21\n"
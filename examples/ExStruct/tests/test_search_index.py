@@ -0,0 +1,155 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+from openpyxl import Workbook
+
+# Add the src directory to path so we can import the server package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from exstruct_server import search_index, server
+from exstruct_server.search_index import WorkbookIndex, iter_cells
+
+
+def _save(path, rows, title="Data"):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = title
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+    return str(path)
+
+
+@pytest.fixture
+def folder(tmp_path):
+    docs = tmp_path / "docs"
+    (docs / "sub").mkdir(parents=True)
+    _save(docs / "staff.xlsx", [["社員番号", "氏名", "部署"], [101, "山田 太郎", "経理部"], [102, "佐藤 花子", "営業部"]])
+    _save(docs / "sub" / "notes.xlsx", [["memo only"], [], ["budget", "2024"]], title="Notes")
+    (docs / "readme.txt").write_text("budget")
+    return docs
+
+
+@pytest.fixture
+def index(tmp_path, folder):
+    return WorkbookIndex(path=tmp_path / "index.sqlite", directories=[str(folder)], refresh_interval=0)
+
+
+def test_iter_cells_marks_headers_and_labels_columns(folder):
+    cells = list(iter_cells(str(folder / "staff.xlsx")))
+    assert cells[0] == ("Data", "A1", "header", "社員番号", "")
+    assert ("Data", "B2", "cell", "山田 太郎", "氏名") in cells
+    assert ("Data", "A3", "cell", "102", "社員番号") in cells
+    # A single wide row is not a table: no header
+    notes = list(iter_cells(str(folder / "sub" / "notes.xlsx")))
+    assert notes == [("Notes", "A1", "cell", "memo only", ""), ("Notes", "A3", "cell", "budget", ""),
+                     ("Notes", "B3", "cell", "2024", "")]
+
+
+def test_search_finds_cells_with_headers(index):
+    assert index.refresh()["indexed"] == 2
+    result = index.search("経理")
+    assert [(os.path.basename(h["file"]), h["sheet"], h["cell"], h["header"]) for h in result["hits"]] == [
+        ("staff.xlsx", "Data", "C2", "部署"),
+    ]
+    # Header text matches too, and every term must occur
+    assert {h["cell"] for h in index.search("山田 太郎")["hits"]} == {"B2"}
+    assert index.search("budget")["hits"][0]["file"].endswith("notes.xlsx")
+    assert index.search("nothing-like-this")["hits"] == []
+
+
+def test_refresh_is_incremental(index, folder):
+    index.refresh()
+    stats = index.refresh()
+    assert (stats["indexed"], stats["unchanged"]) == (0, 2)
+
+    path = folder / "staff.xlsx"
+    _save(path, [["社員番号", "氏名"], [103, "鈴木 一郎"]])
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10 ** 9))
+    (folder / "sub" / "notes.xlsx").unlink()
+    stats = index.refresh()
+    assert (stats["indexed"], stats["unchanged"], stats["removed"]) == (1, 0, 1)
+    assert index.search("山田")["hits"] == []
+    assert index.search("鈴木")["hits"][0]["cell"] == "B2"
+    assert index.search("budget")["hits"] == []
+
+
+def test_refresh_interval_and_scope(tmp_path, folder):
+    index = WorkbookIndex(path=tmp_path / "index.sqlite", directories=[str(folder)], refresh_interval=3600)
+    assert index.refresh()["indexed"] == 2
+    assert index.refresh()["unchanged"] == 0  # skipped: refreshed recently
+    assert index.refresh(force=True)["unchanged"] == 2
+    assert index.search("budget", directories=[str(folder / "sub")])["hits"]
+    assert index.search("経理", directories=[str(folder / "sub")])["hits"] == []
+
+
+def test_unreadable_files_are_reported_once(index, folder):
+    (folder / "broken.xlsx").write_bytes(b"not a workbook")
+    assert index.refresh()["failed"] == 1
+    assert index.refresh()["failed"] == 0
+
+
+def test_limit_and_empty_query(index):
+    index.refresh()
+    result = index.search("部", limit=1)
+    assert len(result["hits"]) == 1 and result["truncated"]
+    with pytest.raises(ValueError):
+        index.search("   ")
+
+
+@pytest.fixture
+def slow_notes(monkeypatch):
+    """Blocks indexing notes.xlsx until the returned event is set."""
+    release = threading.Event()
+    original = search_index.iter_cells
+
+    def iter_cells_blocking(path):
+        if path.endswith("notes.xlsx"):
+            assert release.wait(10)
+        return original(path)
+
+    monkeypatch.setattr(search_index, "iter_cells", iter_cells_blocking)
+    yield release
+    release.set()
+
+
+def test_background_refresh_does_not_block_searches(tmp_path, folder, slow_notes):
+    index = WorkbookIndex(path=tmp_path / "index.sqlite", directories=[str(folder)], refresh_interval=3600)
+    assert index.refresh_in_background() == {"status": "started", "last": None}
+    assert index.refresh_in_background()["status"] == "running"
+    # staff.xlsx is committed before notes.xlsx; searches read what is indexed so far
+    deadline = time.monotonic() + 10
+    while not index.search("経理")["hits"]:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert index.search("budget")["hits"] == []
+    assert not index.wait_for_refresh(0.05)
+
+    slow_notes.set()
+    assert index.wait_for_refresh(10)
+    assert index.search("budget")["hits"]
+    state = index.refresh_in_background()
+    assert state["status"] == "fresh"
+    assert (state["last"]["indexed"], state["last"]["failed"]) == (2, 0)
+
+
+def test_search_tool_returns_while_the_index_is_built(tmp_path, folder, slow_notes, monkeypatch):
+    index = WorkbookIndex(path=tmp_path / "index.sqlite", directories=[str(folder)], refresh_interval=0)
+    monkeypatch.setattr(server, "workbook_index", index)
+    result = json.loads(asyncio.run(asyncio.wait_for(server.search_workbooks("budget"), 5)))
+    assert result["hits"] == []
+    assert result["refresh"]["status"] == "started"
+    # The refresh holds no worker slot
+    assert server.pool.in_flight == 0
+
+    slow_notes.set()
+    assert index.wait_for_refresh(10)
+    result = json.loads(asyncio.run(server.search_workbooks("budget", refresh=False)))
+    assert result["hits"][0]["file"].endswith("notes.xlsx")
+    assert result["refresh"] is None
+    assert "error" in json.loads(asyncio.run(server.search_workbooks("budget", directories=[str(folder / "missing")])))
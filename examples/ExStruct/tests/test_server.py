@@ -28,7 +28,7 @@ def test_read_excel():
         
     print(f"Testing read_excel with {sample_file}...")
     try:
-        result = read_excel(sample_file, mode="light")
+        result = asyncio.run(read_excel(sample_file, mode="light"))
         print("Result (first 500 chars):")
         print(result[:500])
         
@@ -0,0 +1,78 @@
+import os
+import sys
+
+import pytest
+
+# Add the src directory to path so we can import the server package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from exstruct.models import CellRow, SheetData, WorkbookData
+
+from exstruct_server.cache import ModelCache
+from exstruct_server.slicing import describe_workbook, slice_workbook
+
+
+def _workbook():
+    rows_a = [CellRow(r=r, c={"0": f"A{r}", "1": f"B{r}", "3": f"D{r}"}) for r in range(1, 6)]
+    rows_b = [CellRow(r=r, c={"0": f"x{r}"}) for r in range(1, 4)]
+    return WorkbookData(book_name="book.xlsx", sheets={"A": SheetData(rows=rows_a), "B": SheetData(rows=rows_b)})
+
+
+def test_sheet_and_range_filter_rows_and_columns():
+    result = slice_workbook(_workbook(), sheet="A", cell_range="B2:C3")
+    rows = result["sheets"]["A"]["rows"]
+    assert [row["r"] for row in rows] == [2, 3]
+    assert rows[0]["c"] == {"1": "B2"}
+    assert result["page"]["total_rows"] == 2
+
+
+def test_paging_spans_sheets_and_reports_next_offset():
+    first = slice_workbook(_workbook(), offset=0, limit=4)
+    assert first["page"]["next_offset"] == 4
+    second = slice_workbook(_workbook(), offset=4, limit=4)
+    assert list(second["sheets"]) == ["A", "B"]
+    assert second["page"]["returned_rows"] == 4
+    assert second["page"]["next_offset"] is None
+
+
+def test_unknown_sheet_lists_available_sheets():
+    with pytest.raises(KeyError, match="Available sheets"):
+        slice_workbook(_workbook(), sheet="missing")
+
+
+def test_describe_workbook_reports_extents():
+    sheets = describe_workbook(_workbook())["sheets"]
+    assert sheets[0] == {
+        "name": "A", "rows": 5, "max_row": 5, "max_column": 4,
+        "table_candidates": [], "merged_cells": 0, "shapes": 0, "charts": 0,
+    }
+
+
+def test_model_cache_extracts_once_per_file(tmp_path):
+    path = tmp_path / "book.xlsx"
+    path.write_text("v1", encoding="utf-8")
+    cache = ModelCache(max_entries=2)
+    calls = []
+
+    def extract():
+        calls.append(1)
+        return _workbook()
+
+    cache.get_or_extract(str(path), "light", extract)
+    cache.get_or_extract(str(path), "light", extract)
+    assert len(calls) == 1
+
+
+def test_paging_serializes_only_the_rows_on_the_page(monkeypatch):
+    dumped = []
+    original = CellRow.model_dump
+
+    def counting_dump(self, *args, **kwargs):
+        dumped.append(self.r)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(CellRow, "model_dump", counting_dump)
+    result = slice_workbook(_workbook(), sheet="A", offset=2, limit=2)
+    assert [row["r"] for row in result["sheets"]["A"]["rows"]] == [3, 4]
+    assert dumped == [3, 4]
+    assert result["page"]["total_rows"] == 5
@@ -0,0 +1,83 @@
+import json
+import os
+import sys
+
+import pytest
+from openpyxl import Workbook
+
+# Add the src directory to path so we can import the server package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from exstruct_server import server
+from exstruct_server.formats import render
+from exstruct_server.streaming import describe_stream, stream_workbook
+
+
+@pytest.fixture
+def book(tmp_path):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Data"
+    ws.append(["id", "name", "score"])
+    for i in range(20):
+        ws.append([i, f"n{i}", i * 1.5])
+    wb.create_sheet("Notes")["B2"] = "note"
+    path = tmp_path / "book.xlsx"
+    wb.save(path)
+    return str(path)
+
+
+def test_full_read_matches_light_row_layout(book):
+    result = stream_workbook(book)
+    rows = result["sheets"]["Data"]["rows"]
+    assert rows[0] == {"r": 1, "c": {"0": "id", "1": "name", "2": "score"}, "links": None}
+    assert rows[3]["c"] == {"0": 2, "1": "n2", "2": 3}
+    assert result["sheets"]["Data"]["table_candidates"] == ["A1:C21"]
+    assert result["sheets"]["Notes"]["rows"] == [{"r": 2, "c": {"1": "note"}, "links": None}]
+    assert result["page"] == {
+        "offset": 0, "limit": None, "returned_rows": 22, "total_rows": 22, "next_offset": None, "truncated": False,
+    }
+
+
+def test_row_limit_stops_early(book):
+    page = stream_workbook(book, offset=5, limit=5)["page"]
+    assert page["returned_rows"] == 5
+    assert page["truncated"] and page["next_offset"] == 10
+    assert page["total_rows"] is None
+
+
+def test_byte_budget_stops_early_but_returns_at_least_one_row(book):
+    result = stream_workbook(book, max_bytes=1)
+    assert result["page"]["returned_rows"] == 1
+    assert result["page"]["truncated"]
+
+
+def test_sheet_and_range_scoping(book):
+    result = stream_workbook(book, sheet="Data", cell_range="B2:B3")
+    assert result["sheets"]["Data"]["rows"] == [
+        {"r": 2, "c": {"1": "n0"}, "links": None},
+        {"r": 3, "c": {"1": "n1"}, "links": None},
+    ]
+    with pytest.raises(KeyError):
+        stream_workbook(book, sheet="Missing")
+
+
+def test_offset_page_only_covers_returned_rows(book):
+    result = stream_workbook(book, offset=15, limit=3)
+    assert result["sheets"]["Data"]["table_candidates"] == ["A16:C18"]
+    assert render(result, "csv").splitlines() == ["# Data!A16:C18", "14,n14,21", "15,n15,22.5", "16,n16,24"]
+
+
+def test_describe_stream_outlines_without_extracting(book, monkeypatch):
+    outline = describe_stream(book)
+    assert outline["sheets"][0] == {
+        "name": "Data", "rows": 21, "max_row": 21, "max_column": 3, "table_candidates": ["A1:C21"],
+        "merged_cells": None, "shapes": None, "charts": None,
+    }
+    assert outline["sheets"][1]["max_column"] == 2
+
+    def no_extract(*args, **kwargs):
+        raise AssertionError("exstruct.extract must not run for streamed files")
+
+    monkeypatch.setattr(server.exstruct, "extract", no_extract)
+    assert json.loads(server._describe_workbook(book, "stream")) == outline
@@ -0,0 +1,59 @@
+"""
+process_entity の変換結果の保持メモリを、dict 表現とコンパクト表現 (CompactTransformationEngine) で比較するベンチマーク。
+
+    python examples/logical-model-mapping/python/benchmarks/bench_compact.py --projects 20000
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+import yaml
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from bench_parallel import ROOT_CONTEXT, SAMPLE_MAPPING, make_project  # noqa: E402
+from compact import CompactTransformationEngine  # noqa: E402
+from converter import DataTransformationEngine  # noqa: E402
+
+
+def measure(label: str, engine_cls, mapping_def: dict, projects: list) -> int:
+    """変換後に保持されているメモリ量 (入力レコード自体は含まない) を返す"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    engine = engine_cls(mapping_def)
+    for project in projects:
+        engine.process_entity(project, ROOT_CONTEXT)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(engine.table) if hasattr(engine, "table") else len(engine.results)
+    print(f"{label:<8} {elapsed:8.3f} s  {retained / 2 ** 20:9.1f} MiB retained  "
+          f"{retained / count:7.1f} bytes/entity  ({count:,} entities)")
+    del engine
+    return retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--projects", type=int, default=20_000)
+    parser.add_argument("--datasets-per-project", type=int, default=5)
+    parser.add_argument("--mapping", default=SAMPLE_MAPPING)
+    args = parser.parse_args()
+
+    with open(args.mapping, "r", encoding="utf-8") as f:
+        mapping_def = yaml.safe_load(f)
+    projects = [make_project(i, args.datasets_per_project) for i in range(args.projects)]
+
+    print(f"{args.projects:,} projects x {args.datasets_per_project} datasets")
+    as_dict = measure("dict", DataTransformationEngine, mapping_def, projects)
+    compact = measure("compact", CompactTransformationEngine, mapping_def, projects)
+    print(f"memory reduction: {1 - compact / as_dict:.1%} ({as_dict / compact:.2f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+並列バッチ変換 (iter_transform_parallel) のスケーリングを 1..N ワーカーで計測するベンチマーク。
+
+    python examples/logical-model-mapping/python/benchmarks/bench_parallel.py --projects 20000 --max-workers 8
+"""
+import argparse
+import os
+import sys
+import time
+
+import yaml
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from converter import DataTransformationEngine  # noqa: E402
+from parallel import default_workers, iter_transform_parallel  # noqa: E402
+
+SAMPLE_MAPPING = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "../../sample/dmp_to_cao_mapping.yaml")
+)
+ROOT_CONTEXT = "http://schema.org/ResearchProject"
+ACCESS_POLICIES = ["公開", "共有", "非共有・非公開"]
+
+
+def make_project(index: int, datasets: int) -> dict:
+    return {
+        "project_number": f"JP{index:08d}",
+        "has_datasets": [
+            {
+                "dataset_no": n,
+                "title": f"Dataset {index}-{n}",
+                "access_policy": ACCESS_POLICIES[n % len(ACCESS_POLICIES)],
+                "collected_by": {"contributor_id": f"P{n:03d}", "name": f"Person {n}"},
+            }
+            for n in range(datasets)
+        ],
+    }
+
+
+def timed(label: str, projects: list, run) -> float:
+    start = time.perf_counter()
+    entities = sum(1 for _ in run())
+    elapsed = time.perf_counter() - start
+    rate = len(projects) / elapsed
+    print(f"{label:<12} {elapsed:8.3f} s  {rate:12,.0f} projects/sec  ({entities:,} entities)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--projects", type=int, default=20_000)
+    parser.add_argument("--datasets-per-project", type=int, default=5)
+    parser.add_argument("--max-workers", type=int, default=default_workers())
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--mapping", default=SAMPLE_MAPPING)
+    args = parser.parse_args()
+
+    with open(args.mapping, "r", encoding="utf-8") as f:
+        mapping_def = yaml.safe_load(f)
+    projects = [make_project(i, args.datasets_per_project) for i in range(args.projects)]
+
+    print(f"{args.projects:,} projects x {args.datasets_per_project} datasets, chunk size {args.chunk_size}")
+    engine = DataTransformationEngine(mapping_def)
+    baseline = timed("in-process", projects, lambda: engine.iter_transform(projects, ROOT_CONTEXT))
+
+    # 1, 2, 4, ... と max_workers を計測する
+    counts = sorted({2 ** n for n in range(args.max_workers.bit_length()) if 2 ** n <= args.max_workers} | {args.max_workers})
+    for workers in counts:
+        elapsed = timed(f"workers={workers}", projects, lambda: iter_transform_parallel(
+            mapping_def, projects, ROOT_CONTEXT, workers=workers, chunk_size=args.chunk_size,
+        ))
+        print(f"{'':<12} speedup vs in-process: {baseline / elapsed:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
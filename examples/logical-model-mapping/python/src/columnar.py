@@ -0,0 +1,90 @@
+"""
+同一 context のレコード群を列単位でまとめて変換するモジュール。
+
+属性規則を 1 レコードずつではなく列全体に適用する。
+- direct_copy: 列の付け替えのみ (値のコピーなし)
+- static_value: 固定値のブロードキャスト
+- map_values: 変換表による列一括の置換
+
+入力はレコードのリスト、または列名 -> 値リストの dict (pyarrow.Table 等 to_pydict() を持つものも可)。
+出力も列指向の ColumnarBatch で、レコード単位のネストした dict は to_records() で必要時にだけ生成する。
+リレーションシップは辿らないため、子要素を含むレコードは iter_transform を使うこと。
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Mapping, Sequence, Tuple, Union
+
+from mapping_plan import MISSING, CompiledEntityMapping
+
+Columns = Dict[str, List[Any]]
+BatchInput = Union[Sequence[Dict], Mapping[str, Sequence[Any]]]
+
+
+@dataclass(frozen=True)
+class ColumnarBatch:
+    """列指向の変換結果 (ターゲット側のキー列 -> 値リスト。欠損は MISSING)"""
+    target_context: str
+    length: int
+    columns: Dict[Tuple[str, ...], List[Any]]
+
+    def __len__(self) -> int:
+        return self.length
+
+    def column(self, path: str) -> List[Any]:
+        """ドット区切りのパスで列を取り出す"""
+        return self.columns[tuple(path.split('.'))]
+
+    def to_records(self) -> Iterator[Dict]:
+        """レコード単位のネストした dict を 1 件ずつ生成する"""
+        paths = [(path[:-1], path[-1], values) for path, values in self.columns.items()]
+        for i in range(self.length):
+            record = {'_context': self.target_context}
+            for parent_keys, leaf_key, values in paths:
+                value = values[i]
+                if value is MISSING:
+                    continue
+                current = record
+                for key in parent_keys:
+                    if key not in current:
+                        current[key] = {}
+                    current = current[key]
+                current[leaf_key] = value
+            yield record
+
+
+def to_columns(batch: BatchInput, attributes: Sequence[str]) -> Tuple[Columns, int]:
+    """入力を必要な属性だけの列 dict に変換する (存在しない値は MISSING)"""
+    if hasattr(batch, 'to_pydict'):
+        batch = batch.to_pydict()
+    if isinstance(batch, Mapping):
+        length = len(next(iter(batch.values()), ()))
+        columns = {}
+        for attr in attributes:
+            if attr in batch:
+                values = list(batch[attr])
+                if len(values) != length:
+                    raise ValueError(f"Column {attr} has {len(values)} values, expected {length}")
+                columns[attr] = values
+        return columns, length
+
+    records = list(batch)
+    columns = {attr: [record.get(attr, MISSING) for record in records] for attr in attributes}
+    return columns, len(records)
+
+
+def transform_columns(mapping_rule: CompiledEntityMapping, batch: BatchInput) -> ColumnarBatch:
+    """コンパイル済みエンティティマッピングの属性規則を列単位で適用する"""
+    source_attributes = list(dict.fromkeys(op.source_attribute for op in mapping_rule.attributes))
+    columns, length = to_columns(batch, source_attributes)
+
+    output: Dict[Tuple[str, ...], List[Any]] = {}
+    for op in mapping_rule.attributes:
+        values = columns.get(op.source_attribute)
+        if values is None:
+            continue
+        path = op.parent_keys + (op.leaf_key,)
+        resolved = op.resolve_column(values)
+        if path in output:
+            # 同じ出力先への規則が複数ある場合は、レコード単位の変換と同じく後勝ち (欠損は上書きしない)
+            resolved = [old if new is MISSING else new for old, new in zip(output[path], resolved)]
+        output[path] = resolved
+    return ColumnarBatch(target_context=mapping_rule.target_context, length=length, columns=output)
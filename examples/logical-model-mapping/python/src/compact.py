@@ -0,0 +1,161 @@
+"""
+変換結果を省メモリな形で保持する、コンパクトなターゲットエンティティ表現。
+
+process_entity は変換結果を dict で self.results に蓄積するため、エンティティごとに
+dict 本体・'_context' キー・target_path 用の入れ子の dict のコストがかかる。
+CompactTransformationEngine はマッピング定義からターゲット context ごとに
+__slots__ を持つクラス (レイアウト) を生成し、エンティティをそのインスタンスとして保持する。
+- 出力先のパス (target_path / target_attribute) ごとに 1 スロット (入れ子の dict は作らない)
+- context URI はクラス属性として 1 回だけ保持する (sys.intern 済み)
+- 逆参照リンクは親エンティティの dict ではなく、エンティティ表 (EntityTable) 上の整数ハンドル
+
+dict は EntityTable.to_dict() / iter_dicts() でシリアライズする時にだけ生成する。
+形式は iter_transform と同じく、'_id' にハンドル、逆参照リンクに親のハンドルを持つ。
+"""
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from converter import DataTransformationEngine, resolve_parent_rel
+from mapping_plan import MISSING, CompiledEntityMapping, MappingPlan, RelationshipOp
+
+_HANDLE = '_handle'
+
+
+class CompactEntity:
+    """レイアウトクラスの基底クラス (_context / _paths / _links は生成時にクラス属性として設定する)"""
+    __slots__ = (_HANDLE,)
+    _context: str = ''
+    _paths: Tuple[Tuple[str, ...], ...] = ()
+    _links: Tuple[str, ...] = ()
+    _setters: Tuple[Tuple[Any, Any], ...] = ()
+
+
+def _slot_name(index: int) -> str:
+    return f'f{index}'
+
+
+def _link_slot(name: str) -> str:
+    return f'l_{name}'
+
+
+def build_layouts(plan: MappingPlan) -> Dict[str, type]:
+    """source context ごとに、属性とリンク用のスロットを持つレイアウトクラスを生成する"""
+    # 親側のリレーションシップ (inverse) から、子の context ごとに逆参照リンクの名前を集める
+    links: Dict[str, Dict[str, None]] = {}
+    for mapping in plan.entities.values():
+        for rel in mapping.relationships:
+            if rel.inverse:
+                links.setdefault(rel.child_context, {})[sys.intern(rel.target_relationship)] = None
+
+    layouts = {}
+    for context, mapping in plan.entities.items():
+        # 同じ出力先への規則が複数ある場合は 1 スロットを共有する (後勝ち)
+        paths = tuple(dict.fromkeys(op.parent_keys + (op.leaf_key,) for op in mapping.attributes))
+        link_names = tuple(links.get(context, ()))
+        slots = tuple(_slot_name(i) for i in range(len(paths))) + tuple(map(_link_slot, link_names))
+        class_name = 'Compact' + ''.join(ch for ch in mapping.target_context.rsplit('/', 1)[-1] if ch.isalnum())
+        cls = type(class_name, (CompactEntity,), {
+            '__slots__': slots,
+            '_context': sys.intern(mapping.target_context),
+            '_paths': paths,
+            '_links': link_names,
+        })
+        # (AttributeOp, スロットのディスクリプタ) の組を規則の順に持たせる
+        slot_of = {path: cls.__dict__[_slot_name(i)] for i, path in enumerate(paths)}
+        cls._setters = tuple((op, slot_of[op.parent_keys + (op.leaf_key,)]) for op in mapping.attributes)
+        layouts[context] = cls
+    return layouts
+
+
+class EntityTable:
+    """コンパクトなエンティティの表。エンティティのハンドルは表上の位置 (生成順)"""
+
+    def __init__(self):
+        self.entities: List[CompactEntity] = []
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def __getitem__(self, handle: int) -> CompactEntity:
+        return self.entities[handle]
+
+    def add(self, entity: CompactEntity) -> int:
+        handle = len(self.entities)
+        setattr(entity, _HANDLE, handle)
+        self.entities.append(entity)
+        return handle
+
+    def to_dict(self, handle: int) -> Dict:
+        """1 件を iter_transform と同じ形式の dict に変換する"""
+        entity = self.entities[handle]
+        cls = type(entity)
+        result = {'_context': cls._context}
+        for index, path in enumerate(cls._paths):
+            value = getattr(entity, _slot_name(index), MISSING)
+            if value is MISSING:
+                continue
+            current = result
+            for key in path[:-1]:
+                if key not in current:
+                    current[key] = {}
+                current = current[key]
+            current[path[-1]] = value
+        result['_id'] = handle
+        for name in cls._links:
+            value = getattr(entity, _link_slot(name), MISSING)
+            if value is not MISSING:
+                result[name] = list(value) if isinstance(value, list) else value
+        return result
+
+    def iter_dicts(self) -> Iterator[Dict]:
+        """全エンティティをハンドル順に dict として 1 件ずつ生成する"""
+        for handle in range(len(self.entities)):
+            yield self.to_dict(handle)
+
+
+class CompactTransformationEngine(DataTransformationEngine):
+    """
+    変換結果を self.results の dict ではなく、self.table (EntityTable) のコンパクトなエンティティとして保持するエンジン。
+
+    process_entity は dict 版と同じくルートのエンティティを返す (ハンドルは entity._handle)。
+    iter_transform は基底クラスのまま、self.table を使わずに dict のエンティティを出力する。
+    """
+
+    def __init__(self, mapping_def: Dict, plan: Optional[MappingPlan] = None, **kwargs):
+        super().__init__(mapping_def, plan=plan, **kwargs)
+        self.layouts = build_layouts(self.plan)
+        self.table = EntityTable()
+
+    def create_target_entity(self, source_data: Dict, mapping_rule: CompiledEntityMapping) -> CompactEntity:
+        entity = self.layouts[mapping_rule.source_context]()
+        for op, slot in entity._setters:
+            value = source_data.get(op.source_attribute, MISSING)
+            if value is not MISSING:
+                slot.__set__(entity, op.resolve(value))
+        self.table.add(entity)
+        return entity
+
+    def add_inverse_link(self, target_entity: Any, parent_rel: Optional[RelationshipOp], parent_ref: Any):
+        """親のハンドルを逆参照リンクとしてセットする (インターン済みエンティティの 2 件目以降はリストに追加)"""
+        if parent_ref is None or not parent_rel or not parent_rel.inverse:
+            return
+        if isinstance(parent_ref, CompactEntity):
+            parent_ref = getattr(parent_ref, _HANDLE)
+        slot = _link_slot(parent_rel.target_relationship)
+        current = getattr(target_entity, slot, MISSING)
+        if current is MISSING:
+            setattr(target_entity, slot, parent_ref)
+        elif isinstance(current, list):
+            current.append(parent_ref)
+        else:
+            setattr(target_entity, slot, [current, parent_ref])
+
+    def process_entity(self, source_data: Dict, context_uri: str, parent_ref: Optional[Any] = None, parent_rel: Optional[RelationshipOp] = None, parent_rel_map: Optional[Dict] = None):
+        """エンティティを変換して self.table に追加する (self.results には蓄積しない。parent_rel_map は非推奨)"""
+        parent_rel = resolve_parent_rel(parent_rel, parent_rel_map, context_uri)
+        walker = self._traverse(source_data, context_uri, None, self.interned, self.stats, parent_ref, parent_rel)
+        while True:
+            try:
+                next(walker)
+            except StopIteration as stop:
+                return stop.value
@@ -0,0 +1,58 @@
+"""
+リレーションシップ先 (子要素) の context を解決するインデックスを構築するモジュール。
+
+ソース側の論理モデル (logical_model_schema 形式、エンティティに context を持つもの) から
+(親エンティティの context, リレーションシップ名) -> 子エンティティの context
+の対応表を作り、マッピングのコンパイル時に各 RelationshipOp へ解決済みの context を持たせる。
+"""
+import logging
+from typing import Dict, Optional, Tuple
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+ContextIndex = Dict[Tuple[str, str], str]
+
+# 論理モデルが与えられない場合の既定値 (DMP -> CAO サンプル用、リレーション名のみで判定)
+DEFAULT_CHILD_CONTEXTS = {
+    "has_datasets": "http://schema.org/Dataset",
+    "has_contributors": "http://schema.org/Person",
+    "collected_by": "http://schema.org/Person",
+}
+
+
+def load_logical_model(path: str) -> Dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+def build_context_index(logical_model: Dict, mapping_def: Optional[Dict] = None) -> ContextIndex:
+    """論理モデルのエンティティ定義からリレーションシップの context インデックスを構築する"""
+    if mapping_def and mapping_def.get('source_model') not in (None, logical_model.get('model_name')):
+        logger.warning(
+            "Source model mismatch: mapping expects %s but logical model is %s",
+            mapping_def.get('source_model'), logical_model.get('model_name'),
+        )
+
+    entities = logical_model.get('entities', {})
+    index: ContextIndex = {}
+    for entity_name, entity in entities.items():
+        parent_context = entity.get('context')
+        if not parent_context:
+            logger.debug("Entity %s has no context; its relationships are not indexed", entity_name)
+            continue
+        for rel_name, rel in (entity.get('relationships') or {}).items():
+            child_context = entities.get(rel.get('target'), {}).get('context')
+            if child_context:
+                index[(parent_context, rel_name)] = child_context
+    return index
+
+
+def default_context_index(mapping_def: Dict) -> ContextIndex:
+    """論理モデルなしで使う既定インデックス (DEFAULT_CHILD_CONTEXTS をすべての親 context に適用)"""
+    return {
+        (entity_map['source_selector']['context'], rel_name): child_context
+        for entity_map in mapping_def['entity_mappings']
+        for rel_name, child_context in DEFAULT_CHILD_CONTEXTS.items()
+    }
@@ -1,18 +1,70 @@
+import argparse
+import functools
+import itertools
+import logging
+import os
+import sys
+import warnings
 import yaml
 import json
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Tuple
+
+from columnar import BatchInput, ColumnarBatch, transform_columns
+from context_index import build_context_index
+from instrumentation import EngineProfile, instrument_iter_children, instrument_plan
+from mapping_loader import MappingDefinitionError, load_mapping
+from mapping_plan import CompiledEntityMapping, MappingPlan, RelationshipOp, compile_mapping
+from traversal import TraversalLimitError, TraversalLimits, TraversalStats
+from record_io import INPUT_FORMATS, STDIO_PATH, JsonlWriter, RecordFormatError, open_text, read_all_records
+
+DEFAULT_MAPPING_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../sample/dmp_to_cao_mapping.yaml")
+DEFAULT_ROOT_CONTEXT = "http://schema.org/ResearchProject"
+# iter_transform の '_id' 採番範囲の単位 (並列変換のチャンク・差分変換のレコードごとに first_id = ブロック番号 * ID_BLOCK_SIZE)
+ID_BLOCK_SIZE = 1 << 32
+
+logger = logging.getLogger(__name__)
+
+def resolve_parent_rel(parent_rel: Optional[RelationshipOp], parent_rel_map: Optional[Dict], context_uri: str) -> Optional[RelationshipOp]:
+    """process_entity の非推奨引数 parent_rel_map (リレーションシップ定義の dict) を RelationshipOp に変換する"""
+    if parent_rel_map is None:
+        return parent_rel
+    warnings.warn(
+        "process_entity(parent_rel_map=...) is deprecated; pass parent_rel (a compiled RelationshipOp) instead",
+        DeprecationWarning,
+        stacklevel=3,
+    )
+    if parent_rel is not None:
+        raise TypeError("pass either parent_rel or parent_rel_map, not both")
+    return RelationshipOp(
+        source_relationship=parent_rel_map.get('source_relationship', ''),
+        target_relationship=parent_rel_map['target_relationship'],
+        inverse=parent_rel_map.get('direction') == 'inverse',
+        child_context=context_uri,
+    )
+
 
 # ==========================================
 # 1. 変換エンジンクラス (汎用ロジック)
 # ==========================================
 class DataTransformationEngine:
-    def __init__(self, mapping_def: Dict):
+    def __init__(self, mapping_def: Dict, plan: Optional[MappingPlan] = None, source_model: Optional[Dict] = None, identity_attributes: Optional[Dict[str, str]] = None, limits: Optional[TraversalLimits] = None):
         self.mapping_def = mapping_def
         self.entity_mappings = {
             m['source_selector']['context']: m 
             for m in mapping_def['entity_mappings']
         }
+        # マッピング定義は初期化時に一度だけ実行プランへコンパイルする
+        # source_model (ソース側の論理モデル) があれば、子要素の context はそこから解決する
+        # identity_attributes (context -> 識別属性名) を指定したエンティティは重複排除の対象になる
+        if plan is None:
+            context_index = build_context_index(source_model, mapping_def) if source_model else None
+            plan = compile_mapping(mapping_def, context_index, identity_attributes)
+        self.plan = plan
+        self.limits = limits or TraversalLimits() # 走査の深さ・ファンアウト上限
+        self.stats = TraversalStats() # process_entity の走査統計
+        self.profile: Optional[EngineProfile] = None # enable_profiling() で有効化される計測結果
         self.results = [] # 変換後の全エンティティをフラットに保持するリスト
+        self.interned = {} # (context, 識別属性の値) -> 変換済みエンティティ
 
     def set_nested_value(self, target_dict: Dict, path: str, value: Any):
         """ドット区切りのパス (a.b.c) に値をセットする"""
@@ -25,7 +77,7 @@ class DataTransformationEngine:
         current[keys[-1]] = value
 
     def apply_attribute_mapping(self, source_data: Dict, target_data: Dict, mapping_rules: List[Dict]):
-        """属性のマッピング適用"""
+        """属性のマッピング適用 (未コンパイルのルールを逐次解釈する。変換処理本体は self.plan を使用)"""
         for attr_map in mapping_rules:
             src_key = attr_map['source_attribute']
             rule_type = attr_map.get('rule', 'direct_copy')
@@ -50,36 +102,62 @@ class DataTransformationEngine:
             elif 'target_attribute' in attr_map:
                 target_data[attr_map['target_attribute']] = value
 
-    def process_entity(self, source_data: Dict, context_uri: str, parent_ref: Optional[Dict] = None, parent_rel_map: Optional[Dict] = None):
-        """エンティティを再帰的に変換する"""
-        
-        # 1. 対応するマッピング定義を探す
-        mapping_rule = self.entity_mappings.get(context_uri)
+    def find_mapping(self, context_uri: str) -> Optional[CompiledEntityMapping]:
+        """context に対応するコンパイル済みマッピングを探す (見つからなければ警告)"""
+        mapping_rule = self.plan.get(context_uri)
         if not mapping_rule:
-            print(f"Warning: No mapping rule found for context {context_uri}")
-            return
+            # 標準出力は変換結果 (JSON Lines) に使うため、警告はログ (標準エラー出力) へ出す
+            logger.warning("No mapping rule found for context %s", context_uri)
+            if self.profile is not None:
+                self.profile.missing_rules[context_uri] += 1
+        return mapping_rule
+
+    def enable_profiling(self) -> EngineProfile:
+        """
+        計測を有効化し、集計先の EngineProfile を返す。
 
-        # 2. ターゲットデータの器を作成
+        プランと子要素の列挙を計測付きのものに差し替えるだけなので、無効時の変換処理には影響しない。
+        """
+        if self.profile is None:
+            self.profile = EngineProfile()
+            self._unprofiled_plan = self.plan
+            self.plan = instrument_plan(self.plan, self.profile)
+            self.iter_children = instrument_iter_children(self.iter_children, self.profile)
+        return self.profile
+
+    def disable_profiling(self) -> Optional[EngineProfile]:
+        """計測を無効化して元のプランに戻し、それまでの計測結果を返す"""
+        profile = self.profile
+        if profile is not None:
+            self.plan = self._unprofiled_plan
+            del self.iter_children
+            self.profile = None
+        return profile
+
+    def create_target_entity(self, source_data: Dict, mapping_rule: CompiledEntityMapping) -> Dict:
+        """ターゲットデータの器を作成し、属性マッピングを適用する"""
         target_entity = {}
         # 便宜上、何のエンティティか分かるようにcontextを持たせておく（出力用）
-        target_entity['_context'] = mapping_rule['target_selector']['context']
-
-        # 3. 属性マッピングの実行
-        self.apply_attribute_mapping(source_data, target_entity, mapping_rule.get('attribute_mappings', []))
-
-        # 4. 親からの逆参照リンク解決 (Inverse Relationship)
-        # 例: Project(親) -> has_datasets -> Dataset(子) の処理中に、
-        # Dataset側に belongs_to_project = Project(親) をセットする
-        if parent_ref and parent_rel_map:
-            if parent_rel_map.get('direction') == 'inverse':
-                target_rel_name = parent_rel_map['target_relationship']
-                # 循環参照を防ぐため、ここでは簡易的にIDや参照オブジェクトをセットする
-                # 本来はID参照が望ましいが、論理モデル上はオブジェクト埋め込みとして表現
-                target_entity[target_rel_name] = parent_ref
-
-        # 5. リレーションシップの再帰処理
-        for rel_map in mapping_rule.get('relationship_mappings', []):
-            src_rel = rel_map['source_relationship']
+        target_entity['_context'] = mapping_rule.target_context
+        mapping_rule.apply_attributes(source_data, target_entity)
+        return target_entity
+
+    def add_inverse_link(self, target_entity: Dict, parent_rel: Optional[RelationshipOp], parent_ref: Any):
+        """親からの逆参照リンクをセットする (インターン済みエンティティの 2 件目以降はリストに追加)"""
+        if parent_ref is None or not parent_rel or not parent_rel.inverse:
+            return
+        target_rel_name = parent_rel.target_relationship
+        if target_rel_name not in target_entity:
+            target_entity[target_rel_name] = parent_ref
+        elif isinstance(target_entity[target_rel_name], list):
+            target_entity[target_rel_name].append(parent_ref)
+        else:
+            target_entity[target_rel_name] = [target_entity[target_rel_name], parent_ref]
+
+    def iter_children(self, source_data: Dict, mapping_rule: CompiledEntityMapping) -> Iterator[Tuple[RelationshipOp, str, Dict]]:
+        """リレーションシップ先の子要素を (リレーション, 子のContext, 子要素) の組で列挙する"""
+        for rel_map in mapping_rule.relationships:
+            src_rel = rel_map.source_relationship
             
             # ソースデータにリレーションが存在するか
             if src_rel in source_data:
@@ -87,26 +165,161 @@ class DataTransformationEngine:
                 if not isinstance(children, list):
                     children = [children] # 1:1でもリストとして扱う
 
-                # 子要素のContextを特定する必要がある
-                # ※簡易実装: マッピング定義のリレーション情報から推測するか、データ自体に型情報が必要。
-                # ここでは「DMPモデル定義」を知っている前提でハードコードせず、
-                # 汎用的にするために「マッピング定義の description」等から推論すべきだが、
-                # 今回はデモ用としてリレーション名から決め打ちでContextを渡す。
-                child_context = ""
-                if src_rel == "has_datasets":
-                    child_context = "http://schema.org/Dataset"
-                elif src_rel == "has_contributors":
-                    child_context = "http://schema.org/Person"
-                elif src_rel == "collected_by":
-                    child_context = "http://schema.org/Person"
-                
-                if child_context:
-                    for child in children:
-                        self.process_entity(child, child_context, parent_ref=target_entity, parent_rel_map=rel_map)
-
-        # 6. 結果リストに追加
-        self.results.append(target_entity)
-        return target_entity
+                # 子要素のContextはコンパイル時に context インデックスから解決済み
+                child_context = rel_map.child_context
+                for child in children:
+                    yield rel_map, child_context, child
+
+    def process_entity(self, source_data: Dict, context_uri: str, parent_ref: Optional[Dict] = None, parent_rel: Optional[RelationshipOp] = None, parent_rel_map: Optional[Dict] = None):
+        """
+        エンティティを (明示的なスタックで) 再帰的に変換し、結果を self.results に追加する
+
+        parent_rel_map (マッピング定義のリレーションシップ dict) は非推奨。parent_rel を使うこと。
+        """
+        parent_rel = resolve_parent_rel(parent_rel, parent_rel_map, context_uri)
+        # 逆参照リンクには親エンティティ (dict) をそのままセットし、インターン表はエンジンで保持する
+        # 循環参照を防ぐため、ここでは簡易的にIDや参照オブジェクトをセットする
+        # 本来はID参照が望ましいが、論理モデル上はオブジェクト埋め込みとして表現
+        walker = self._traverse(source_data, context_uri, None, self.interned, self.stats, parent_ref, parent_rel)
+        while True:
+            try:
+                self.results.append(next(walker))
+            except StopIteration as stop:
+                return stop.value
+
+    # ------------------------------------------
+    # 列指向のバッチ API
+    # ------------------------------------------
+    def transform_batch(self, batch: BatchInput, context_uri: str) -> Optional[ColumnarBatch]:
+        """
+        同一 context のレコード群 (レコードのリストまたは列 dict) の属性をまとめて変換する。
+
+        リレーションシップは辿らない。結果は列指向で、dict が必要なら to_records() で生成する。
+        """
+        mapping_rule = self.find_mapping(context_uri)
+        if not mapping_rule:
+            return None
+        return transform_columns(mapping_rule, batch)
+
+    # ------------------------------------------
+    # ストリーミング API
+    # ------------------------------------------
+    def iter_transform(self, records: Iterable[Dict], root_context: str, first_id: int = 0, stats: Optional[TraversalStats] = None) -> Iterator[Dict]:
+        """
+        ソースレコードを 1 件ずつ変換し、生成したターゲットエンティティを順次 yield する。
+
+        process_entity と異なり self.results には蓄積せず、エンジン側に状態を持たない。
+        各エンティティには呼び出し単位の連番 '_id' を付与し、逆参照リンクには
+        親エンティティそのものではなく親の '_id' をセットする。
+        エンティティは process_entity と同じく子 -> 親の順に出力される。
+        識別属性が設定されたエンティティは呼び出し単位で重複排除し、2 件目以降は
+        {'_context', '_ref': 初出の '_id', 逆参照リンク} だけの参照行として出力する。
+        first_id は '_id' の開始値 (並列変換でシャードごとに採番範囲を分けるために使用)。
+        stats を渡すと走査の統計情報が加算される。
+        """
+        ids = itertools.count(first_id)
+        interned = {}
+        stats = stats if stats is not None else TraversalStats()
+        for record in records:
+            yield from self._traverse(record, root_context, ids, interned, stats)
+
+    def _traverse(self, source_data: Dict, context_uri: str, ids: Optional[Iterator[int]], interned: Dict, stats: TraversalStats, parent_link: Any = None, parent_rel: Optional[RelationshipOp] = None):
+        """
+        1 件のルート要素から辿れるエンティティを、明示的なスタックで深さ優先に走査して子 -> 親の順に yield する。
+
+        ids が None の場合は逆参照リンクにエンティティ自体をセットし、重複は参照行を出さずにリンクだけ追加する。
+        エンティティの生成とリンクはサブクラスで差し替えられる (create_target_entity / add_inverse_link)。
+        ids がある場合は '_id' を採番し、リンクには '_id' をセットする。この場合の出力は iter_transform の形式に
+        固定されるため、サブクラスではなくこのクラスの dict 版の生成・リンクを使う。
+        ルートのエンティティを戻り値として返す。
+        """
+        limits = self.limits
+        on_path = set() # 祖先 (走査中のパス上) にあるソースオブジェクトの id()
+        stack = []
+        push = self._frame_pusher(ids, interned, stats, on_path, stack)
+
+        root = push(source_data, context_uri, parent_link, parent_rel, 0)
+        if root is not None and ids is not None:
+            yield root
+        while stack:
+            source, mapping_rule, target_entity, own_link, children, depth, fan_out = stack[-1]
+            child = next(children, None)
+            if child is None:
+                # フレームの pop: 子をすべて展開し終えたエンティティを出力する
+                stack.pop()
+                on_path.discard(id(source))
+                yield target_entity
+                root = target_entity
+                continue
+
+            fan_out[0] += 1
+            stats.max_fan_out = max(stats.max_fan_out, fan_out[0])
+            limits.check_fan_out(fan_out[0], mapping_rule.source_context)
+            rel_map, child_context, child_data = child
+            reference = push(child_data, child_context, own_link, rel_map, depth + 1)
+            if reference is not None and ids is not None:
+                yield reference
+        return root
+
+    def _frame_pusher(self, ids: Optional[Iterator[int]], interned: Dict, stats: TraversalStats, on_path: set, stack: List):
+        """
+        _traverse のフレームの push を行う関数を返す。
+
+        返す関数は 1 件の要素を変換してリンクし、展開が必要ならフレームをスタックへ積む。
+        変換済み (インターン済み) の要素は _link_interned でリンクし、その戻り値を返す。
+        """
+        limits, find_mapping, iter_children = self.limits, self.find_mapping, self.iter_children
+        if ids is None:
+            create_target_entity, add_inverse_link = self.create_target_entity, self.add_inverse_link
+        else:
+            create_target_entity = functools.partial(DataTransformationEngine.create_target_entity, self)
+            add_inverse_link = functools.partial(DataTransformationEngine.add_inverse_link, self)
+
+        def push(source: Dict, context: str, link: Any, rel: Optional[RelationshipOp], depth: int):
+            mapping_rule = find_mapping(context)
+            if not mapping_rule:
+                return None
+            limits.check_depth(depth, context)
+
+            # 同一の識別属性値を持つエンティティが変換済みなら、再変換せずに参照を再利用する
+            identity = mapping_rule.identity_of(source)
+            if identity is not None and identity in interned:
+                stats.references += 1
+                return self._link_interned(interned[identity], mapping_rule, rel, link, add_inverse_link, ids is not None)
+            if id(source) in on_path:
+                stats.cycles_skipped += 1
+                return None
+
+            target_entity = create_target_entity(source, mapping_rule)
+            own_link = target_entity
+            if ids is not None:
+                own_link = target_entity['_id'] = next(ids)
+            if identity is not None:
+                interned[identity] = own_link
+            add_inverse_link(target_entity, rel, link)
+
+            stats.entities += 1
+            stats.depth_histogram[depth] += 1
+            on_path.add(id(source))
+            stack.append((source, mapping_rule, target_entity, own_link, iter_children(source, mapping_rule), depth, [0]))
+            return None
+
+        return push
+
+    @staticmethod
+    def _link_interned(existing: Any, mapping_rule: CompiledEntityMapping, rel: Optional[RelationshipOp], link: Any, add_inverse_link, as_reference: bool):
+        """
+        変換済みのエンティティに親からのリンクを追加する。
+
+        as_reference (iter_transform の形式) なら {'_context', '_ref'} の参照行にリンクして返し、
+        そうでなければ変換済みのエンティティ自体にリンクを追加して返す。
+        """
+        if not as_reference:
+            add_inverse_link(existing, rel, link)
+            return existing
+        reference = {'_context': mapping_rule.target_context, '_ref': existing}
+        add_inverse_link(reference, rel, link)
+        return reference
 
 # ==========================================
 # 2. 実行用サンプルデータ (Mock)
@@ -147,7 +360,8 @@ mock_dmp_data = {
 # ==========================================
 # 3. メイン実行ブロック
 # ==========================================
-def main():
+def run_demo():
+    """組み込みのサンプルデータとマッピングで変換を実行し、結果を表示する"""
     # 実際のファイル読み込み（環境に合わせてパスを変更してください）
     # with open('dmp_to_cao_mapping.yaml', 'r', encoding='utf-8') as f:
     #     mapping_def = yaml.safe_load(f)
@@ -229,5 +443,147 @@ entity_mappings:
         print(f"\n[Entity {i+1}]: {entity.get('_context')}")
         print(json.dumps(clean_for_print(entity), indent=2, ensure_ascii=False))
 
+def _non_negative_int(value: str) -> int:
+    """argparse の type: 0 以上の整数"""
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or greater, got {number}")
+    return number
+
+
+def _positive_int(value: str) -> int:
+    """argparse の type: 1 以上の整数"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be 1 or greater, got {number}")
+    return number
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="マッピング定義に従ってソースレコードを変換し、JSON Lines で出力する"
+    )
+    parser.add_argument("inputs", nargs="*", default=[STDIO_PATH],
+                        help="入力ファイル (JSON Lines / 複数ドキュメント YAML)。'-' または省略で標準入力")
+    parser.add_argument("-m", "--mapping", default=DEFAULT_MAPPING_PATH,
+                        help="マッピング定義 YAML のパス")
+    parser.add_argument("-s", "--source-model",
+                        help="ソース側の論理モデル YAML (子要素の context 解決に使用。省略時は既定の対応表)")
+    parser.add_argument("-c", "--root-context", default=DEFAULT_ROOT_CONTEXT,
+                        help="トップレベルレコードの context URI")
+    parser.add_argument("-f", "--input-format", choices=INPUT_FORMATS,
+                        help="入力形式 (省略時は拡張子から推定、標準入力は jsonl)")
+    parser.add_argument("-o", "--output", default=STDIO_PATH,
+                        help="出力先の JSON Lines ファイル。'-' または省略で標準出力")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="検証・コンパイル済みマッピングのキャッシュを使わない")
+    parser.add_argument("--batch-size", type=int, default=256,
+                        help="まとめ書きする行数")
+    parser.add_argument("-j", "--workers", type=_non_negative_int, default=1,
+                        help="並列変換のワーカープロセス数 (1 ならプロセス内で逐次変換、0 なら CPU コア数)")
+    parser.add_argument("--chunk-size", type=_positive_int, default=500,
+                        help="並列変換時に 1 ワーカーへ渡すトップレベルレコード数")
+    parser.add_argument("--unordered", action="store_true",
+                        help="並列変換時、入力順を保たず完了したチャンクから出力する")
+    parser.add_argument("--max-depth", type=int,
+                        help="走査の最大深さ。超えた入力はエラーで終了する")
+    parser.add_argument("--max-fan-out", type=int,
+                        help="1 エンティティあたりの子要素数の上限。超えた入力はエラーで終了する")
+    parser.add_argument("--stats", action="store_true",
+                        help="走査の統計情報 (深さ分布など) を標準エラー出力に表示する")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="規則ごとの計測結果を標準エラー出力に表示し、pstats 形式で PATH に保存する (--workers 1 のみ)")
+    parser.add_argument("--state", metavar="PATH",
+                        help="差分変換の状態ファイル (SQLite)。指定すると内容かマッピングが変わったレコードだけを再変換する (--workers 1 のみ)")
+    parser.add_argument("--record-key", metavar="ATTR",
+                        help="差分変換で前回のレコードと対応付けるトップレベルの属性 (省略時はルートの識別属性、無ければ入力中の位置)")
+    parser.add_argument("--demo", action="store_true",
+                        help="組み込みのサンプルデータで変換を実行して終了する")
+    return parser
+
+
+def _load_for_cli(args: argparse.Namespace):
+    """マッピング定義を読み込む。失敗した場合はエラーを表示して None を返す"""
+    try:
+        loaded = load_mapping(args.mapping, args.source_model, use_cache=not args.no_cache)
+    except (MappingDefinitionError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return None
+    if loaded.plan.get(args.root_context) is None:
+        print(f"Error: No mapping rule found for root context {args.root_context}", file=sys.stderr)
+        return None
+    return loaded
+
+
+def _build_pipeline(args: argparse.Namespace, loaded, stats: TraversalStats):
+    """引数に応じて逐次 / 差分 / 並列の変換を組み立て、(エンティティのイテレータ, 差分変換, プロファイル) を返す"""
+    limits = TraversalLimits(max_depth=args.max_depth, max_fan_out=args.max_fan_out)
+    records = read_all_records(args.inputs, args.input_format)
+    if args.state and args.workers != 1:
+        print("Warning: --state is only supported with --workers 1; converting sequentially", file=sys.stderr)
+    if args.workers == 1 or args.state:
+        engine = DataTransformationEngine(loaded.mapping_def, plan=loaded.plan, limits=limits)
+        incremental = None
+        if args.state:
+            from incremental import IncrementalConverter
+            incremental = IncrementalConverter(engine, args.state, record_key=args.record_key)
+        profile = engine.enable_profiling() if args.profile else None
+        if incremental is not None:
+            entities = incremental.iter_transform(records, args.root_context, stats=stats, encoded=True)
+        else:
+            entities = engine.iter_transform(records, args.root_context, stats=stats)
+        return entities, incremental, profile
+
+    if args.profile:
+        print("Warning: --profile is only supported with --workers 1", file=sys.stderr)
+    from parallel import iter_transform_parallel
+    entities = iter_transform_parallel(
+        loaded.mapping_def, records, args.root_context,
+        workers=args.workers or None, chunk_size=args.chunk_size, ordered=not args.unordered,
+        limits=limits, stats=stats, plan=loaded.plan,
+    )
+    return entities, None, None
+
+
+def _write_entities(args: argparse.Namespace, entities: Iterable) -> Optional[int]:
+    """変換結果を JSON Lines で書き出す。最後まで書き出せなかった場合はその時点の終了コードを返す"""
+    try:
+        with open_text(args.output, "w") as out:
+            writer = JsonlWriter(out, batch_size=args.batch_size)
+            writer.write_all(entities)
+    except BrokenPipeError:
+        # head などの下流が先に終了した場合は正常終了扱い
+        return 0
+    except (RecordFormatError, TraversalLimitError, OSError) as e:
+        # OSError: 入力ファイルが開けない・出力先に書けないなど
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+    if args.demo:
+        run_demo()
+        return 0
+
+    loaded = _load_for_cli(args)
+    if loaded is None:
+        return 1
+    stats = TraversalStats()
+    entities, incremental, profile = _build_pipeline(args, loaded, stats)
+    status = _write_entities(args, entities)
+    if status is not None:
+        return status
+    if args.stats:
+        print(f"Traversal: {stats.summary()}", file=sys.stderr)
+        if incremental is not None:
+            print(f"Incremental: {incremental.stats.summary()}", file=sys.stderr)
+    if profile is not None:
+        print(profile.summary(), file=sys.stderr)
+        profile.dump_stats(args.profile)
+    return 0
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""
+ソースレコードのフィンガープリントによる差分変換 (インクリメンタルモード) を行うモジュール。
+
+状態ファイル (SQLite) にレコードごとの以下の情報を保存し、再実行時には
+レコードの内容か、そのレコードが辿ったエンティティマッピングのどちらかが
+変わったレコードだけを再変換する。変わっていないレコードは保存済みの出力を再利用する。
+- レコードの内容ハッシュ (フィンガープリント)
+- 走査中に参照した source context と、そのコンパイル済みマッピングのハッシュ
+- 変換結果 (JSON Lines)
+
+レコードはキー (--record-key で指定した属性、無ければルートの識別属性、どちらも無ければ入力中の位置) で
+前回の実行と対応付ける。位置をキーにすると途中への挿入・削除で以降のレコードがすべて再変換になる。
+
+出力は常にコーパス全体 (再利用分 + 再変換分) で、今回の入力に無かったレコードは状態ファイルからも削除する。
+再利用した出力を他のレコードと独立に保つため、識別属性による重複排除はレコード単位で行い、
+'_id' はレコードごとに固定で割り当てたブロック (ブロック番号 * ID_BLOCK_SIZE) から採番する。
+"""
+import hashlib
+import itertools
+import json
+import sqlite3
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from converter import ID_BLOCK_SIZE, DataTransformationEngine
+from mapping_plan import MappingPlan
+from record_io import EncodedEntity, RecordFormatError, encode_entity
+from traversal import TraversalStats
+
+# 状態ファイルの形式を変えたら上げる (古い状態ファイルは破棄して全件変換する)
+STATE_VERSION = 2
+# マッピングが無い context のハッシュ (後からマッピングを追加した場合に再変換させるため)
+_NO_MAPPING = "-"
+# 状態ファイルを 1 回の IN クエリで参照するレコード数 (SQLite のパラメータ数上限より小さくする)
+LOOKUP_CHUNK_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS records (
+    record_key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    mapping_digest TEXT NOT NULL,
+    contexts TEXT NOT NULL,
+    id_block INTEGER NOT NULL,
+    output TEXT NOT NULL
+);
+"""
+
+
+@dataclass
+class IncrementalStats:
+    """差分変換の集計 (再変換・再利用・削除したレコード数)"""
+    transformed: int = 0
+    reused: int = 0
+    removed: int = 0
+
+    def summary(self) -> str:
+        return f"transformed={self.transformed} reused={self.reused} removed={self.removed}"
+
+
+def record_fingerprint(record: Dict) -> str:
+    """レコード内容のハッシュ (キーの順序には依存しない)"""
+    encoded = json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def entity_mapping_hashes(plan: MappingPlan) -> Dict[str, str]:
+    """source context -> コンパイル済みエンティティマッピングのハッシュ"""
+    return {
+        context: hashlib.sha256(repr(mapping).encode("utf-8")).hexdigest()
+        for context, mapping in plan.entities.items()
+    }
+
+
+class IncrementalConverter:
+    """
+    状態ファイルを使って、変更のあったレコードだけを engine で再変換するコンバーター。
+
+    engine の find_mapping を、参照した context を記録するものに差し替える
+    (プロファイリングを併用する場合は、差し替え前のプランでハッシュを計算するため先にこのクラスを作ること)。
+    """
+
+    def __init__(self, engine: DataTransformationEngine, state_path: str, record_key: Optional[str] = None):
+        self.engine = engine
+        self.state_path = state_path
+        self.mapping_hashes = entity_mapping_hashes(engine.plan)
+        self.stats = IncrementalStats()
+        self._record_key = record_key
+        self._visited: Set[str] = set()
+        self._digests: Dict[Tuple[str, str], str] = {}
+        find_mapping = engine.find_mapping
+
+        def tracking_find_mapping(context_uri: str):
+            self._visited.add(context_uri)
+            return find_mapping(context_uri)
+
+        engine.find_mapping = tracking_find_mapping
+
+    def _key_of(self, record: Dict, position: int, root_context: str) -> str:
+        attribute = self._record_key
+        if attribute is None:
+            root_mapping = self.engine.plan.get(root_context)
+            attribute = root_mapping.identity_attribute if root_mapping else None
+        if attribute is not None and record.get(attribute) is not None:
+            # 型を含めてエンコードする (整数の 1 と文字列の "1" を別のレコードとして扱う)
+            return json.dumps([attribute, record[attribute]], ensure_ascii=False, sort_keys=True, default=str)
+        if self._record_key is not None:
+            raise RecordFormatError(f"Record #{position} has no key attribute {self._record_key!r}")
+        return f"#{position}"
+
+    def _mapping_digest(self, root_context: str, contexts: str) -> str:
+        """参照した context (JSON 配列の文字列) のマッピングハッシュをまとめたダイジェスト"""
+        cache_key = (root_context, contexts)
+        digest = self._digests.get(cache_key)
+        if digest is None:
+            hasher = hashlib.sha256(root_context.encode("utf-8"))
+            for context in json.loads(contexts):
+                hasher.update(f"\0{context}\0{self.mapping_hashes.get(context, _NO_MAPPING)}".encode("utf-8"))
+            digest = self._digests[cache_key] = hasher.hexdigest()
+        return digest
+
+    def _open_state(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.state_path)
+        connection.executescript(_SCHEMA)
+        row = connection.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+        if row is None or int(row[0]) != STATE_VERSION:
+            connection.execute("DELETE FROM records")
+            connection.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(STATE_VERSION),))
+        connection.execute("CREATE TEMP TABLE seen (record_key TEXT PRIMARY KEY)")
+        return connection
+
+    def _lookup(self, connection: sqlite3.Connection, keys: List[str]) -> Dict[str, Tuple]:
+        placeholders = ", ".join("?" * len(keys))
+        rows = connection.execute(
+            f"SELECT record_key, fingerprint, mapping_digest, contexts, id_block, output FROM records WHERE record_key IN ({placeholders})",
+            keys,
+        )
+        return {row[0]: row[1:] for row in rows}
+
+    def iter_transform(self, records: Iterable[Dict], root_context: str, stats: Optional[TraversalStats] = None, encoded: bool = False) -> Iterator[Union[Dict, EncodedEntity]]:
+        """
+        DataTransformationEngine.iter_transform と同じ形式でコーパス全体の変換結果を yield する。
+
+        encoded=True なら JSON にエンコード済みの EncodedEntity を返す (再利用分はデコード・再エンコードを省ける)。
+        状態ファイルは最後まで出力し終えた時点で 1 トランザクションとしてコミットする
+        (途中で失敗した場合は前回の状態のまま残る)。stats には再変換したレコードの走査統計だけが加算される。
+        """
+        stats = stats if stats is not None else TraversalStats()
+        connection = self._open_state()
+        try:
+            next_block = connection.execute("SELECT COALESCE(MAX(id_block) + 1, 0) FROM records").fetchone()[0]
+            seen: Set[str] = set()
+            positions = itertools.count()
+            # 状態の参照は LOOKUP_CHUNK_SIZE 件ごとに 1 回の IN クエリでまとめて行う
+            for chunk in itertools.batched(records, LOOKUP_CHUNK_SIZE):
+                keyed = []
+                for record in chunk:
+                    position = next(positions)
+                    key = self._key_of(record, position, root_context)
+                    if key in seen:
+                        raise RecordFormatError(f"Duplicate record key {key!r} at record #{position}")
+                    seen.add(key)
+                    keyed.append((key, record))
+                stored_rows = self._lookup(connection, [key for key, _ in keyed])
+                updates = []
+                for key, record in keyed:
+                    fingerprint = record_fingerprint(record)
+                    stored = stored_rows.get(key)
+                    if stored is not None:
+                        old_fingerprint, old_digest, contexts, id_block, output = stored
+                        if old_fingerprint == fingerprint and old_digest == self._mapping_digest(root_context, contexts):
+                            self.stats.reused += 1
+                            lines = output.split("\n") if output else []
+                            if encoded:
+                                yield from map(EncodedEntity, lines)
+                            else:
+                                yield from map(json.loads, lines)
+                            continue
+                    else:
+                        id_block, next_block = next_block, next_block + 1
+
+                    self._visited = set()
+                    entities = list(self.engine.iter_transform([record], root_context, first_id=id_block * ID_BLOCK_SIZE, stats=stats))
+                    lines = [encode_entity(entity) for entity in entities]
+                    contexts = json.dumps(sorted(self._visited))
+                    updates.append((key, fingerprint, self._mapping_digest(root_context, contexts), contexts, id_block, "\n".join(lines)))
+                    self.stats.transformed += 1
+                    yield from lines if encoded else entities
+                connection.executemany("INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?)", updates)
+                connection.executemany("INSERT INTO seen VALUES (?)", ((key,) for key, _ in keyed))
+
+            # 今回の入力に無かったレコードは状態から削除する
+            self.stats.removed = connection.execute(
+                "DELETE FROM records WHERE record_key NOT IN (SELECT record_key FROM seen)"
+            ).rowcount
+            connection.commit()
+        finally:
+            connection.close()
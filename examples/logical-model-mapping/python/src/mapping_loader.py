@@ -0,0 +1,165 @@
+"""
+マッピング定義 YAML の読み込み・スキーマ検証・コンパイル結果のディスクキャッシュを行うモジュール。
+
+- YAML は LibYAML (CSafeLoader) が使える環境ではそちらで解析する
+- mapping_definition_schema.json による検証は初回 (キャッシュ作成時) にだけ行う
+- 検証・コンパイル済みの結果は YAML の隣に pickle で保存し、
+  YAML / スキーマ / ソース論理モデルの内容ハッシュが一致する間は再利用する
+  (jsonschema が無い環境で検証を省略した結果は、jsonschema を入れた後には再利用しない)
+
+キャッシュは自分で生成したローカルファイルのみを読み込む前提 (pickle のため信頼できない場所には置かないこと)。
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import yaml
+
+from context_index import build_context_index
+from mapping_plan import MappingPlan, compile_mapping
+
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+try:
+    import jsonschema
+except ImportError:
+    jsonschema = None
+
+logger = logging.getLogger(__name__)
+
+# キャッシュ形式を変えたら上げる (古いキャッシュは自動的に無効になる)
+CACHE_VERSION = 1
+_CACHE_KEYS = frozenset(("key", "mapping_def", "plan", "source_model"))
+CACHE_SUFFIX = ".plan.pickle"
+DEFAULT_SCHEMA_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "../../schema/mapping_definition_schema.json"
+)
+
+
+class MappingDefinitionError(ValueError):
+    """マッピング定義 (またはソース論理モデル) が YAML として解析できない、またはスキーマに適合しない場合の例外"""
+    pass
+
+
+@dataclass(frozen=True)
+class LoadedMapping:
+    """読み込み結果 (マッピング定義、コンパイル済みプラン、ソース論理モデル、キャッシュから読んだかどうか)"""
+    mapping_def: Dict
+    plan: MappingPlan
+    source_model: Optional[Dict]
+    from_cache: bool
+
+
+def _read_bytes(path: Optional[str]) -> bytes:
+    if not path:
+        return b""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _parse_yaml(content: bytes, source_name: str) -> Dict:
+    try:
+        return yaml.load(content, Loader=YamlLoader)
+    except yaml.YAMLError as e:
+        raise MappingDefinitionError(f"{source_name} is not valid YAML: {e}") from e
+
+
+def validate_mapping(mapping_def: Dict, schema: Dict, source_name: str = "<mapping>") -> None:
+    """マッピング定義を JSON Schema で検証する (jsonschema が無い環境では警告して省略)"""
+    if jsonschema is None:
+        logger.warning("jsonschema is not installed; skipping validation of %s", source_name)
+        return
+    validator_cls = jsonschema.validators.validator_for(schema)
+    errors = sorted(validator_cls(schema).iter_errors(mapping_def), key=lambda e: list(e.absolute_path))
+    if errors:
+        details = "; ".join(
+            f"{'/'.join(str(p) for p in error.absolute_path) or '<root>'}: {error.message}"
+            for error in errors
+        )
+        raise MappingDefinitionError(f"{source_name} does not match the mapping schema: {details}")
+
+
+def cache_path_for(mapping_path: str) -> str:
+    return mapping_path + CACHE_SUFFIX
+
+
+def _load_cache(path: str, key: str) -> Optional[Dict]:
+    try:
+        with open(path, "rb") as f:
+            cached = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+        logger.warning("Ignoring unreadable mapping cache %s: %s", path, e)
+        return None
+    if not isinstance(cached, dict) or not _CACHE_KEYS <= cached.keys():
+        # 同名の別ファイルや古い形式のキャッシュ
+        logger.warning("Ignoring mapping cache %s with an unexpected format", path)
+        return None
+    return cached if cached["key"] == key else None
+
+
+def _save_cache(path: str, payload: Dict) -> None:
+    """一時ファイルに書いてから置き換える (並行実行中のプロセスが壊れたキャッシュを読まないように)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    except OSError as e:
+        logger.warning("Could not write mapping cache %s: %s", path, e)
+        return
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("Could not write mapping cache %s: %s", path, e)
+        os.unlink(tmp_path)
+
+
+def load_mapping(
+    mapping_path: str,
+    source_model_path: Optional[str] = None,
+    schema_path: str = DEFAULT_SCHEMA_PATH,
+    use_cache: bool = True,
+) -> LoadedMapping:
+    """マッピング定義を読み込み、検証・コンパイルした結果を返す (キャッシュがあればそれを使う)"""
+    mapping_bytes = _read_bytes(mapping_path)
+    schema_bytes = _read_bytes(schema_path)
+    model_bytes = _read_bytes(source_model_path)
+
+    # jsonschema の有無もキーに含め、検証を省略して作ったキャッシュを検証可能な環境で再利用しないようにする
+    validator = b"jsonschema" if jsonschema is not None else b"unvalidated"
+    digest = hashlib.sha256()
+    for part in (str(CACHE_VERSION).encode(), validator, mapping_bytes, schema_bytes, model_bytes):
+        digest.update(hashlib.sha256(part).digest())
+    key = digest.hexdigest()
+
+    cache_path = cache_path_for(mapping_path)
+    if use_cache:
+        cached = _load_cache(cache_path, key)
+        if cached is not None:
+            return LoadedMapping(cached["mapping_def"], cached["plan"], cached["source_model"], from_cache=True)
+
+    mapping_def = _parse_yaml(mapping_bytes, mapping_path)
+    if schema_bytes:
+        validate_mapping(mapping_def, json.loads(schema_bytes), source_name=mapping_path)
+    source_model = _parse_yaml(model_bytes, source_model_path) if model_bytes else None
+    context_index = build_context_index(source_model, mapping_def) if source_model else None
+    plan = compile_mapping(mapping_def, context_index)
+
+    if use_cache:
+        _save_cache(cache_path, {
+            "key": key,
+            "mapping_def": mapping_def,
+            "plan": plan,
+            "source_model": source_model,
+        })
+    return LoadedMapping(mapping_def, plan, source_model, from_cache=False)
@@ -0,0 +1,214 @@
+"""
+マッピング定義 (mapping_definition_schema.json 準拠の dict) を、
+レコード単位で繰り返し実行できる「実行プラン」へ事前コンパイルするモジュール。
+
+コンパイル時に以下を一度だけ解決しておくことで、レコードごとの
+dict 参照・ルール種別の分岐・パス文字列の split を省く。
+- ルール種別 (rule) -> 種別ごとの AttributeOp サブクラス
+- target_path / target_attribute -> 分割済みのキー列
+- value_map -> コンパイル時にコピーした読み取り専用の変換表
+- direction -> bool フラグ
+- 子要素の context -> context インデックス (context_index.py) から解決済みの URI
+
+プランは dataclass のみで構成しており、pickle 可能 (ワーカープロセスへの受け渡し用)。
+"""
+import logging
+from dataclasses import dataclass
+from typing import Any, ClassVar, Dict, List, Optional, Tuple
+
+from context_index import ContextIndex, default_context_index
+
+logger = logging.getLogger(__name__)
+
+# ソースに属性が存在しないことを表す番兵 (列指向の変換でも欠損値として使う)
+MISSING = _MISSING = object()
+
+
+# ==========================================
+# 1. 属性オペレーション
+# ==========================================
+@dataclass(frozen=True, slots=True)
+class AttributeOp:
+    """direct_copy: ソースの値をそのままターゲットへコピーする"""
+    rule: ClassVar[str] = 'direct_copy'
+    source_attribute: str
+    parent_keys: Tuple[str, ...]
+    leaf_key: str
+
+    def resolve(self, value: Any) -> Any:
+        return value
+
+    def resolve_column(self, values: List[Any]) -> List[Any]:
+        """列全体に規則を適用する (欠損値 MISSING はそのまま残す)。direct_copy は列をそのまま再利用する"""
+        return values
+
+    def apply(self, source_data: Dict, target_data: Dict) -> None:
+        value = source_data.get(self.source_attribute, _MISSING)
+        if value is _MISSING:
+            return
+        current = target_data
+        for key in self.parent_keys:
+            if key not in current:
+                current[key] = {}
+            current = current[key]
+        current[self.leaf_key] = self.resolve(value)
+
+
+@dataclass(frozen=True, slots=True)
+class StaticValueOp(AttributeOp):
+    """static_value: ソースに属性が存在する場合に固定値をセットする"""
+    rule: ClassVar[str] = 'static_value'
+    static_value: Any
+
+    def resolve(self, value: Any) -> Any:
+        return self.static_value
+
+    def resolve_column(self, values: List[Any]) -> List[Any]:
+        if _MISSING not in values:
+            return [self.static_value] * len(values)
+        return [_MISSING if value is _MISSING else self.static_value for value in values]
+
+
+@dataclass(frozen=True, slots=True)
+class MapValuesOp(AttributeOp):
+    """map_values: 変換表で値を置き換える (マッチしなければ元の値)"""
+    rule: ClassVar[str] = 'map_values'
+    value_map: Dict[Any, Any]
+
+    def resolve(self, value: Any) -> Any:
+        return self.value_map.get(value, value)
+
+    def resolve_column(self, values: List[Any]) -> List[Any]:
+        # map() で dict.get を C レベルで回す (MISSING は変換表に無いのでそのまま残る)
+        return list(map(self.value_map.get, values, values))
+
+
+# ==========================================
+# 2. エンティティ / リレーションシップ単位のプラン
+# ==========================================
+@dataclass(frozen=True, slots=True)
+class RelationshipOp:
+    """リレーションシップマッピング 1 件分のコンパイル結果"""
+    source_relationship: str
+    target_relationship: str
+    inverse: bool
+    child_context: str
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledEntityMapping:
+    """エンティティマッピング 1 件分のコンパイル結果"""
+    source_context: str
+    target_context: str
+    attributes: Tuple[AttributeOp, ...]
+    relationships: Tuple[RelationshipOp, ...]
+    identity_attribute: Optional[str] = None
+
+    def identity_of(self, source_data: Dict) -> Optional[Tuple[str, Any]]:
+        """重複排除 (インターン) 用のキー (source context, 識別属性の値) を返す。対象外なら None"""
+        if self.identity_attribute is None:
+            return None
+        value = source_data.get(self.identity_attribute)
+        if value is None:
+            return None
+        return self.source_context, value
+
+    def apply_attributes(self, source_data: Dict, target_data: Dict) -> None:
+        """コンパイル済みの属性オペレーションを順に適用する"""
+        for op in self.attributes:
+            op.apply(source_data, target_data)
+
+
+@dataclass(frozen=True, slots=True)
+class MappingPlan:
+    """マッピング定義全体のコンパイル結果 (source context -> エンティティプラン)"""
+    mapping_id: Optional[str]
+    entities: Dict[str, CompiledEntityMapping]
+
+    def get(self, context_uri: str) -> Optional[CompiledEntityMapping]:
+        return self.entities.get(context_uri)
+
+
+# ==========================================
+# 3. コンパイラ
+# ==========================================
+def compile_attribute(attr_map: Dict) -> Optional[AttributeOp]:
+    """属性マッピング 1 件を AttributeOp に変換する。出力しないルールは None を返す"""
+    rule_type = attr_map.get('rule', 'direct_copy')
+    if rule_type == 'ignore':
+        return None
+
+    # target_path が優先 (apply_attribute_mapping と同じ解決順)
+    if 'target_path' in attr_map:
+        keys = tuple(attr_map['target_path'].split('.'))
+    elif 'target_attribute' in attr_map:
+        keys = (attr_map['target_attribute'],)
+    else:
+        return None
+
+    common = {
+        'source_attribute': attr_map['source_attribute'],
+        'parent_keys': keys[:-1],
+        'leaf_key': keys[-1],
+    }
+    if rule_type == 'static_value':
+        return StaticValueOp(static_value=attr_map['static_value'], **common)
+    if rule_type == 'map_values':
+        return MapValuesOp(value_map=dict(attr_map.get('value_map') or {}), **common)
+    return AttributeOp(**common)
+
+
+def compile_relationship(rel_map: Dict, source_context: str, context_index: ContextIndex) -> Optional[RelationshipOp]:
+    """リレーションシップマッピング 1 件を RelationshipOp に変換する。子の context が解決できなければ None を返す"""
+    src_rel = rel_map['source_relationship']
+    child_context = context_index.get((source_context, src_rel))
+    if not child_context:
+        logger.warning("Cannot resolve child context for %s -> %s; relationship is skipped", source_context, src_rel)
+        return None
+    return RelationshipOp(
+        source_relationship=src_rel,
+        target_relationship=rel_map['target_relationship'],
+        inverse=rel_map.get('direction') == 'inverse',
+        child_context=child_context,
+    )
+
+
+def compile_entity_mapping(entity_map: Dict, context_index: ContextIndex, identity_attribute: Optional[str] = None) -> CompiledEntityMapping:
+    """エンティティマッピング 1 件をコンパイルする (identity_attribute は定義中の値を上書きする)"""
+    source_context = entity_map['source_selector']['context']
+    attributes = tuple(
+        op for op in map(compile_attribute, entity_map.get('attribute_mappings', []))
+        if op is not None
+    )
+    relationships = tuple(
+        op for op in (
+            compile_relationship(rel_map, source_context, context_index)
+            for rel_map in entity_map.get('relationship_mappings', [])
+        )
+        if op is not None
+    )
+    return CompiledEntityMapping(
+        source_context=source_context,
+        target_context=entity_map['target_selector']['context'],
+        attributes=attributes,
+        relationships=relationships,
+        identity_attribute=identity_attribute or entity_map.get('identity_attribute'),
+    )
+
+
+def compile_mapping(mapping_def: Dict, context_index: Optional[ContextIndex] = None, identity_attributes: Optional[Dict[str, str]] = None) -> MappingPlan:
+    """
+    マッピング定義全体を MappingPlan にコンパイルする。
+
+    context_index を省略した場合は DEFAULT_CHILD_CONTEXTS による既定のインデックスを使う。
+    identity_attributes (source context -> 識別属性名) はマッピング定義の identity_attribute より優先する。
+    """
+    if context_index is None:
+        context_index = default_context_index(mapping_def)
+    identity_attributes = identity_attributes or {}
+    entities = {}
+    for entity_map in mapping_def['entity_mappings']:
+        source_context = entity_map['source_selector']['context']
+        compiled = compile_entity_mapping(entity_map, context_index, identity_attributes.get(source_context))
+        entities[compiled.source_context] = compiled
+    return MappingPlan(mapping_id=mapping_def.get('mapping_id'), entities=entities)
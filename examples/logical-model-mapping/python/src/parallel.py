@@ -0,0 +1,92 @@
+"""
+トップレベルレコードをチャンクに分割し、プロセスプールで並列に変換するモジュール。
+
+各ワーカーはプール起動時に一度だけエンジン (コンパイル済みプラン) を構築し、
+以降はチャンク単位でレコードを受け取って変換結果のリストを返す。
+投入中のチャンク数は workers * MAX_PENDING_PER_WORKER に制限しているため、
+入力がストリームでもすべてを先読みすることはない。
+
+'_id' はチャンク番号 * ID_BLOCK_SIZE から採番するため、並列実行時も一意だが連番にはならない。
+"""
+import itertools
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from context_index import build_context_index
+from converter import ID_BLOCK_SIZE, DataTransformationEngine
+from mapping_plan import MappingPlan, compile_mapping
+from traversal import TraversalLimits, TraversalStats
+
+MAX_PENDING_PER_WORKER = 2
+
+_worker_engine: Optional[DataTransformationEngine] = None
+
+
+def _init_worker(mapping_def: Dict, plan: MappingPlan, limits: Optional[TraversalLimits]) -> None:
+    """ワーカープロセスの初期化 (プロセスごとに 1 回だけ呼ばれる)"""
+    global _worker_engine
+    _worker_engine = DataTransformationEngine(mapping_def, plan=plan, limits=limits)
+
+
+def _transform_chunk(chunk_index: int, records: Tuple[Dict, ...], root_context: str) -> Tuple[List[Dict], TraversalStats]:
+    first_id = chunk_index * ID_BLOCK_SIZE
+    stats = TraversalStats()
+    entities = list(_worker_engine.iter_transform(records, root_context, first_id=first_id, stats=stats))
+    return entities, stats
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def iter_transform_parallel(
+    mapping_def: Dict,
+    records: Iterable[Dict],
+    root_context: str,
+    workers: Optional[int] = None,
+    chunk_size: int = 500,
+    ordered: bool = True,
+    source_model: Optional[Dict] = None,
+    limits: Optional[TraversalLimits] = None,
+    stats: Optional[TraversalStats] = None,
+    plan: Optional[MappingPlan] = None,
+) -> Iterator[Dict]:
+    """
+    records を chunk_size 件ごとに分割してワーカーへ配り、変換結果を順次 yield する。
+
+    ordered=True なら入力順 (チャンク順) で、False なら完了したチャンクから順に返す。
+    source_model と limits は DataTransformationEngine と同じ意味で、
+    stats を渡すとチャンクごとの走査統計が合算される。
+    plan (mapping_loader で読み込んだコンパイル済みプラン等) を渡した場合はコンパイルを省略する。
+    """
+    workers = workers or default_workers()
+    if plan is None:
+        context_index = build_context_index(source_model, mapping_def) if source_model else None
+        plan = compile_mapping(mapping_def, context_index)
+    chunks = enumerate(itertools.batched(records, chunk_size))
+    max_pending = workers * MAX_PENDING_PER_WORKER
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(mapping_def, plan, limits)) as executor:
+        def submit(chunk: Tuple[int, Tuple[Dict, ...]]) -> Future:
+            chunk_index, chunk_records = chunk
+            return executor.submit(_transform_chunk, chunk_index, chunk_records, root_context)
+
+        pending = deque(map(submit, itertools.islice(chunks, max_pending)))
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                done = [future for future in pending if future in finished]
+                for future in done:
+                    pending.remove(future)
+
+            for future in done:
+                entities, chunk_stats = future.result()
+                if stats is not None:
+                    stats.merge(chunk_stats)
+                yield from entities
+                # 完了した分だけ次のチャンクを投入する
+                pending.extend(map(submit, itertools.islice(chunks, 1)))
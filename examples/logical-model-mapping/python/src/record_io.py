@@ -0,0 +1,131 @@
+"""
+ソースレコードの逐次読み込みと、変換結果の JSON Lines 書き出しを行うモジュール。
+
+入力は JSON Lines (1 行 1 レコード) または複数ドキュメントの YAML ストリーム
+(--- 区切り) に対応し、どちらもファイル全体をメモリに載せずに 1 件ずつ返す。
+"""
+import json
+import sys
+from contextlib import contextmanager
+from collections.abc import Mapping
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+STDIO_PATH = "-"
+INPUT_FORMATS = ("jsonl", "yaml")
+_YAML_SUFFIXES = (".yaml", ".yml")
+
+
+class RecordFormatError(ValueError):
+    """入力レコードが解析できない場合の例外"""
+    pass
+
+
+def detect_format(path: str) -> str:
+    """拡張子から入力形式を推定する (標準入力と不明な拡張子は jsonl)"""
+    if path != STDIO_PATH and path.lower().endswith(_YAML_SUFFIXES):
+        return "yaml"
+    return "jsonl"
+
+
+def _check_record(record: Any, location: str) -> Dict:
+    """トップレベルのレコードはオブジェクト (mapping) でなければならない"""
+    if not isinstance(record, Mapping):
+        raise RecordFormatError(f"{location}: record must be an object, got {type(record).__name__}")
+    return record
+
+
+def iter_jsonl(stream: IO[str], source_name: str = "<stream>") -> Iterator[Dict]:
+    """JSON Lines を 1 行ずつ解析して返す (空行は読み飛ばす)"""
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise RecordFormatError(f"{source_name}:{line_no}: invalid JSON: {e}") from e
+        yield _check_record(record, f"{source_name}:{line_no}")
+
+
+def iter_yaml_documents(stream: IO[str], source_name: str = "<stream>") -> Iterator[Dict]:
+    """YAML ストリームをドキュメント単位で解析して返す (空ドキュメントは読み飛ばす)"""
+    try:
+        for document_no, document in enumerate(yaml.load_all(stream, Loader=YamlLoader), start=1):
+            if document is not None:
+                yield _check_record(document, f"{source_name}: document {document_no}")
+    except yaml.YAMLError as e:
+        raise RecordFormatError(f"{source_name}: invalid YAML: {e}") from e
+
+
+@contextmanager
+def open_text(path: str, mode: str = "r"):
+    """'-' を標準入出力として扱う open"""
+    if path == STDIO_PATH:
+        yield sys.stdin if "r" in mode else sys.stdout
+        return
+    with open(path, mode, encoding="utf-8") as f:
+        yield f
+
+
+def read_records(path: str, input_format: Optional[str] = None) -> Iterator[Dict]:
+    """1 つの入力 (ファイルまたは '-') からレコードを逐次読み込む"""
+    input_format = input_format or detect_format(path)
+    source_name = "<stdin>" if path == STDIO_PATH else path
+    with open_text(path) as stream:
+        if input_format == "yaml":
+            yield from iter_yaml_documents(stream, source_name)
+        else:
+            yield from iter_jsonl(stream, source_name)
+
+
+def read_all_records(paths: Iterable[str], input_format: Optional[str] = None) -> Iterator[Dict]:
+    """複数の入力を順に連結して 1 本のレコードストリームとして返す"""
+    for path in paths:
+        yield from read_records(path, input_format)
+
+
+class EncodedEntity(str):
+    """JSON にエンコード済みのエンティティ 1 件 (JsonlWriter はそのまま 1 行として書き出す)"""
+    __slots__ = ()
+
+
+def encode_entity(entity: Dict) -> EncodedEntity:
+    return EncodedEntity(json.dumps(entity, ensure_ascii=False, separators=(",", ":")))
+
+
+class JsonlWriter:
+    """エンティティ (dict または EncodedEntity) を JSON Lines としてまとめ書きするライター"""
+
+    def __init__(self, stream: IO[str], batch_size: int = 256):
+        self.stream = stream
+        self.batch_size = batch_size
+        self.count = 0
+        self._buffer: List[str] = []
+
+    def write(self, entity: Dict) -> None:
+        self._buffer.append(entity if isinstance(entity, EncodedEntity) else encode_entity(entity))
+        self.count += 1
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def write_all(self, entities: Iterable[Dict]) -> int:
+        """全エンティティを書き出す (途中で例外が起きても書き出し済み分はフラッシュする)"""
+        try:
+            for entity in entities:
+                self.write(entity)
+        finally:
+            self.flush()
+        return self.count
+
+    def flush(self) -> None:
+        """バッファ内の行を 1 回の write で書き出し、下流へ即座に流す"""
+        if self._buffer:
+            self.stream.write("\n".join(self._buffer) + "\n")
+            self._buffer.clear()
+        self.stream.flush()
@@ -0,0 +1,61 @@
+"""
+エンティティグラフ走査の上限設定と統計情報。
+
+DataTransformationEngine は再帰呼び出しではなく明示的なスタックで走査するため、
+Python の再帰上限に依存しない。深さ・ファンアウトの上限を超えた入力は
+TraversalLimitError で即座に失敗させ、循環参照 (祖先と同一のオブジェクト) は
+展開せずに読み飛ばして件数を記録する。
+"""
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+class TraversalLimitError(RuntimeError):
+    """走査が深さ・ファンアウトの上限を超えた場合の例外"""
+    pass
+
+
+@dataclass(frozen=True)
+class TraversalLimits:
+    """走査の上限 (None は無制限)"""
+    max_depth: Optional[int] = None
+    max_fan_out: Optional[int] = None
+
+    def check_depth(self, depth: int, context_uri: str) -> None:
+        if self.max_depth is not None and depth > self.max_depth:
+            raise TraversalLimitError(f"Max depth {self.max_depth} exceeded at {context_uri}")
+
+    def check_fan_out(self, fan_out: int, context_uri: str) -> None:
+        if self.max_fan_out is not None and fan_out > self.max_fan_out:
+            raise TraversalLimitError(f"Max fan-out {self.max_fan_out} exceeded under {context_uri}")
+
+
+@dataclass
+class TraversalStats:
+    """走査の統計情報 (生成エンティティ数・参照行数・循環検出数・深さ分布)"""
+    entities: int = 0
+    references: int = 0
+    cycles_skipped: int = 0
+    max_fan_out: int = 0
+    depth_histogram: Counter = field(default_factory=Counter)
+
+    @property
+    def max_depth(self) -> int:
+        return max(self.depth_histogram, default=0)
+
+    def merge(self, other: "TraversalStats") -> None:
+        """別の統計 (並列変換のチャンク単位など) を合算する"""
+        self.entities += other.entities
+        self.references += other.references
+        self.cycles_skipped += other.cycles_skipped
+        self.max_fan_out = max(self.max_fan_out, other.max_fan_out)
+        self.depth_histogram.update(other.depth_histogram)
+
+    def summary(self) -> str:
+        depths = ", ".join(f"{depth}:{count}" for depth, count in sorted(self.depth_histogram.items()))
+        return (
+            f"entities={self.entities} references={self.references} "
+            f"cycles_skipped={self.cycles_skipped} max_depth={self.max_depth} "
+            f"max_fan_out={self.max_fan_out} depth_histogram={{{depths}}}"
+        )
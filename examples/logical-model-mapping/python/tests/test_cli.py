@@ -0,0 +1,70 @@
+import io
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from converter import main
+from record_io import RecordFormatError, iter_jsonl, iter_yaml_documents
+
+
+@pytest.fixture
+def records_file(tmp_path):
+    path = tmp_path / "records.jsonl"
+    path.write_text(json.dumps({"project_number": "JP1", "has_datasets": [{"dataset_no": 1}]}) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def test_main_writes_only_entities_to_stdout(records_file, capsys):
+    assert main([records_file, "--no-cache"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)["_context"] for line in lines] == ["http://schema.org/Dataset", "http://schema.org/ResearchProject"]
+
+
+def test_unknown_root_context_fails_without_polluting_stdout(records_file, capsys):
+    assert main([records_file, "--no-cache", "-c", "http://x/Unknown"]) == 1
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "http://x/Unknown" in captured.err
+
+
+@pytest.mark.parametrize("option", ["input", "mapping"])
+def test_missing_files_are_reported_as_errors(records_file, tmp_path, option, capsys):
+    missing = str(tmp_path / "missing.yaml")
+    argv = [missing] if option == "input" else [records_file, "-m", missing]
+    assert main(argv + ["--no-cache"]) == 1
+    assert "missing.yaml" in capsys.readouterr().err
+
+
+def test_mapping_yaml_syntax_error_is_reported(records_file, tmp_path, capsys):
+    bad = tmp_path / "bad.yaml"
+    bad.write_text("entity_mappings: [\n  - {", encoding="utf-8")
+    assert main([records_file, "-m", str(bad), "--no-cache"]) == 1
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "bad.yaml is not valid YAML" in captured.err
+
+
+def test_non_object_records_are_rejected(tmp_path, capsys):
+    path = tmp_path / "bad.jsonl"
+    path.write_text('"str"\n', encoding="utf-8")
+    assert main([str(path), "--no-cache", "-c", "http://schema.org/Dataset"]) == 1
+    assert "record must be an object" in capsys.readouterr().err
+
+    with pytest.raises(RecordFormatError, match="<stream>:2"):
+        list(iter_jsonl(io.StringIO('{"a": 1}\n[1, 2]\n')))
+    with pytest.raises(RecordFormatError, match="document 2"):
+        list(iter_yaml_documents(io.StringIO("a: 1\n---\n- 1\n")))
+
+
+@pytest.mark.parametrize("option", [["-j", "-1"], ["--chunk-size", "0"], ["-j", "x"]])
+def test_invalid_worker_options_are_usage_errors(records_file, option, capsys):
+    with pytest.raises(SystemExit) as exc:
+        main([records_file, "--no-cache", *option])
+    assert exc.value.code == 2
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert option[0] in captured.err
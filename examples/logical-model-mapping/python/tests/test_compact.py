@@ -0,0 +1,78 @@
+import os
+import sys
+
+import pytest
+import yaml
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from compact import CompactEntity, CompactTransformationEngine
+from converter import DEFAULT_MAPPING_PATH, DEFAULT_ROOT_CONTEXT, DataTransformationEngine, mock_dmp_data
+
+PERSON = "http://schema.org/Person"
+
+
+@pytest.fixture(scope="module")
+def mapping_def():
+    with open(DEFAULT_MAPPING_PATH, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+def _records():
+    shared = {"contributor_id": "P001", "name": "山田 太郎"}
+    project = {
+        "project_number": "JP2",
+        "has_datasets": [
+            {"dataset_no": 1, "title": "a", "access_policy": "共有", "collected_by": shared},
+            {"dataset_no": 2, "title": "b", "collected_by": dict(shared)},
+            {"dataset_no": 3, "title": "c", "collected_by": {"contributor_id": "P009", "name": "x"}},
+        ],
+    }
+    return [mock_dmp_data, project]
+
+
+def _merge_references(entities):
+    """iter_transform の参照行を、参照先エンティティの逆参照リンク (リスト) にまとめる"""
+    by_id = {entity["_id"]: dict(entity) for entity in entities if "_id" in entity}
+    for entity in entities:
+        if "_ref" not in entity:
+            continue
+        target = by_id[entity["_ref"]]
+        for name, value in entity.items():
+            if name in ("_context", "_ref"):
+                continue
+            current = target[name]
+            target[name] = (current if isinstance(current, list) else [current]) + [value]
+    return [by_id[key] for key in sorted(by_id)]
+
+
+def test_iter_dicts_matches_the_dict_engine_output(mapping_def):
+    records = _records()
+    compact = CompactTransformationEngine(mapping_def)
+    for record in records:
+        compact.process_entity(record, DEFAULT_ROOT_CONTEXT)
+
+    # The dict engine numbers entities in creation order across records, like the table handles
+    streamed = list(DataTransformationEngine(mapping_def).iter_transform(records, DEFAULT_ROOT_CONTEXT))
+    assert list(compact.table.iter_dicts()) == _merge_references(streamed)
+
+    persons = [entity for entity in compact.table.iter_dicts() if entity["_context"] == PERSON]
+    # 山田 太郎 is interned across both projects and linked from all three of his datasets
+    assert [person["person_id"] for person in persons] == ["P001", "P002", "P009"]
+    assert len(persons[0]["created_datasets"]) == 3
+
+
+def test_process_entity_keeps_no_dict_results(mapping_def):
+    engine = CompactTransformationEngine(mapping_def)
+    root = engine.process_entity(mock_dmp_data, DEFAULT_ROOT_CONTEXT)
+    assert isinstance(root, CompactEntity)
+    assert engine.results == []
+    assert len(engine.table) == 5
+    assert not hasattr(root, "__dict__")
+
+
+def test_iter_transform_is_inherited_and_streams_dicts(mapping_def):
+    compact = CompactTransformationEngine(mapping_def)
+    expected = list(DataTransformationEngine(mapping_def).iter_transform(_records(), DEFAULT_ROOT_CONTEXT))
+    assert list(compact.iter_transform(_records(), DEFAULT_ROOT_CONTEXT)) == expected
+    assert len(compact.table) == 0
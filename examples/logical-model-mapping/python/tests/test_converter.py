@@ -0,0 +1,145 @@
+import copy
+import os
+import sys
+
+import pytest
+import yaml
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from converter import DEFAULT_MAPPING_PATH, DEFAULT_ROOT_CONTEXT, DataTransformationEngine, mock_dmp_data
+from mapping_plan import compile_mapping
+from traversal import TraversalLimitError, TraversalLimits, TraversalStats
+
+PERSON = "http://schema.org/Person"
+DATASET = "http://schema.org/Dataset"
+
+
+@pytest.fixture(scope="module")
+def mapping_def():
+    with open(DEFAULT_MAPPING_PATH, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+def _project(*people):
+    return {
+        "project_number": "JP1",
+        "has_datasets": [
+            {"dataset_no": n, "title": f"d{n}", "access_policy": "公開", "collected_by": person}
+            for n, person in enumerate(people, start=1)
+        ],
+    }
+
+
+def test_iter_transform_emits_children_before_parents_with_id_links(mapping_def):
+    engine = DataTransformationEngine(mapping_def)
+    entities = list(engine.iter_transform([mock_dmp_data], DEFAULT_ROOT_CONTEXT))
+
+    assert entities == [
+        {"_context": PERSON, "name": "山田 太郎", "person_id": "P001", "_id": 2, "created_datasets": 1},
+        {"_context": DATASET, "data_name": "意識調査アンケート生データ 2024", "data_no": 1,
+         "has_access_right": {"access_type": "非公開"}, "_id": 1, "belongs_to_project": 0},
+        {"_context": PERSON, "name": "鈴木 花子", "person_id": "P002", "_id": 4, "created_datasets": 3},
+        {"_context": DATASET, "data_name": "集計用Pythonスクリプト", "data_no": 2,
+         "has_access_right": {"access_type": "公開"}, "_id": 3, "belongs_to_project": 0},
+        {"_context": DEFAULT_ROOT_CONTEXT, "_id": 0},
+    ]
+    # iter_transform はエンジンに結果を蓄積しない
+    assert engine.results == []
+
+
+def test_iter_transform_numbers_ids_across_records_from_first_id(mapping_def):
+    engine = DataTransformationEngine(mapping_def)
+    entities = list(engine.iter_transform([mock_dmp_data, mock_dmp_data], DEFAULT_ROOT_CONTEXT, first_id=100))
+
+    # 2 件目のレコードの Person は識別属性 (contributor_id) で重複排除され、参照行になる
+    assert [(entity.get("_id"), entity.get("_ref")) for entity in entities] == [
+        (102, None), (101, None), (104, None), (103, None), (100, None),
+        (None, 102), (106, None), (None, 104), (107, None), (105, None),
+    ]
+    assert entities[5]["created_datasets"] == 106
+
+
+def test_process_entity_links_parent_entities(mapping_def):
+    engine = DataTransformationEngine(mapping_def)
+    root = engine.process_entity(mock_dmp_data, DEFAULT_ROOT_CONTEXT)
+
+    assert [entity["_context"] for entity in engine.results] == [PERSON, DATASET, PERSON, DATASET, DEFAULT_ROOT_CONTEXT]
+    assert engine.results[-1] is root
+    assert engine.results[1]["belongs_to_project"] is root
+    assert engine.results[0]["created_datasets"] is engine.results[1]
+
+
+def test_deprecated_parent_rel_map_still_links_the_parent(mapping_def):
+    engine = DataTransformationEngine(mapping_def)
+    parent = {"_context": DEFAULT_ROOT_CONTEXT}
+    rel_map = {"source_relationship": "has_datasets", "target_relationship": "belongs_to_project", "direction": "inverse"}
+    with pytest.warns(DeprecationWarning, match="parent_rel_map"):
+        dataset = engine.process_entity(mock_dmp_data["has_datasets"][0], DATASET, parent_ref=parent, parent_rel_map=rel_map)
+    assert dataset["belongs_to_project"] is parent
+
+
+def test_compiled_plan_matches_apply_attribute_mapping():
+    rules = [
+        {"source_attribute": "a", "target_attribute": "a"},
+        {"source_attribute": "b", "target_path": "x.y.b", "target_attribute": "ignored"},
+        {"source_attribute": "c", "target_attribute": "c", "rule": "static_value", "static_value": "fixed"},
+        {"source_attribute": "d", "target_attribute": "d", "rule": "map_values", "value_map": {"1": "one"}},
+        {"source_attribute": "e", "target_attribute": "e", "rule": "ignore"},
+        {"source_attribute": "a", "target_path": "x.a"},
+    ]
+    mapping_def = {"entity_mappings": [{
+        "source_selector": {"context": "urn:src"},
+        "target_selector": {"context": "urn:dst"},
+        "attribute_mappings": rules,
+    }]}
+    engine = DataTransformationEngine(mapping_def)
+    compiled = compile_mapping(mapping_def).get("urn:src")
+    sources = [
+        {"a": 1, "b": 2, "c": 3, "d": "1", "e": 5},
+        {"a": None, "d": "2"},
+        {"b": [1, 2], "c": None},
+        {},
+    ]
+    for source in sources:
+        expected, actual = {}, {}
+        engine.apply_attribute_mapping(source, expected, rules)
+        compiled.apply_attributes(source, actual)
+        assert actual == expected
+
+
+def test_identity_interning_emits_reference_rows(mapping_def):
+    engine = DataTransformationEngine(mapping_def, identity_attributes={PERSON: "contributor_id"})
+    person = {"contributor_id": "P001", "name": "山田 太郎"}
+    stats = TraversalStats()
+    entities = list(engine.iter_transform([_project(person, dict(person))], DEFAULT_ROOT_CONTEXT, stats=stats))
+
+    persons = [entity for entity in entities if entity["_context"] == PERSON]
+    assert persons == [
+        {"_context": PERSON, "name": "山田 太郎", "person_id": "P001", "_id": 2, "created_datasets": 1},
+        {"_context": PERSON, "_ref": 2, "created_datasets": 3},
+    ]
+    assert stats.entities == 4 and stats.references == 1
+
+
+def test_identity_interning_in_process_entity_collects_links(mapping_def):
+    engine = DataTransformationEngine(mapping_def, identity_attributes={PERSON: "contributor_id"})
+    person = {"contributor_id": "P001", "name": "山田 太郎"}
+    engine.process_entity(_project(person, copy.deepcopy(person)), DEFAULT_ROOT_CONTEXT)
+
+    persons = [entity for entity in engine.results if entity["_context"] == PERSON]
+    datasets = [entity for entity in engine.results if entity["_context"] == DATASET]
+    assert len(persons) == 1
+    assert persons[0]["created_datasets"] == datasets
+    assert persons[0]["created_datasets"][0] is datasets[0]
+
+
+def test_cycles_are_skipped_and_limits_enforced(mapping_def):
+    dataset = {"dataset_no": 1, "title": "d1"}
+    project = {"project_number": "JP1", "has_datasets": [dataset]}
+    engine = DataTransformationEngine(mapping_def)
+    assert len(list(engine.iter_transform([project], DEFAULT_ROOT_CONTEXT))) == 2
+
+    limited = DataTransformationEngine(mapping_def, limits=TraversalLimits(max_fan_out=1))
+    with pytest.raises(TraversalLimitError):
+        list(limited.iter_transform([_project({"contributor_id": "P1"}, {"contributor_id": "P2"})], DEFAULT_ROOT_CONTEXT))
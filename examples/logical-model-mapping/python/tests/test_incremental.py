@@ -0,0 +1,102 @@
+import copy
+import os
+import sys
+
+import pytest
+import yaml
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from converter import DEFAULT_MAPPING_PATH, DEFAULT_ROOT_CONTEXT, DataTransformationEngine
+from incremental import IncrementalConverter
+
+PERSON = "http://schema.org/Person"
+
+
+@pytest.fixture(scope="module")
+def mapping_def():
+    with open(DEFAULT_MAPPING_PATH, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+def _project(index, with_person):
+    dataset = {"dataset_no": index, "title": f"d{index}", "access_policy": "公開"}
+    if with_person:
+        dataset["collected_by"] = {"contributor_id": f"P{index}", "name": f"Person {index}"}
+    return {"project_number": f"JP{index:04d}", "has_datasets": [dataset]}
+
+
+def _convert(mapping_def, state_path, records):
+    """Returns (lines per record key, stats) of one incremental run."""
+    engine = DataTransformationEngine(mapping_def)
+    converter = IncrementalConverter(engine, state_path, record_key="project_number")
+    lines = list(converter.iter_transform(records, DEFAULT_ROOT_CONTEXT, encoded=True))
+    return lines, converter.stats
+
+
+def _by_record(lines, records):
+    """Groups output lines per record (each record emits its root entity last)."""
+    grouped, current = {}, []
+    keys = iter(record["project_number"] for record in records)
+    for line in lines:
+        current.append(line)
+        if DEFAULT_ROOT_CONTEXT in line:
+            grouped[next(keys)] = current
+            current = []
+    return grouped
+
+
+def test_only_changed_records_are_retransformed(mapping_def, tmp_path):
+    state = str(tmp_path / "state.sqlite")
+    records = [_project(i, with_person=True) for i in range(5)]
+    first, stats = _convert(mapping_def, state, records)
+    assert (stats.transformed, stats.reused, stats.removed) == (5, 0, 0)
+
+    changed = copy.deepcopy(records)
+    changed[2]["has_datasets"][0]["title"] = "changed"
+    del changed[4]
+    second, stats = _convert(mapping_def, state, changed)
+    assert (stats.transformed, stats.reused, stats.removed) == (1, 3, 1)
+
+    before, after = _by_record(first, records), _by_record(second, changed)
+    for key in ("JP0000", "JP0001", "JP0003"):
+        assert after[key] == before[key]
+    assert after["JP0002"] != before["JP0002"]
+    assert '"data_name":"changed"' in "".join(after["JP0002"])
+
+    # A third run without changes reuses everything, byte for byte
+    third, stats = _convert(mapping_def, state, changed)
+    assert (stats.transformed, stats.reused, stats.removed) == (0, 4, 0)
+    assert third == second
+
+
+def test_mapping_change_retransforms_only_records_using_that_context(mapping_def, tmp_path):
+    state = str(tmp_path / "state.sqlite")
+    records = [_project(i, with_person=i % 2 == 0) for i in range(6)]
+    _convert(mapping_def, state, records)
+
+    changed_mapping = copy.deepcopy(mapping_def)
+    person = next(m for m in changed_mapping["entity_mappings"] if m["source_selector"]["context"] == PERSON)
+    person["attribute_mappings"].append({"source_attribute": "name", "target_attribute": "display_name"})
+    lines, stats = _convert(changed_mapping, state, records)
+
+    # Only the projects with a Person (0, 2, 4) touch the changed entity mapping
+    assert (stats.transformed, stats.reused) == (3, 3)
+    assert sum('"display_name"' in line for line in lines) == 3
+
+
+def test_record_keys_keep_their_type(mapping_def, tmp_path):
+    state = str(tmp_path / "state.sqlite")
+    numeric = _project(1, with_person=False)
+    numeric["project_number"] = 1
+    _convert(mapping_def, state, [numeric])
+
+    # The string "1" is a different record: it must not reuse the output of the integer key
+    text = copy.deepcopy(numeric)
+    text["project_number"] = "1"
+    text["has_datasets"][0]["title"] = "other"
+    lines, stats = _convert(mapping_def, state, [text])
+    assert (stats.transformed, stats.reused, stats.removed) == (1, 0, 1)
+    assert any('"other"' in line for line in lines)
+    _, stats = _convert(mapping_def, state, [numeric, text])
+    assert (stats.transformed, stats.reused) == (1, 1)
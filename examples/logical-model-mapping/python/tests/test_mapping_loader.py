@@ -0,0 +1,75 @@
+import os
+import pickle
+import shutil
+import sys
+
+import pytest
+import yaml
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+import mapping_loader
+from converter import DEFAULT_MAPPING_PATH
+from mapping_loader import MappingDefinitionError, cache_path_for, load_mapping
+
+
+@pytest.fixture
+def mapping_path(tmp_path):
+    path = tmp_path / "mapping.yaml"
+    shutil.copy(DEFAULT_MAPPING_PATH, path)
+    return str(path)
+
+
+def test_cached_plan_is_reused(mapping_path):
+    first = load_mapping(mapping_path)
+    second = load_mapping(mapping_path)
+    assert not first.from_cache and second.from_cache
+    assert second.plan == first.plan
+    assert os.path.exists(cache_path_for(mapping_path))
+
+
+def test_unvalidated_cache_is_not_reused_once_jsonschema_is_available(mapping_path, monkeypatch):
+    pytest.importorskip("jsonschema")
+    with monkeypatch.context() as m:
+        m.setattr(mapping_loader, "jsonschema", None)
+        assert not load_mapping(mapping_path).from_cache
+        assert load_mapping(mapping_path).from_cache
+
+    # 検証できる環境では検証からやり直す
+    assert not load_mapping(mapping_path).from_cache
+    assert load_mapping(mapping_path).from_cache
+
+
+def test_invalid_mapping_is_rejected(tmp_path):
+    pytest.importorskip("jsonschema")
+    with open(DEFAULT_MAPPING_PATH, "r", encoding="utf-8") as f:
+        mapping_def = yaml.safe_load(f)
+    del mapping_def["entity_mappings"][0]["source_selector"]
+    path = tmp_path / "invalid.yaml"
+    path.write_text(yaml.safe_dump(mapping_def, allow_unicode=True), encoding="utf-8")
+
+    with pytest.raises(MappingDefinitionError, match="entity_mappings/0"):
+        load_mapping(str(path))
+    assert not os.path.exists(cache_path_for(str(path)))
+
+
+@pytest.mark.parametrize("broken", ["mapping", "source_model"])
+def test_yaml_syntax_errors_are_mapping_errors(mapping_path, tmp_path, broken):
+    bad = tmp_path / "bad.yaml"
+    bad.write_text("entity_mappings: [\n  - {", encoding="utf-8")
+    if broken == "mapping":
+        args = (str(bad),)
+    else:
+        args = (mapping_path, str(bad))
+    with pytest.raises(MappingDefinitionError, match="bad.yaml is not valid YAML"):
+        load_mapping(*args, use_cache=False)
+
+
+@pytest.mark.parametrize("payload", [["not", "a", "dict"], {"key": "only"}])
+def test_foreign_cache_files_are_ignored(mapping_path, payload):
+    with open(cache_path_for(mapping_path), "wb") as f:
+        pickle.dump(payload, f)
+    loaded = load_mapping(mapping_path)
+    assert not loaded.from_cache
+    # 正しい形式で書き直される
+    assert load_mapping(mapping_path).from_cache
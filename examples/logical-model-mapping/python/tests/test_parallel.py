@@ -0,0 +1,61 @@
+import itertools
+import os
+import sys
+
+import pytest
+import yaml
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from converter import DEFAULT_MAPPING_PATH, DEFAULT_ROOT_CONTEXT, ID_BLOCK_SIZE, DataTransformationEngine
+from parallel import iter_transform_parallel
+from traversal import TraversalStats
+
+
+@pytest.fixture(scope="module")
+def mapping_def():
+    with open(DEFAULT_MAPPING_PATH, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+def _projects(count):
+    return [
+        {
+            "project_number": f"JP{i:04d}",
+            "has_datasets": [
+                {"dataset_no": n, "title": f"d{i}-{n}", "access_policy": "共有",
+                 "collected_by": {"contributor_id": f"P{n}", "name": f"Person {n}"}}
+                for n in range(i % 4)
+            ],
+        }
+        for i in range(count)
+    ]
+
+
+def test_ordered_parallel_output_matches_sequential_chunks(mapping_def):
+    projects = _projects(23)
+    stats = TraversalStats()
+    parallel = list(iter_transform_parallel(
+        mapping_def, iter(projects), DEFAULT_ROOT_CONTEXT, workers=2, chunk_size=5, stats=stats,
+    ))
+
+    # 並列変換はチャンクごとに ID_BLOCK_SIZE 単位の採番範囲を使う
+    engine = DataTransformationEngine(mapping_def)
+    sequential_stats = TraversalStats()
+    sequential = []
+    for index, chunk in enumerate(itertools.batched(projects, 5)):
+        sequential.extend(engine.iter_transform(chunk, DEFAULT_ROOT_CONTEXT, first_id=index * ID_BLOCK_SIZE, stats=sequential_stats))
+
+    assert parallel == sequential
+    assert stats.entities == sequential_stats.entities
+
+
+def test_unordered_parallel_output_has_the_same_entities(mapping_def):
+    projects = _projects(12)
+    ordered = list(iter_transform_parallel(mapping_def, projects, DEFAULT_ROOT_CONTEXT, workers=2, chunk_size=3))
+    unordered = list(iter_transform_parallel(mapping_def, projects, DEFAULT_ROOT_CONTEXT, workers=2, chunk_size=3, ordered=False))
+
+    def key(entity):
+        return entity.get("_id", -1), entity.get("_ref", -1), entity.get("created_datasets", -1)
+
+    assert sorted(unordered, key=key) == sorted(ordered, key=key)
@@ -1,5 +1,14 @@
+import asyncio
 import copy
+import os
+import re
+from typing import AsyncGenerator, List
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
 from google.adk.agents.llm_agent import Agent, LlmResponse
+from google.adk.events import Event
+from google.genai import types
 # Content, Part などのスキーマも llm_agent またはその周辺からインポートできるか、
 # あるいは vertexai のものを使用する必要があるか、検証結果に基づき調整します。
 # dir(lm) の結果には LlmResponse がありましたが Content は見当たらなかったので、
@@ -77,6 +86,122 @@ research_agent = Agent(
     description='記事の執筆に必要な情報を収集してレポートにまとめるエージェント',
 )
 
+# --- リサーチエージェントの並列実行版 ---
+
+# 並列に実行する research_agent2 の最大数
+RESEARCH_MAX_CONCURRENCY = int(os.environ.get('RESEARCH_MAX_CONCURRENCY', '5'))
+
+research_topic_instruction = '''
+あなたの役割は、記事の執筆に必要な情報を収集して調査レポートにまとめる事です。
+前段のエージェントが選定したトピックのうち、次の1項目だけを担当します。
+担当トピック: {topic}
+* 出力形式
+日本語で出力。
+担当トピックについて客観的情報をまとめ、5文以上の長さで記述すること。トピック名の見出しは付けないこと。
+'''
+
+def _topic_instruction(topic: str):
+    """
+    担当トピックを埋め込んだ instruction を返す InstructionProvider。
+    文字列の instruction では ADK が {name} をセッション state の参照として置き換えるため、
+    モデルが生成したトピックに {} が含まれていても、そのまま渡るように関数として渡します。
+    """
+    text = research_topic_instruction.format(topic=topic)
+    return lambda ctx: text
+
+
+# トピックはインデントの無いリスト項目だけ（字下げしたサブ項目はトピックに数えない）
+_TOPIC_LINE = re.compile(r'^(?:[-*・•]|\d+\s*[.)．、])\s*(.+?)\s*$')
+
+
+def parse_topics(text: str, max_topics: int = 10) -> List[str]:
+    """
+    research_agent1 の出力（箇条書き・番号付きリスト）からトピックを取り出します。
+    行頭から始まるリスト項目だけをトピックとし、字下げされたサブ項目は無視します。
+    リストが見つからない場合は、出力全体を 1 つのトピックとして扱います。
+    """
+    topics = []
+    for line in text.splitlines():
+        match = _TOPIC_LINE.match(line)
+        if match:
+            topic = match.group(1).replace('**', '').strip()
+            if topic:
+                topics.append(topic)
+    return topics[:max_topics] or [text.strip()]
+
+
+def _event_text(event: Event) -> str:
+    if not event.content or not event.content.parts:
+        return ''
+    return ''.join(part.text or '' for part in event.content.parts)
+
+
+class ParallelResearchAgent(BaseAgent):
+    """
+    research_agent の並列実行版。
+    topic_agent (research_agent1) が選定したトピックごとに report_agent (research_agent2) を
+    同時に実行し、結果を 1 つの調査レポートにまとめます。同時実行数は max_concurrency で制限します。
+    見出しなどの定型メッセージはモデルを呼び出さずに直接出力します。
+    """
+    topic_agent: Agent
+    report_agent: Agent
+    max_concurrency: int = RESEARCH_MAX_CONCURRENCY
+
+    def _text_event(self, ctx: InvocationContext, text: str) -> Event:
+        return Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            content=types.Content(role='model', parts=[types.Part(text=text)]),
+        )
+
+    async def _research_topic(self, ctx: InvocationContext, index: int, topic: str, semaphore: asyncio.Semaphore) -> str:
+        agent = self.report_agent.clone(update={
+            'name': f'{self.report_agent.name}_{index}',
+            'instruction': _topic_instruction(topic),
+        })
+        # トピックごとに会話履歴のブランチを分け、他のトピックの出力が混ざらないようにする
+        branch = f'{ctx.branch}.{agent.name}' if ctx.branch else agent.name
+        topic_ctx = ctx.model_copy(update={'branch': branch})
+        texts = []
+        async with semaphore:
+            async for event in agent.run_async(topic_ctx):
+                if not event.partial:
+                    texts.append(_event_text(event))
+        return ''.join(texts).strip()
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        yield self._text_event(ctx, '\n---\n## リサーチエージェントが調査レポートを作成します。\n---\n')
+        yield self._text_event(ctx, '\n## 調査対象のトピックを選定します。\n')
+        topic_texts = []
+        async for event in self.topic_agent.run_async(ctx):
+            if not event.partial:
+                topic_texts.append(_event_text(event))
+            yield event
+        topics = parse_topics(''.join(topic_texts))
+
+        yield self._text_event(ctx, f'\n## 選定した {len(topics)} 件のトピックについて、並列に調査レポートを作成します。\n')
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(
+            *(self._research_topic(ctx, i, topic, semaphore) for i, topic in enumerate(topics)),
+            return_exceptions=True,
+        )
+        sections = []
+        for i, (topic, result) in enumerate(zip(topics, results), start=1):
+            body = f'（調査に失敗しました: {result}）' if isinstance(result, Exception) else result
+            sections.append(f'### {i}. {topic}\n{body}')
+        yield self._text_event(ctx, '\n\n'.join(sections))
+        yield self._text_event(ctx, '\n#### 調査レポートが準備できました。記事の作成に取り掛かってもよいでしょうか？\n')
+
+
+# research_agent と同じ名前で登録し、ルートエージェントからの転送先として置き換えて使います。
+parallel_research_agent = ParallelResearchAgent(
+    name='research_agent',
+    topic_agent=copy.deepcopy(research_agent1),
+    report_agent=copy.deepcopy(research_agent2),
+    description='記事の執筆に必要な情報を収集してレポートにまとめるエージェント（トピックごとに並列で調査）',
+)
+
 # --- ライター・レビューエージェントの定義 ---
 
 writer_instruction = '''
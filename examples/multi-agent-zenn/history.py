@@ -0,0 +1,152 @@
+"""
+run_chat 用の会話履歴マネージャー。
+
+履歴全体を毎回送るとターンごとのトークン数と待ち時間が会話の長さに比例して増えるため、
+トークン予算を設けて、直近のターンはそのまま残し、予算を超えた古いターンは
+要約（ローリングサマリー）に畳み込みます。ターンごとのトークン数と所要時間も記録します。
+"""
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+from google.genai.types import Content, Part
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PREFIX = '（これまでの会話の要約）\n'
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    トークン数の概算。ASCII 文字は 4 文字で 1 トークン、それ以外（日本語など）は
+    1 文字 1 トークンとして数えます。
+    """
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def truncate_summary(previous: str, turns: List[Tuple[str, str]], max_tokens: int) -> str:
+    """モデルを使わない要約。各ターンの冒頭だけを残し、全体を max_tokens 以内に収めます。"""
+    lines = [previous] if previous else []
+    for role, text in turns:
+        speaker = 'ユーザー' if role == 'user' else 'エージェント'
+        lines.append(f'- {speaker}: {text.strip().splitlines()[0][:80] if text.strip() else ""}')
+    summary = '\n'.join(lines)
+    # 予算を超える場合は古い行から落とし、それでも超える場合は末尾 max_tokens 文字だけを残す
+    while estimate_tokens(summary) > max_tokens and '\n' in summary:
+        summary = summary.split('\n', 1)[1]
+    return summary if estimate_tokens(summary) <= max_tokens else summary[-max_tokens:]
+
+
+@dataclass
+class TurnMetrics:
+    """1 ターン分の計測値"""
+    turn: int
+    prompt_tokens: int
+    response_tokens: int
+    latency_s: float
+    history_messages: int
+    summarized_messages: int
+
+    def format(self) -> str:
+        return (f'[turn {self.turn}] prompt≈{self.prompt_tokens} tokens, response≈{self.response_tokens} tokens, '
+                f'{self.latency_s:.2f}s, history={self.history_messages} messages '
+                f'(summarized messages: {self.summarized_messages})')
+
+
+@dataclass
+class HistoryManager:
+    """
+    トークン予算付きの会話履歴。
+
+    token_budget: 履歴（要約 + 直近のターン）に使うトークン数の上限
+    keep_recent: 予算に関わらずそのまま残す直近のメッセージ数
+    summary_budget: 要約に使うトークン数の上限
+    summarizer: (これまでの要約, 畳み込むターンのリスト) を受け取り新しい要約を返す関数。
+                失敗した場合や未指定の場合は truncate_summary を使います。
+    """
+    token_budget: int = int(os.environ.get('HISTORY_TOKEN_BUDGET', '4000'))
+    keep_recent: int = int(os.environ.get('HISTORY_KEEP_MESSAGES', '4'))
+    summary_budget: int = 800
+    summarizer: Optional[Callable[[str, List[Tuple[str, str]]], str]] = None
+    summary: str = ''
+    turns: List[Tuple[str, str]] = field(default_factory=list)
+    summarized_messages: int = 0
+    metrics: List[TurnMetrics] = field(default_factory=list)
+
+    def _tokens(self) -> int:
+        return estimate_tokens(self.summary) + sum(estimate_tokens(text) for _, text in self.turns)
+
+    def add(self, role: str, text: str) -> None:
+        self.turns.append((role, text))
+        self._fold()
+
+    def _fold(self) -> None:
+        """
+        予算を超えている間、古いターンを要約に移します（ユーザーと応答の組を単位とします）。
+        組を移すと直近 keep_recent 件に食い込む場合は、次の応答が追加されるまで待ちます。
+        """
+        folded = []
+        while self._tokens() > self.token_budget and len(self.turns) > self.keep_recent:
+            paired = len(self.turns) >= 2 and self.turns[0][0] == 'user' and self.turns[1][0] != 'user'
+            count = 2 if paired else 1
+            if len(self.turns) - count < self.keep_recent:
+                break
+            folded.extend(self.turns[:count])
+            del self.turns[:count]
+        if not folded:
+            return
+        self.summarized_messages += len(folded)
+        summary = None
+        if self.summarizer is not None:
+            try:
+                summary = self.summarizer(self.summary, folded)
+            except Exception:
+                logger.warning('履歴の要約に失敗したため、簡易要約を使います', exc_info=True)
+        if not summary:
+            summary = truncate_summary(self.summary, folded, self.summary_budget)
+        elif estimate_tokens(summary) > self.summary_budget:
+            summary = truncate_summary(summary, [], self.summary_budget)
+        self.summary = summary
+
+    def messages(self) -> List[Tuple[str, str]]:
+        """root_agent に渡す履歴（要約 + 直近のターン）を (role, text) のリストで返します。"""
+        history = [('user', SUMMARY_PREFIX + self.summary)] if self.summary else []
+        history.extend(self.turns)
+        return history
+
+    def contents(self) -> List[Content]:
+        """root_agent に渡す履歴（要約 + 直近のターン）"""
+        return [Content(role=role, parts=[Part(text=text)]) for role, text in self.messages()]
+
+    def prompt_tokens(self, user_input: str) -> int:
+        """履歴と入力を送る際のトークン数の概算（送信前に呼び出します）"""
+        return self._tokens() + estimate_tokens(user_input)
+
+    def record_turn(self, prompt_tokens: int, response_text: str, latency_s: float, usage=None) -> TurnMetrics:
+        """
+        1 ターン分の計測値を記録します。応答に usage_metadata があれば、その実トークン数を使います。
+        """
+        prompt_tokens = getattr(usage, 'prompt_token_count', None) or prompt_tokens
+        response_tokens = getattr(usage, 'candidates_token_count', None) or estimate_tokens(response_text)
+        metrics = TurnMetrics(
+            turn=len(self.metrics) + 1,
+            prompt_tokens=prompt_tokens,
+            response_tokens=response_tokens,
+            latency_s=latency_s,
+            history_messages=len(self.messages()),
+            summarized_messages=self.summarized_messages,
+        )
+        self.metrics.append(metrics)
+        return metrics
+
+    def report(self) -> str:
+        """セッション全体の集計"""
+        if not self.metrics:
+            return 'ターンの記録はありません。'
+        total_prompt = sum(m.prompt_tokens for m in self.metrics)
+        total_response = sum(m.response_tokens for m in self.metrics)
+        total_latency = sum(m.latency_s for m in self.metrics)
+        return (f'{len(self.metrics)} turns: prompt≈{total_prompt} tokens, response≈{total_response} tokens, '
+                f'{total_latency:.2f}s total ({total_latency / len(self.metrics):.2f}s/turn)')
@@ -1,6 +1,17 @@
+import asyncio
 import copy
+import io
+import os
+import time
 from google.adk.agents.llm_agent import Agent
-from agents import research_agent, write_and_review_agent
+from google.adk.runners import InMemoryRunner
+from agents import parallel_research_agent, research_agent, write_and_review_agent
+from history import HistoryManager
+from response_cache import ResponseCache
+from streaming import StageRecorder, run_once, stream_turn
+
+# RESEARCH_MODE=parallel で、トピックごとの調査を並列に実行するリサーチエージェントを使います。
+selected_research_agent = parallel_research_agent if os.environ.get('RESEARCH_MODE') == 'parallel' else research_agent
 
 # --- Root Agent (業務フローエージェント) の定義 ---
 
@@ -25,12 +36,55 @@ root_agent = Agent(
     model='gemini-2.5-flash',
     instruction=root_instruction,
     sub_agents=[
-        copy.deepcopy(research_agent),
+        copy.deepcopy(selected_research_agent),
         copy.deepcopy(write_and_review_agent),
     ],
     description='記事を作成する業務フローを実行するエージェント'
 )
 
+# --- 履歴要約エージェントの定義 ---
+
+summary_instruction = '''
+あなたの役割は、記事作成の業務フローにおけるユーザーとエージェントの会話を要約することです。
+「これまでの要約」と「追加の会話」が与えられるので、両方を統合した新しい要約を出力します。
+* 出力条件
+- 日本語で、箇条書きで 10 行以内にまとめます。
+- 記事のテーマ、調査レポートの要点、記事の執筆・修正の指示とレビューの指摘は必ず残します。
+- 要約以外の文章は出力しません。
+'''
+
+summary_agent = Agent(
+    name='summary_agent',
+    model='gemini-2.5-flash',
+    instruction=summary_instruction,
+    description='会話履歴を要約するエージェント',
+)
+
+
+# MODEL_CACHE_MODE=cache / record / replay で、モデルの応答を再利用・記録・再生します。
+# 記録先は MODEL_CACHE_FILE（既定は .model_cache.jsonl）です。
+response_cache = ResponseCache.from_env()
+response_cache.install(root_agent)
+response_cache.install(summary_agent)
+summary_runner = InMemoryRunner(agent=summary_agent, app_name=summary_agent.name)
+
+# ステージ（エージェント）ごとの TTFT・所要時間・トークン数を記録します。
+# キャッシュのヒットを計測に含めないよう、ResponseCache の後に組み込みます。
+stage_recorder = StageRecorder()
+stage_recorder.install(root_agent)
+
+# STREAM_OUTPUT=0 で、ストリーミングせずに応答全体を待ってから表示します。
+STREAM_OUTPUT = os.environ.get('STREAM_OUTPUT', '1') != '0'
+
+
+def summarize_history(previous_summary, turns):
+    """古いターンを要約に畳み込みます（HistoryManager の summarizer）。"""
+    lines = [f"{'ユーザー' if role == 'user' else 'エージェント'}: {text}" for role, text in turns]
+    prompt = f"これまでの要約:\n{previous_summary or '（なし）'}\n\n追加の会話:\n" + "\n".join(lines)
+    # LlmAgent は直接呼び出せないため、Runner 経由で実行します
+    return asyncio.run(run_once(summary_runner, prompt))
+
+
 def run_chat():
     """
     ユーザーと Root Agent との対話形式のチャットループを実行します。
@@ -39,7 +93,9 @@ def run_chat():
     print("利用可能なコマンド: exit, quit")
     
     # セッション（会話履歴）の初期化
-    history = []
+    # トークン予算 (HISTORY_TOKEN_BUDGET) を超えた古いターンは要約に畳み込まれます。
+    history = HistoryManager(summarizer=summarize_history)
+    runner = InMemoryRunner(agent=root_agent, app_name=root_agent.name)
     
     while True:
         try:
@@ -48,32 +104,36 @@ def run_chat():
                 break
             
             # Agent の実行
-            response = root_agent(user_input, history=history)
-            
-            # 応答の表示
-            # response が LlmResponse オブジェクトの場合、その属性を確認します。
-            # 以前の Zenn 記事では response.content.parts でしたが、
-            # 最新の adk では構造が変わっている可能性があるため、安全な取得を試みます。
-            try:
-                text = response.parts[0].text
-            except (AttributeError, IndexError):
-                try:
-                    text = response.content.parts[0].text
-                except:
-                    text = str(response)
+            prompt_tokens = history.prompt_tokens(user_input)
+            started = time.perf_counter()
+            if STREAM_OUTPUT:
+                # 各サブエージェントの部分テキストを届いた順に表示します
+                print("\nエージェント:", end="")
+                text, usage = asyncio.run(stream_turn(runner, history, user_input))
+                latency = time.perf_counter() - started
+            else:
+                text, usage = asyncio.run(stream_turn(runner, history, user_input, out=io.StringIO(), streaming=False))
+                latency = time.perf_counter() - started
+                
+                # 応答の表示
+                print(f"\nエージェント: {text}")
             
-            print(f"\nエージェント: {text}")
-            
-            # historyの更新
-            # historyに含めるContent/Partをインポートする必要があります
-            from vertexai.generative_models import Content, Part
-            history.append(Content(role="user", parts=[Part.from_text(user_input)]))
-            history.append(Content(role="model", parts=[Part.from_text(text)]))
+            # historyの更新（予算を超えた分は要約されます）
+            history.add("user", user_input)
+            history.add("model", text)
+            print(history.record_turn(prompt_tokens, text, latency, usage).format())
+            for stage in stage_recorder.take_turn():
+                print(stage.format())
             
         except KeyboardInterrupt:
             break
         except Exception as e:
             print(f"エラーが発生しました: {e}")
 
+    print(history.report())
+    print(stage_recorder.report())
+    if response_cache.mode != 'off':
+        print(response_cache.stats())
+
 if __name__ == "__main__":
     run_chat()
@@ -0,0 +1,143 @@
+"""
+モデル呼び出しの応答キャッシュと記録・再生 (record / replay)。
+
+get_print_agent と同じ before_model_callback による短絡の仕組みを使い、
+(エージェント名, instruction, 入力履歴のハッシュ) をキーとして応答を再利用します。
+after_model_callback でモデルの応答を記録し、ファイル（JSON Lines）に保存します。
+
+モード（環境変数 MODEL_CACHE_MODE）:
+- off:    何もしない（既定）
+- cache:  キャッシュにあれば再利用し、無ければモデルを呼び出して記録する
+- record: 常にモデルを呼び出し、応答を記録する
+- replay: 記録済みの応答だけを使い、モデル（ネットワーク）は呼び出さない。
+          記録が無い呼び出しには、その旨を示す固定の応答を返す
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.llm_agent import Agent
+from google.adk.models import LlmResponse
+from google.genai import types
+
+MODES = ('off', 'cache', 'record', 'replay')
+DEFAULT_CACHE_FILE = os.path.join(os.path.dirname(__file__), '.model_cache.jsonl')
+REPLAY_MISS_TEXT = '（リプレイ用の応答が記録されていません）'
+
+
+def request_key(agent_name: str, llm_request) -> str:
+    """(エージェント名, instruction, 入力履歴) から決定的なキーを作ります。"""
+    config = getattr(llm_request, 'config', None)
+    instruction = getattr(config, 'system_instruction', None)
+    if isinstance(instruction, types.Content):
+        instruction = instruction.model_dump_json(exclude_none=True)
+    history = [content.model_dump(mode='json', exclude_none=True) for content in (llm_request.contents or [])]
+    history_hash = hashlib.sha256(
+        json.dumps(history, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    ).hexdigest()
+    raw = json.dumps([agent_name, str(instruction or ''), history_hash], ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """エージェントの before/after_model_callback に組み込む応答キャッシュ"""
+
+    def __init__(self, mode: str = 'off', path: Optional[str] = DEFAULT_CACHE_FILE):
+        if mode not in MODES:
+            raise ValueError(f'MODEL_CACHE_MODE は {MODES} のいずれかを指定してください: {mode!r}')
+        self.mode = mode
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._responses: Dict[str, Dict] = {}
+        # モデル呼び出し中のキー（invocation, エージェント名ごと）
+        self._pending: Dict[tuple, str] = {}
+        self._lock = threading.Lock()
+        if mode in ('cache', 'replay') and path and os.path.exists(path):
+            self._load()
+
+    @classmethod
+    def from_env(cls) -> 'ResponseCache':
+        return cls(
+            mode=os.environ.get('MODEL_CACHE_MODE', 'off'),
+            path=os.environ.get('MODEL_CACHE_FILE', DEFAULT_CACHE_FILE),
+        )
+
+    def _load(self) -> None:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self._responses[record['key']] = record['content']
+
+    def _save(self, key: str, agent_name: str, content: Dict) -> None:
+        if not self.path:
+            return
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'key': key, 'agent': agent_name, 'content': content}, ensure_ascii=False) + '\n')
+
+    def before_model_callback(self, callback_context, llm_request) -> Optional[LlmResponse]:
+        key = request_key(callback_context.agent_name, llm_request)
+        if self.mode in ('cache', 'replay'):
+            content = self._responses.get(key)
+            if content is not None:
+                self.hits += 1
+                return LlmResponse(content=types.Content.model_validate(content))
+            self.misses += 1
+            if self.mode == 'replay':
+                return LlmResponse(content=types.Content(role='model', parts=[types.Part(text=REPLAY_MISS_TEXT)]))
+        self._pending[(callback_context.invocation_id, callback_context.agent_name)] = key
+        return None
+
+    def after_model_callback(self, callback_context, llm_response) -> Optional[LlmResponse]:
+        if llm_response.partial or llm_response.content is None:
+            return None
+        key = self._pending.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        if key is None:
+            return None
+        content = llm_response.content.model_dump(mode='json', exclude_none=True)
+        self._responses[key] = content
+        self._save(key, callback_context.agent_name, content)
+        return None
+
+    def install(self, agent: BaseAgent) -> BaseAgent:
+        """
+        エージェントとその配下の全 LlmAgent にコールバックを追加します。
+        既存の before_model_callback（get_print_agent など）は先に実行されます。
+        """
+        if self.mode == 'off':
+            return agent
+        for child in _iter_agents(agent):
+            if isinstance(child, Agent):
+                child.before_model_callback = _append(child.before_model_callback, self.before_model_callback)
+                child.after_model_callback = _append(child.after_model_callback, self.after_model_callback)
+        return agent
+
+    def stats(self) -> str:
+        return f'response cache ({self.mode}): {self.hits} hits, {self.misses} misses, {len(self._responses)} entries'
+
+
+def _append(existing, callback):
+    if existing is None:
+        return callback
+    callbacks = list(existing) if isinstance(existing, list) else [existing]
+    return callbacks if callback in callbacks else callbacks + [callback]
+
+
+def _iter_agents(agent: BaseAgent):
+    """sub_agents と、エージェントを値に持つフィールド（ParallelResearchAgent の topic_agent など）をたどります。"""
+    stack, seen = [agent], set()
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        yield current
+        stack.extend(current.sub_agents)
+        for name in type(current).model_fields:
+            value = getattr(current, name, None)
+            if isinstance(value, BaseAgent) and name != 'parent_agent':
+                stack.append(value)
@@ -0,0 +1,231 @@
+"""
+run_chat 用のストリーミング出力と、ステージ（エージェント）ごとのレイテンシー計測。
+
+- stream_turn: Runner を SSE のストリーミングモードで実行し、各サブエージェント
+  （research_agent2, writer_agent, review_agent など）の部分テキストを届いた順に表示します。
+  ターンの応答テキスト（調査レポートや記事を含む）を履歴用に返します。
+- StageRecorder: before/after_model_callback でモデル呼び出しごとに
+  最初のトークンまでの時間 (TTFT)、全体の所要時間、トークン数を記録し、
+  ターンごと・セッション全体のレポートにまとめます。
+
+コールバックは ResponseCache と同じく既存のコールバックの後ろに追加します。
+get_print_agent やキャッシュのヒットで短絡された呼び出しはモデルを呼び出さないため記録しません。
+"""
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.llm_agent import Agent
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.events import Event
+from google.adk.runners import Runner
+from google.genai import types
+
+from history import HistoryManager, estimate_tokens
+from response_cache import _append, _iter_agents
+
+USER_ID = 'user'
+
+
+def _content_text(content) -> str:
+    if content is None or not content.parts:
+        return ''
+    return ''.join(part.text or '' for part in content.parts)
+
+
+@dataclass
+class StageMetrics:
+    """1 回のモデル呼び出し（ステージ）の計測値"""
+    agent: str
+    ttft_s: float
+    total_s: float
+    prompt_tokens: int
+    response_tokens: int
+    chunks: int
+
+    def format(self) -> str:
+        return (f'  [{self.agent}] TTFT {self.ttft_s:.2f}s, total {self.total_s:.2f}s, '
+                f'prompt≈{self.prompt_tokens} tokens, response≈{self.response_tokens} tokens, {self.chunks} chunks')
+
+
+@dataclass
+class _PendingStage:
+    started: float
+    prompt_tokens: int
+    first_token: Optional[float] = None
+    chunks: int = 0
+    texts: List[str] = field(default_factory=list)
+
+
+class StageRecorder:
+    """エージェントの before/after_model_callback に組み込むステージごとの計測"""
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.stages: List[StageMetrics] = []
+        # ターンの区切り（take_turn で返し終えた stages の位置）
+        self._turn_start = 0
+        # モデル呼び出し中のステージ（invocation, エージェント名ごと）
+        self._pending: Dict[Tuple[str, str], _PendingStage] = {}
+
+    def before_model_callback(self, callback_context, llm_request):
+        prompt = ''.join(_content_text(content) for content in (llm_request.contents or []))
+        self._pending[(callback_context.invocation_id, callback_context.agent_name)] = _PendingStage(
+            started=self.clock(), prompt_tokens=estimate_tokens(prompt),
+        )
+        return None
+
+    def after_model_callback(self, callback_context, llm_response):
+        key = (callback_context.invocation_id, callback_context.agent_name)
+        pending = self._pending.get(key)
+        if pending is None:
+            return None
+        now = self.clock()
+        if pending.first_token is None:
+            pending.first_token = now
+        if llm_response.partial:
+            # SSE モードでは部分応答のあとに全体をまとめた応答が届く
+            pending.chunks += 1
+            pending.texts.append(_content_text(llm_response.content))
+            return None
+        del self._pending[key]
+        usage = llm_response.usage_metadata
+        text = _content_text(llm_response.content) or ''.join(pending.texts)
+        self.stages.append(StageMetrics(
+            agent=callback_context.agent_name,
+            ttft_s=pending.first_token - pending.started,
+            total_s=now - pending.started,
+            prompt_tokens=getattr(usage, 'prompt_token_count', None) or pending.prompt_tokens,
+            response_tokens=getattr(usage, 'candidates_token_count', None) or estimate_tokens(text),
+            chunks=pending.chunks or 1,
+        ))
+        return None
+
+    def install(self, agent: BaseAgent) -> BaseAgent:
+        """エージェントとその配下の全 LlmAgent にコールバックを追加します（既存のコールバックが先に実行されます）。"""
+        for child in _iter_agents(agent):
+            if isinstance(child, Agent):
+                child.before_model_callback = _append(child.before_model_callback, self.before_model_callback)
+                child.after_model_callback = _append(child.after_model_callback, self.after_model_callback)
+        return agent
+
+    def take_turn(self) -> List[StageMetrics]:
+        """前回の呼び出し以降に記録したステージ（1 ターン分）を返します。"""
+        stages = self.stages[self._turn_start:]
+        self._turn_start = len(self.stages)
+        return stages
+
+    def report(self) -> str:
+        """エージェントごとの集計（所要時間の合計が大きい順）"""
+        if not self.stages:
+            return 'ステージの記録はありません。'
+        by_agent: Dict[str, List[StageMetrics]] = {}
+        for stage in self.stages:
+            by_agent.setdefault(stage.agent, []).append(stage)
+        session_total = sum(stage.total_s for stage in self.stages)
+        lines = [f'{len(self.stages)} model calls, {session_total:.2f}s total:']
+        for agent, stages in sorted(by_agent.items(), key=lambda item: -sum(s.total_s for s in item[1])):
+            total = sum(s.total_s for s in stages)
+            share = total / session_total if session_total else 0.0
+            lines.append(
+                f'  {agent}: {len(stages)} calls, TTFT {sum(s.ttft_s for s in stages) / len(stages):.2f}s avg, '
+                f'total {total:.2f}s ({share:.0%}), prompt≈{sum(s.prompt_tokens for s in stages)} tokens, '
+                f'response≈{sum(s.response_tokens for s in stages)} tokens'
+            )
+        return '\n'.join(lines)
+
+
+def _history_events(history: HistoryManager, author: str) -> List[Event]:
+    """HistoryManager の履歴（要約 + 直近のターン）を新しいセッションに積むイベントに変換します。"""
+    return [
+        Event(
+            invocation_id='history',
+            author='user' if content.role == 'user' else author,
+            content=content,
+        )
+        for content in history.contents()
+    ]
+
+
+async def run_once(runner: Runner, prompt: str) -> str:
+    """
+    新しいセッションでエージェントを 1 回実行し、応答テキスト（部分応答を除く）を返します。
+    ADK のエージェントは直接呼び出せないため、履歴の要約などの単発の呼び出しに使います。
+    """
+    session = await runner.session_service.create_session(app_name=runner.app_name, user_id=USER_ID)
+    texts = []
+    try:
+        async for event in runner.run_async(
+            user_id=USER_ID,
+            session_id=session.id,
+            new_message=types.Content(role='user', parts=[types.Part(text=prompt)]),
+        ):
+            if not event.partial:
+                texts.append(_content_text(event.content))
+    finally:
+        await runner.session_service.delete_session(app_name=runner.app_name, user_id=USER_ID, session_id=session.id)
+    return ''.join(texts).strip()
+
+
+def _usage_total(usages) -> Optional[types.GenerateContentResponseUsageMetadata]:
+    """ターン内の各応答の usage_metadata のトークン数を合計します。"""
+    usages = [usage for usage in usages if usage is not None]
+    if not usages:
+        return None
+    return types.GenerateContentResponseUsageMetadata(
+        prompt_token_count=sum(usage.prompt_token_count or 0 for usage in usages),
+        candidates_token_count=sum(usage.candidates_token_count or 0 for usage in usages),
+    )
+
+
+async def stream_turn(
+    runner: Runner, history: HistoryManager, user_input: str, out=sys.stdout, streaming: bool = True,
+) -> Tuple[str, object]:
+    """
+    1 ターン分を SSE のストリーミングモードで実行し、部分テキストを届いた順に out へ書き出します。
+    streaming=False ではストリーミングせずに実行し、応答ごとに書き出します。
+
+    履歴は HistoryManager を正として、ターンごとに新しいセッションへ積み直します。
+    (ターンの応答テキスト, usage_metadata の合計) を返します。応答テキストは、LlmAgent ごとの
+    最後の応答（ループで書き直された記事やレビューは最新のもの）と、それ以外のエージェントが
+    出力したテキスト（並列リサーチの調査レポートなど）を出力順につなげたものです。
+    """
+    session = await runner.session_service.create_session(app_name=runner.app_name, user_id=USER_ID)
+    for event in _history_events(history, runner.agent.name):
+        await runner.session_service.append_event(session, event)
+
+    texts: List[Tuple[str, str]] = []
+    usages = []
+    author, streamed = None, False
+    try:
+        async for event in runner.run_async(
+            user_id=USER_ID,
+            session_id=session.id,
+            new_message=types.Content(role='user', parts=[types.Part(text=user_input)]),
+            run_config=RunConfig(streaming_mode=StreamingMode.SSE if streaming else StreamingMode.NONE),
+        ):
+            chunk = _content_text(event.content)
+            if not chunk:
+                continue
+            if event.author != author:
+                author, streamed = event.author, False
+                out.write(f'\n[{author}] ')
+            if event.partial:
+                streamed = True
+                out.write(chunk)
+            else:
+                # 部分テキストとして表示済みの応答は再表示しない（print agent やキャッシュの応答はここで表示する）
+                if not streamed:
+                    out.write(chunk)
+                streamed = False
+                if isinstance(runner.agent.find_agent(event.author), Agent):
+                    texts = [(name, text) for name, text in texts if name != event.author]
+                texts.append((event.author, chunk))
+                usages.append(event.usage_metadata)
+            out.flush()
+    finally:
+        await runner.session_service.delete_session(app_name=runner.app_name, user_id=USER_ID, session_id=session.id)
+    out.write('\n')
+    return '\n'.join(text for _, text in texts).strip(), _usage_total(usages)
@@ -0,0 +1,44 @@
+import asyncio
+import os
+import sys
+from typing import AsyncGenerator
+
+import pytest
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+# agents.py uses vertexai for its print agents
+pytest.importorskip("vertexai")
+
+# Add the example directory to path so we can import its modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agents import ParallelResearchAgent, parse_topics, research_agent1, research_agent2
+from streaming import run_once
+
+BRACED_TOPIC = '設定ファイル {"retry": 3} と {user_name} の扱い'
+
+
+class EchoLlm(BaseLlm):
+    """Lists the braced topic for the topic agent and echoes the instruction otherwise."""
+    model: str = "fake"
+
+    async def generate_content_async(self, llm_request, stream=False) -> AsyncGenerator[LlmResponse, None]:
+        instruction = llm_request.config.system_instruction
+        text = f"- {BRACED_TOPIC}" if "5項目程度のリスト" in instruction else instruction
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+def test_braced_topics_reach_the_report_agent_verbatim():
+    agent = ParallelResearchAgent(
+        name="research_agent",
+        topic_agent=research_agent1.model_copy(update={"model": EchoLlm()}),
+        report_agent=research_agent2.model_copy(update={"model": EchoLlm()}),
+    )
+    report = asyncio.run(run_once(InMemoryRunner(agent=agent, app_name=agent.name), "テーマ"))
+    assert parse_topics(f"- {BRACED_TOPIC}") == [BRACED_TOPIC]
+    assert f"### 1. {BRACED_TOPIC}" in report
+    assert f"担当トピック: {BRACED_TOPIC}" in report
+    assert "調査に失敗しました" not in report
@@ -0,0 +1,96 @@
+import logging
+import os
+import sys
+
+# Add the example directory to path so we can import its modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from history import SUMMARY_PREFIX, HistoryManager, estimate_tokens
+
+
+def _history(**kwargs):
+    calls = []
+
+    def summarizer(previous, turns):
+        calls.append((previous, list(turns)))
+        return f"summary of {len(turns)}"
+
+    return HistoryManager(summarizer=summarizer, **kwargs), calls
+
+
+def _add_turns(history, count, size=10):
+    for i in range(count):
+        history.add("user", f"q{i}" + "x" * size)
+        history.add("model", f"a{i}" + "y" * size)
+
+
+def test_estimate_tokens_counts_ascii_by_four_and_other_characters_by_one():
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+    assert estimate_tokens("日本語") == 3
+
+
+def test_within_budget_nothing_is_folded():
+    history, calls = _history(token_budget=1000, keep_recent=2)
+    _add_turns(history, 3)
+    assert calls == []
+    assert len(history.turns) == 6
+    assert history.messages() == history.turns
+
+
+def test_old_turns_are_folded_in_user_model_pairs():
+    history, calls = _history(token_budget=10, keep_recent=2)
+    _add_turns(history, 3)
+    # The budget only fits the two most recent messages; older ones are summarized pair by pair
+    assert history.turns == [("user", "q2" + "x" * 10), ("model", "a2" + "y" * 10)]
+    assert history.summarized_messages == 4
+    assert all(turns[0][0] == "user" and turns[-1][0] == "model" for _, turns in calls)
+    assert calls[-1][0] == "summary of 2"
+    assert history.messages()[0] == ("user", SUMMARY_PREFIX + history.summary)
+
+
+def test_keep_recent_is_kept_even_over_budget():
+    history, calls = _history(token_budget=1, keep_recent=3)
+    _add_turns(history, 2, size=100)
+    # Folding the first pair would leave fewer than keep_recent messages
+    assert len(history.turns) == 4 and calls == []
+
+    history.add("user", "q2")
+    assert history.turns[0] == ("user", "q1" + "x" * 100)
+    assert calls == [("", [("user", "q0" + "x" * 100), ("model", "a0" + "y" * 100)])]
+
+
+def test_a_leading_model_message_is_folded_alone():
+    history, calls = _history(token_budget=1, keep_recent=2)
+    history.turns = [("model", "orphan"), ("user", "q"), ("model", "a")]
+    history.add("user", "next")
+    assert calls[0][1] == [("model", "orphan")]
+    # The (q, a) pair stays until folding it no longer cuts into keep_recent
+    assert history.turns == [("user", "q"), ("model", "a"), ("user", "next")]
+
+
+def test_failed_summarizer_falls_back_to_truncated_summary(caplog, capsys):
+    def failing(previous, turns):
+        raise RuntimeError("boom")
+
+    history = HistoryManager(summarizer=failing, token_budget=10, keep_recent=2, summary_budget=50)
+    with caplog.at_level(logging.WARNING, logger="history"):
+        _add_turns(history, 2)
+    assert capsys.readouterr().out == ""
+    assert caplog.records[0].levelno == logging.WARNING
+    assert "boom" in str(caplog.records[0].exc_info[1])
+    assert history.summary.startswith("- ユーザー: q0")
+    assert estimate_tokens(history.summary) <= 50
+
+
+def test_record_turn_prefers_usage_metadata():
+    history, _ = _history()
+
+    class Usage:
+        prompt_token_count = 123
+        candidates_token_count = 45
+
+    estimated = history.record_turn(10, "abcd", 0.5)
+    actual = history.record_turn(10, "abcd", 0.5, Usage())
+    assert (estimated.prompt_tokens, estimated.response_tokens) == (10, 1)
+    assert (actual.prompt_tokens, actual.response_tokens, actual.turn) == (123, 45, 2)
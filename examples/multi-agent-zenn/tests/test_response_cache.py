@@ -0,0 +1,96 @@
+import asyncio
+import json
+import os
+import sys
+from typing import AsyncGenerator
+
+import pytest
+from google.adk.agents.llm_agent import Agent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+# Add the example directory to path so we can import its modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from response_cache import REPLAY_MISS_TEXT, ResponseCache, request_key
+from streaming import run_once
+
+
+class FakeLlm(BaseLlm):
+    """Answers "answer <n>" and counts its calls."""
+    model: str = "fake"
+    calls: int = 0
+
+    async def generate_content_async(self, llm_request, stream=False) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=f"answer {self.calls}")]))
+
+
+def _request(text, instruction="be brief"):
+    return LlmRequest(
+        contents=[types.Content(role="user", parts=[types.Part(text=text)])],
+        config=types.GenerateContentConfig(system_instruction=instruction),
+    )
+
+
+def _run(mode, path, prompt="hello"):
+    """Runs a one-agent app with the cache installed; returns (text, model calls, cache)."""
+    llm = FakeLlm()
+    agent = Agent(name="agent", model=llm, instruction="be brief")
+    cache = ResponseCache(mode=mode, path=str(path))
+    cache.install(agent)
+    text = asyncio.run(run_once(InMemoryRunner(agent=agent, app_name=agent.name), prompt))
+    return text, llm.calls, cache
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "cache.jsonl"
+
+
+def test_request_key_is_deterministic_and_covers_agent_instruction_and_history():
+    key = request_key("agent", _request("hello"))
+    assert key == request_key("agent", _request("hello"))
+    assert key != request_key("other", _request("hello"))
+    assert key != request_key("agent", _request("hello", instruction="be verbose"))
+    assert key != request_key("agent", _request("hello!"))
+
+
+def test_record_saves_every_response_and_calls_the_model(path):
+    assert _run("record", path)[:2] == ("answer 1", 1)
+    assert _run("record", path)[:2] == ("answer 1", 1)
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert len(records) == 2 and records[0]["key"] == records[1]["key"]
+    assert records[0]["agent"] == "agent"
+    assert records[0]["content"] == {"role": "model", "parts": [{"text": "answer 1"}]}
+
+
+def test_cache_reuses_recorded_responses_across_instances(path):
+    text, calls, cache = _run("cache", path)
+    assert (text, calls, cache.hits, cache.misses) == ("answer 1", 1, 0, 1)
+    # A new instance loads the file: same request, no model call
+    text, calls, cache = _run("cache", path)
+    assert (text, calls, cache.hits, cache.misses) == ("answer 1", 0, 1, 0)
+    assert _run("cache", path, prompt="other")[:2] == ("answer 1", 1)
+
+
+def test_replay_never_calls_the_model(path):
+    _run("record", path)
+    text, calls, cache = _run("replay", path)
+    assert (text, calls, cache.hits) == ("answer 1", 0, 1)
+
+    text, calls, cache = _run("replay", path, prompt="not recorded")
+    assert (text, calls, cache.misses) == (REPLAY_MISS_TEXT, 0, 1)
+    # A miss is not recorded
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 1
+
+
+def test_off_installs_nothing(path):
+    agent = Agent(name="agent", model=FakeLlm(), instruction="")
+    ResponseCache(mode="off", path=str(path)).install(agent)
+    assert agent.before_model_callback is None and agent.after_model_callback is None
+    with pytest.raises(ValueError):
+        ResponseCache(mode="unknown")
@@ -0,0 +1,82 @@
+import asyncio
+import io
+import os
+import sys
+import warnings
+from typing import AsyncGenerator
+
+import pytest
+from google.adk.agents import BaseAgent, LoopAgent, SequentialAgent
+from google.adk.agents.llm_agent import Agent
+from google.adk.events import Event
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+# Add the example directory to path so we can import its modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from history import HistoryManager
+from streaming import stream_turn
+
+
+def _content(text):
+    return types.Content(role="model", parts=[types.Part(text=text)])
+
+
+class FakeLlm(BaseLlm):
+    """Answers "<agent> v<number of earlier model turns>" with a partial chunk first when streaming."""
+    model: str = "fake"
+
+    async def generate_content_async(self, llm_request, stream=False) -> AsyncGenerator[LlmResponse, None]:
+        name = llm_request.config.system_instruction.split()[0]
+        text = f"{name} v{sum(1 for content in llm_request.contents if content.role == 'model')}"
+        if stream:
+            yield LlmResponse(content=_content(text[:3]), partial=True)
+        yield LlmResponse(
+            content=_content(text),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(prompt_token_count=10, candidates_token_count=3),
+        )
+
+
+class ReportAgent(BaseAgent):
+    """Emits several texts under its own name, like ParallelResearchAgent."""
+
+    async def _run_async_impl(self, ctx):
+        for text in ("## report", "section 1"):
+            yield Event(author=self.name, invocation_id=ctx.invocation_id, content=_content(text))
+
+
+def _print_agent(text, name):
+    return Agent(
+        name=name, model=FakeLlm(), instruction="",
+        before_model_callback=lambda callback_context, llm_request: LlmResponse(content=_content(text)),
+    )
+
+
+@pytest.fixture
+def runner():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        root = SequentialAgent(name="root", sub_agents=[
+            ReportAgent(name="research_agent"),
+            LoopAgent(name="write_and_review", max_iterations=2, sub_agents=[
+                Agent(name="writer", model=FakeLlm(), instruction="ARTICLE"),
+                Agent(name="reviewer", model=FakeLlm(), instruction="REVIEW"),
+            ]),
+            _print_agent("footer", "print_footer"),
+        ])
+    return InMemoryRunner(agent=root, app_name=root.name)
+
+
+@pytest.mark.parametrize("streaming", [True, False])
+def test_turn_text_keeps_the_report_and_the_latest_article(runner, streaming):
+    out = io.StringIO()
+    text, usage = asyncio.run(stream_turn(runner, HistoryManager(), "theme", out=out, streaming=streaming))
+    lines = text.splitlines()
+    assert lines[:2] == ["## report", "section 1"]
+    assert [line for line in lines if line.startswith(("ARTICLE", "REVIEW"))] == ["ARTICLE v1", "REVIEW v1"]
+    assert lines[-1] == "footer"
+    assert (usage.prompt_token_count, usage.candidates_token_count) == (40, 12)
+    assert out.getvalue().count("[writer]") == 2